@@ -0,0 +1,19 @@
+"""
+Historical backtests of the strategy templates over daily bars
+"""
+
+from .bars import BarMatrix, align_bars, fetch_bars, load_fixtures, synthetic_bars
+from .engine import BacktestConfig, BacktestReport, BacktestResult, run_backtest, simulate_template
+
+__all__ = [
+    'BarMatrix',
+    'align_bars',
+    'fetch_bars',
+    'load_fixtures',
+    'synthetic_bars',
+    'BacktestConfig',
+    'BacktestReport',
+    'BacktestResult',
+    'run_backtest',
+    'simulate_template',
+]
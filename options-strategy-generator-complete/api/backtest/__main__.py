@@ -0,0 +1,111 @@
+"""
+Command-line backtest runner
+
+Run from the api directory:
+    python -m backtest --fixtures path/to/bars --windows 30-45 7-14
+    python -m backtest --tickers AAPL SPY --start 2015-01-01 --end 2024-12-31 --save-fixtures bars/
+    python -m backtest --synthetic 500 --years 10
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest.bars import fetch_bars, load_fixtures, synthetic_bars
+from backtest.engine import BacktestConfig, run_backtest
+from strategies.registry import all_strategies, get_strategy
+
+
+def parse_window(text: str):
+    low, _, high = text.partition('-')
+    return int(low), int(high or low)
+
+
+async def download(args):
+    from data.polygon_client import PolygonClient
+    client = PolygonClient(api_key=os.getenv("POLYGON_API_KEY", ""))
+    await client.start()
+    try:
+        return await fetch_bars(client, args.tickers, args.start, args.end, save_to=args.save_fixtures)
+    finally:
+        await client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest strategy templates over daily bars")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--fixtures', help="Directory of {TICKER}.csv daily bars")
+    source.add_argument('--synthetic', type=int, metavar='N', help="Generate N synthetic tickers")
+    source.add_argument('--start', help="Download bars from Polygon starting at this date")
+    parser.add_argument('--end', help="Last date to download (with --start)")
+    parser.add_argument('--tickers', nargs='+', help="Tickers to load or download")
+    parser.add_argument('--save-fixtures', help="Write downloaded bars to this directory")
+    parser.add_argument('--years', type=float, default=10.0, help="Synthetic history length")
+    parser.add_argument('--templates', nargs='+', help="Strategy names (default: all registered)")
+    parser.add_argument('--windows', nargs='+', type=parse_window, default=[(30, 45)], help="DTE windows, e.g. 30-45")
+    parser.add_argument('--entry-every', type=int, default=5)
+    parser.add_argument('--profit-target', type=float, default=0.5)
+    parser.add_argument('--stop-loss', type=float, default=2.0)
+    parser.add_argument('--hold', action='store_true', help="Ignore profit target and stop; hold to expiry")
+    parser.add_argument('--strike-mode', choices=('dollar', 'percent'), default='dollar')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--json', help="Write the summary as JSON to this path ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.fixtures:
+        bars = load_fixtures(args.fixtures, args.tickers)
+    elif args.synthetic:
+        bars = synthetic_bars(args.synthetic, years=args.years)
+    else:
+        if not args.tickers or not args.end:
+            parser.error("--start requires --end and --tickers")
+        bars = asyncio.run(download(args))
+
+    if args.templates:
+        definitions = [get_strategy(name) for name in args.templates]
+        missing = [name for name, d in zip(args.templates, definitions) if d is None]
+        if missing:
+            parser.error(f"Unknown strategies: {', '.join(missing)}")
+    else:
+        definitions = all_strategies()
+
+    config = BacktestConfig(
+        windows=args.windows,
+        entry_every=args.entry_every,
+        profit_target=None if args.hold else args.profit_target,
+        stop_loss=None if args.hold else args.stop_loss,
+        strike_mode=args.strike_mode,
+        workers=args.workers,
+    )
+    report = run_backtest(bars, definitions, config)
+    summary = report.summary()
+
+    if args.json:
+        text = json.dumps(summary, indent=2)
+        if args.json == '-':
+            print(text)
+        else:
+            with open(args.json, 'w') as f:
+                f.write(text)
+
+    if args.json != '-':
+        print(f"{summary['tickers']} tickers, {summary['start']} to {summary['end']}, "
+              f"{summary['trades']:,} trades in {summary['elapsed_seconds']:.1f}s")
+        print(f"{'template':<20} {'window':>7} {'trades':>9} {'win%':>6} {'mean $':>9} {'median $':>9} {'p5 $':>9} {'cvar5 $':>9}")
+        for row in summary['results']:
+            if not row['trades']:
+                continue
+            window = f"{row['window'][0]}-{row['window'][1]}"
+            print(f"{row['template']:<20} {window:>7} {row['trades']:>9,} {row['win_rate'] * 100:>5.1f}% "
+                  f"{row['mean']:>9.2f} {row['median']:>9.2f} {row['p5']:>9.2f} {row['cvar_5']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+"""
+Vectorized backtests of strategy templates over daily bars
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from strategies.pricing import CALL, PUT, DAYS_PER_YEAR, black_scholes_price
+from strategies.registry import StrategyDefinition, all_strategies, linear_payoff
+
+from .bars import BarMatrix
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+
+# Exit reasons recorded per trade
+EXIT_EXPIRY = 0
+EXIT_TARGET = 1
+EXIT_STOP = 2
+
+
+@dataclass
+class BacktestConfig:
+    windows: Sequence[Tuple[int, int]] = ((30, 45),)  # DTE windows; entries use the midpoint
+    entry_every: int = 5                # Trading days between entries per ticker
+    vol_lookback: int = 20              # Trading days of realized vol behind each entry
+    iv_premium: float = 1.1             # Entry IV = realized vol x this (no historical quotes)
+    min_iv: float = 0.05
+    rate: float = 0.05
+    profit_target: Optional[float] = 0.5  # Close at this fraction of the entry premium, None to hold
+    stop_loss: Optional[float] = 2.0      # Close when losing this multiple of the entry premium
+    strike_mode: str = 'dollar'         # 'dollar': template offsets as-is; 'percent': offsets are % of spot
+    chunk_entries: int = 20000          # Entries revalued at once; bounds memory
+    tickers_per_task: int = 25
+    workers: Optional[int] = None       # Process pool size; None uses every CPU, 1 runs in-process
+
+
+@dataclass
+class BacktestResult:
+    """Every simulated trade of one template in one DTE window"""
+    template: str
+    window: Tuple[int, int]
+    pnl: np.ndarray                     # Dollars per position
+    capital: np.ndarray                 # Capital required at entry, dollars
+    holding_days: np.ndarray            # Trading days held
+    exit_reason: np.ndarray             # EXIT_EXPIRY / EXIT_TARGET / EXIT_STOP
+    ticker_index: np.ndarray            # Row in the BarMatrix
+    entry_date: np.ndarray = field(default_factory=lambda: np.array([], dtype='datetime64[D]'))
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    def summary(self) -> Dict[str, Any]:
+        """P&L distribution statistics"""
+        n = len(self.pnl)
+        if not n:
+            return {'template': self.template, 'window': list(self.window), 'trades': 0}
+
+        pnl = self.pnl
+        sorted_pnl = np.sort(pnl)
+        tail = sorted_pnl[:max(1, int(n * 0.05))]
+        p5, p25, p50, p75, p95 = np.percentile(pnl, [5, 25, 50, 75, 95])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roc = np.where(self.capital > 0, pnl / self.capital, np.nan)
+        return {
+            'template': self.template,
+            'window': list(self.window),
+            'trades': n,
+            'win_rate': float(np.mean(pnl > 0)),
+            'mean': float(pnl.mean()),
+            'std': float(pnl.std()),
+            'median': float(p50),
+            'p5': float(p5),
+            'p25': float(p25),
+            'p75': float(p75),
+            'p95': float(p95),
+            'cvar_5': float(tail.mean()),
+            'worst': float(sorted_pnl[0]),
+            'best': float(sorted_pnl[-1]),
+            'total': float(pnl.sum()),
+            'mean_return_on_capital': float(np.nanmean(roc)) if np.isfinite(roc).any() else None,
+            'mean_holding_days': float(self.holding_days.mean()),
+            'target_exits': int((self.exit_reason == EXIT_TARGET).sum()),
+            'stop_exits': int((self.exit_reason == EXIT_STOP).sum()),
+        }
+
+
+@dataclass
+class BacktestReport:
+    results: List[BacktestResult]
+    tickers: List[str]
+    start: str
+    end: str
+    elapsed: float
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'tickers': len(self.tickers),
+            'start': self.start,
+            'end': self.end,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'trades': int(sum(len(r) for r in self.results)),
+            'results': [r.summary() for r in self.results],
+        }
+
+
+def realized_volatility(close: np.ndarray, lookback: int) -> np.ndarray:
+    """
+    Annualized close-to-close volatility over the `lookback` returns ending at
+    each date, shape (tickers, dates); NaN where the window has gaps.
+    """
+    n_tickers, n_dates = close.shape
+    out = np.full((n_tickers, n_dates), np.nan)
+    if n_dates <= lookback:
+        return out
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(close), axis=1)
+    valid = np.isfinite(returns)
+    r = np.where(valid, returns, 0.0)
+
+    def cumulative(x):
+        return np.concatenate((np.zeros((n_tickers, 1)), np.cumsum(x, axis=1)), axis=1)
+
+    s1, s2, count = cumulative(r), cumulative(r * r), cumulative(valid)
+    # Returns r[d - lookback .. d - 1] end at close[d]
+    total = s1[:, lookback:] - s1[:, :-lookback]
+    total_sq = s2[:, lookback:] - s2[:, :-lookback]
+    full = (count[:, lookback:] - count[:, :-lookback]) == lookback
+    var = (total_sq - total * total / lookback) / (lookback - 1)
+    out[:, lookback:] = np.where(full, np.sqrt(np.maximum(var, 0.0) * TRADING_DAYS), np.nan)
+    return out
+
+
+def _leg_arrays(definition: StrategyDefinition):
+    options = [leg for leg in definition.legs if leg.type != 'stock']
+    offsets = np.array([leg.offset for leg in options], dtype=np.float64)
+    quantities = np.array([leg.quantity for leg in options], dtype=np.float64)
+    codes = np.array([CALL if leg.type == 'call' else PUT for leg in options], dtype=np.float64)
+    stock = float(sum(leg.quantity for leg in definition.legs if leg.type == 'stock'))
+    return offsets, quantities, codes, stock
+
+
+def simulate_template(
+    definition: StrategyDefinition,
+    bars: BarMatrix,
+    window: Tuple[int, int],
+    config: BacktestConfig,
+    vol: Optional[np.ndarray] = None
+) -> BacktestResult:
+    """
+    Open the template on every entry date of every ticker and replay it.
+
+    All entries are priced and revalued together as (entries, days, legs)
+    arrays: Black-Scholes at a realized-vol-implied IV on entry and on every
+    later close, exiting at the profit target, the stop, or expiration
+    (intrinsic value at the last close on or before expiry).
+    """
+    dte = int(round((window[0] + window[1]) / 2))
+    close = bars.close
+    dates = bars.dates
+    n_tickers, n_dates = close.shape
+    if vol is None:
+        vol = realized_volatility(close, config.vol_lookback)
+
+    # Entry grid over tickers x dates, kept where the trade completes inside the data
+    entry_cols = np.arange(config.vol_lookback, n_dates, config.entry_every)
+    expiry = dates[entry_cols] + np.timedelta64(dte, 'D')
+    exit_cols = np.searchsorted(dates, expiry, side='right') - 1
+    complete = expiry <= dates[-1] if n_dates else np.zeros(0, dtype=bool)
+    entry_cols, exit_cols, expiry = entry_cols[complete], exit_cols[complete], expiry[complete]
+
+    rows, slot = np.nonzero(
+        np.isfinite(close[:, entry_cols]) & np.isfinite(vol[:, entry_cols])
+        & np.isfinite(close[:, exit_cols])
+    )
+    entry, exit_, expiry = entry_cols[slot], exit_cols[slot], expiry[slot]
+
+    offsets, quantities, codes, stock = _leg_arrays(definition)
+    parts = [
+        _replay(rows[i:i + config.chunk_entries], entry[i:i + config.chunk_entries],
+                exit_[i:i + config.chunk_entries], expiry[i:i + config.chunk_entries],
+                close, dates, vol, offsets, quantities, codes, stock, definition, config)
+        for i in range(0, len(rows), config.chunk_entries)
+    ]
+    if parts:
+        pnl, capital, held, reason = (np.concatenate(col) for col in zip(*parts))
+    else:
+        pnl = capital = held = np.empty(0)
+        reason = np.empty(0, dtype=np.int8)
+
+    return BacktestResult(
+        template=definition.name,
+        window=tuple(window),
+        pnl=pnl,
+        capital=capital,
+        holding_days=held,
+        exit_reason=reason,
+        ticker_index=rows,
+        entry_date=dates[entry],
+    )
+
+
+def _replay(rows, entry, exit_, expiry, close, dates, vol, offsets, quantities, codes, stock, definition, config):
+    """Price, revalue and exit one chunk of entries"""
+    spot = close[rows, entry]
+    iv = np.maximum(vol[rows, entry] * config.iv_premium, config.min_iv)
+    if config.strike_mode == 'percent':
+        strikes = spot[:, None] * (1.0 + offsets / 100.0)
+    else:
+        strikes = spot[:, None] + offsets
+    strikes = np.maximum(strikes, 0.01)
+
+    years = (expiry - dates[entry]).astype(np.float64) / DAYS_PER_YEAR
+    entry_prices = black_scholes_price(spot[:, None], strikes, years[:, None], iv[:, None], config.rate, codes)
+    net_premium = entry_prices @ quantities       # Per share, positive = debit
+
+    # Day k of each trade is bar min(entry + k, exit); the last column is the exit bar
+    horizon = int((exit_ - entry).max()) if len(entry) else 0
+    cols = np.minimum(entry[:, None] + np.arange(horizon + 1), exit_[:, None])
+    path = close[rows[:, None], cols]
+    remaining = (expiry[:, None] - dates[cols]).astype(np.float64) / DAYS_PER_YEAR
+    # Settle at intrinsic on the exit bar even when expiry falls on a non-trading day
+    remaining[cols == exit_[:, None]] = 0.0
+
+    values = black_scholes_price(
+        path[:, :, None], strikes[:, None, :], remaining[:, :, None], iv[:, None, None], config.rate, codes
+    ) @ quantities
+    pnl_path = values - net_premium[:, None] + stock * (path - spot[:, None])
+
+    held = exit_ - entry
+    final = pnl_path[:, -1]
+    reason = np.full(len(entry), EXIT_EXPIRY, dtype=np.int8)
+
+    if config.profit_target is not None or config.stop_loss is not None:
+        scale = np.abs(net_premium)[:, None]
+        hit = np.zeros(pnl_path.shape, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            target = pnl_path >= config.profit_target * scale if config.profit_target is not None else hit
+            stop = pnl_path <= -config.stop_loss * scale if config.stop_loss is not None else hit
+        hit = target | stop
+        hit[:, 0] = False
+        hit &= cols < exit_[:, None]
+        triggered = hit.any(axis=1)
+        first = np.argmax(hit, axis=1)
+
+        idx = np.flatnonzero(triggered)
+        final = final.copy()
+        final[idx] = pnl_path[idx, first[idx]]
+        held = np.where(triggered, first, held)
+        reason[idx] = np.where(target[idx, first[idx]], EXIT_TARGET, EXIT_STOP)
+
+    # Capital uses the template's own rule on expiration payoffs at the strikes and beyond
+    grid = np.concatenate((np.full((len(spot), 1), 0.01), strikes, strikes.max(axis=1, keepdims=True) * 2), axis=1)
+    payoff = (
+        np.maximum(codes * (grid[:, :, None] - strikes[:, None, :]), 0.0) @ quantities
+        + stock * (grid - spot[:, None]) - net_premium[:, None]
+    )
+    metrics = {
+        'max_loss': np.minimum(payoff.min(axis=1), 0.0) * 100,
+        'net_premium': net_premium,
+        'strikes': strikes.T,
+    }
+    capital = np.broadcast_to(np.asarray(definition.capital_rule(metrics, spot), dtype=np.float64), spot.shape)
+
+    return final * 100, capital, held.astype(np.float64), reason
+
+
+def _run_chunk(bars: BarMatrix, offset: int, definitions: List[StrategyDefinition], config: BacktestConfig):
+    """Process-pool task: every template and window over one group of tickers"""
+    vol = realized_volatility(bars.close, config.vol_lookback)
+    out = []
+    for definition in definitions:
+        for window in config.windows:
+            result = simulate_template(definition, bars, window, config, vol=vol)
+            result.ticker_index = result.ticker_index + offset
+            out.append(result)
+    return out
+
+
+def _merge(parts: List[BacktestResult]) -> BacktestResult:
+    first = parts[0]
+    return BacktestResult(
+        template=first.template,
+        window=first.window,
+        **{
+            name: np.concatenate([getattr(p, name) for p in parts])
+            for name in ('pnl', 'capital', 'holding_days', 'exit_reason', 'ticker_index', 'entry_date')
+        }
+    )
+
+
+def run_backtest(
+    bars: BarMatrix,
+    definitions: Optional[Sequence[StrategyDefinition]] = None,
+    config: Optional[BacktestConfig] = None
+) -> BacktestReport:
+    """
+    Backtest templates (default: every registered strategy) over all tickers
+    and DTE windows.
+
+    Tickers are split into groups of tickers_per_task and the groups run on a
+    process pool; within a group every date and ticker is vectorized.
+    """
+    config = config or BacktestConfig()
+    started = time.perf_counter()
+
+    definitions = list(definitions or all_strategies())
+    supported = [d for d in definitions if d.payoff is linear_payoff]
+    for d in definitions:
+        if d.payoff is not linear_payoff:
+            logger.warning(f"Skipping {d.name}: backtests only replay linear expiration payoffs")
+
+    groups = [
+        (bars.select(start, start + config.tickers_per_task), start)
+        for start in range(0, len(bars), config.tickers_per_task)
+    ]
+    workers = config.workers or os.cpu_count() or 1
+
+    if workers == 1 or len(groups) <= 1:
+        chunks = [_run_chunk(group, offset, supported, config) for group, offset in groups]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(groups))) as pool:
+            futures = [pool.submit(_run_chunk, group, offset, supported, config) for group, offset in groups]
+            chunks = [future.result() for future in futures]
+
+    # Each chunk returns results in the same (template, window) order
+    results = [_merge(list(parts)) for parts in zip(*chunks)] if chunks else []
+
+    return BacktestReport(
+        results=results,
+        tickers=list(bars.tickers),
+        start=str(bars.dates[0]) if len(bars.dates) else '',
+        end=str(bars.dates[-1]) if len(bars.dates) else '',
+        elapsed=time.perf_counter() - started,
+    )
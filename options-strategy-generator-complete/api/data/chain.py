@@ -0,0 +1,218 @@
+"""
+Columnar in-memory options chain store
+"""
+
+import numpy as np
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CALL = 1
+PUT = -1
+
+# Column name -> dtype; every chain holds exactly these columns
+COLUMNS = {
+    'strike': np.float64,
+    'expiry': 'datetime64[D]',
+    'type': np.int8,
+    'bid': np.float64,
+    'ask': np.float64,
+    'iv': np.float64,
+    'open_interest': np.float64,
+}
+
+
+def _as_day(value) -> np.datetime64:
+    if value is None:
+        return np.datetime64(date.today(), 'D')
+    if isinstance(value, datetime):
+        value = value.date()
+    return np.datetime64(value, 'D')
+
+
+class OptionChain:
+    """
+    Options chain stored as parallel NumPy columns.
+
+    Rows are sorted by (expiry, type, strike), so every expiry is a contiguous
+    block and every (expiry, type) pair a contiguous run of ascending strikes.
+    DTE windows and strike ranges are therefore binary-searched slices, and
+    slicing returns views rather than copies.
+    """
+
+    def __init__(
+        self,
+        underlying: str,
+        columns: Dict[str, np.ndarray],
+        symbols: Optional[np.ndarray] = None,
+        as_of: Optional[date] = None,
+        presorted: bool = False,
+        fetched_at: Optional[str] = None
+    ):
+        self.underlying = underlying
+        self.as_of = _as_day(as_of)
+        self.fetched_at = fetched_at or datetime.now().isoformat()
+
+        # Columns already of the right dtype (including memory-mapped ones) are not copied
+        cols = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMNS.items()}
+        if symbols is None:
+            symbols = np.full(len(cols['strike']), '', dtype=object)
+        symbols = np.asarray(symbols)
+        if symbols.dtype.kind != 'U':
+            symbols = symbols.astype(object)
+
+        if not presorted and len(symbols):
+            order = np.lexsort((cols['strike'], cols['type'], cols['expiry']))
+            cols = {name: col[order] for name, col in cols.items()}
+            symbols = symbols[order]
+
+        self.columns = cols
+        self.symbols = symbols
+        self._blocks: Optional[Dict[Tuple[np.datetime64, int], Tuple[int, int]]] = None
+
+    @classmethod
+    def from_records(
+        cls,
+        underlying: str,
+        records: Iterable[Dict],
+        as_of: Optional[date] = None
+    ) -> 'OptionChain':
+        """Build a chain from dicts with strike/expiry/type/bid/ask/iv/open_interest/symbol keys"""
+        records = list(records)
+        nan = float('nan')
+        columns = {
+            'strike': [r['strike'] for r in records],
+            'expiry': [r['expiry'] for r in records],
+            'type': [CALL if str(r['type']).lower().startswith('c') else PUT for r in records],
+            'bid': [nan if r.get('bid') is None else r['bid'] for r in records],
+            'ask': [nan if r.get('ask') is None else r['ask'] for r in records],
+            'iv': [nan if r.get('iv') is None else r['iv'] for r in records],
+            'open_interest': [nan if r.get('open_interest') is None else r['open_interest'] for r in records],
+        }
+        symbols = np.array([r.get('symbol', '') for r in records], dtype=object)
+        return cls(underlying, columns, symbols=symbols, as_of=as_of)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def mid(self) -> np.ndarray:
+        """Bid/ask midpoint, NaN where either side is missing"""
+        return (self.columns['bid'] + self.columns['ask']) / 2.0
+
+    @property
+    def dte(self) -> np.ndarray:
+        """Calendar days to expiration for every row"""
+        return (self.columns['expiry'] - self.as_of).astype(np.int64)
+
+    @property
+    def expirations(self) -> np.ndarray:
+        """Distinct expiries in ascending order"""
+        expiry = self.columns['expiry']
+        if not len(expiry):
+            return expiry
+        starts = np.flatnonzero(np.r_[True, expiry[1:] != expiry[:-1]])
+        return expiry[starts]
+
+    def _slice(self, start: int, stop: int) -> 'OptionChain':
+        chain = OptionChain.__new__(OptionChain)
+        chain.underlying = self.underlying
+        chain.as_of = self.as_of
+        chain.fetched_at = self.fetched_at
+        chain.columns = {name: col[start:stop] for name, col in self.columns.items()}
+        chain.symbols = self.symbols[start:stop]
+        chain._blocks = None
+        return chain
+
+    def take(self, indices: np.ndarray) -> 'OptionChain':
+        """Rows at the given (sorted) positions"""
+        chain = self._slice(0, 0)
+        chain.columns = {name: col[indices] for name, col in self.columns.items()}
+        chain.symbols = self.symbols[indices]
+        return chain
+
+    def slice_dte(self, min_dte: int, max_dte: int) -> 'OptionChain':
+        """Contracts expiring within [min_dte, max_dte] days of as_of"""
+        expiry = self.columns['expiry']
+        lo = np.searchsorted(expiry, self.as_of + np.timedelta64(min_dte, 'D'), side='left')
+        hi = np.searchsorted(expiry, self.as_of + np.timedelta64(max_dte, 'D'), side='right')
+        return self._slice(lo, hi)
+
+    def expiry_slice(self, expiry) -> 'OptionChain':
+        """All contracts for one expiry"""
+        expiry = _as_day(expiry)
+        col = self.columns['expiry']
+        lo = np.searchsorted(col, expiry, side='left')
+        hi = np.searchsorted(col, expiry, side='right')
+        return self._slice(lo, hi)
+
+    def nearest_expiry(self, target_dte: float) -> Optional[np.datetime64]:
+        """Listed expiry closest to target_dte days out"""
+        expirations = self.expirations
+        if not len(expirations):
+            return None
+        dtes = (expirations - self.as_of).astype(np.int64)
+        return expirations[int(np.argmin(np.abs(dtes - target_dte)))]
+
+    def atm_iv(self, spot: float) -> Optional[float]:
+        """Average call/put IV at the strike nearest spot in the first expiry"""
+        if not len(self):
+            return None
+        expiry = self.columns['expiry'][0]
+        ivs = []
+        for option_type in (CALL, PUT):
+            row = self.nearest_strike(expiry, option_type, spot)
+            if row is not None and np.isfinite(self.columns['iv'][row]) and self.columns['iv'][row] > 0:
+                ivs.append(float(self.columns['iv'][row]))
+        return float(np.mean(ivs)) if ivs else None
+
+    def _block(self, expiry, option_type: int) -> Tuple[int, int]:
+        if self._blocks is None:
+            expiry_col = self.columns['expiry']
+            type_col = self.columns['type']
+            n = len(expiry_col)
+            if n:
+                changes = np.r_[True, (expiry_col[1:] != expiry_col[:-1]) | (type_col[1:] != type_col[:-1])]
+                starts = np.flatnonzero(changes)
+                stops = np.r_[starts[1:], n]
+                self._blocks = {
+                    (expiry_col[s], int(type_col[s])): (int(s), int(e))
+                    for s, e in zip(starts, stops)
+                }
+            else:
+                self._blocks = {}
+        return self._blocks.get((_as_day(expiry), option_type), (0, 0))
+
+    def strike_range(self, expiry, option_type: int, min_strike: float, max_strike: float) -> 'OptionChain':
+        """Contracts of one expiry and type with strikes in [min_strike, max_strike]"""
+        start, stop = self._block(expiry, option_type)
+        strikes = self.columns['strike'][start:stop]
+        lo = start + np.searchsorted(strikes, min_strike, side='left')
+        hi = start + np.searchsorted(strikes, max_strike, side='right')
+        return self._slice(lo, hi)
+
+    def nearest_strike(self, expiry, option_type: int, strike: float) -> Optional[int]:
+        """Row index of the listed strike closest to the requested one"""
+        start, stop = self._block(expiry, option_type)
+        if start == stop:
+            return None
+        strikes = self.columns['strike'][start:stop]
+        i = int(np.searchsorted(strikes, strike))
+        if i == len(strikes) or (i > 0 and strike - strikes[i - 1] <= strikes[i] - strike):
+            i -= 1
+        return start + i
+
+    def to_records(self) -> List[Dict]:
+        """Row dicts, mainly for debugging and export"""
+        return [
+            {
+                'symbol': self.symbols[i],
+                'strike': float(self.columns['strike'][i]),
+                'expiry': str(self.columns['expiry'][i]),
+                'type': 'call' if self.columns['type'][i] == CALL else 'put',
+                'bid': float(self.columns['bid'][i]),
+                'ask': float(self.columns['ask'][i]),
+                'iv': float(self.columns['iv'][i]),
+                'open_interest': float(self.columns['open_interest'][i]),
+            }
+            for i in range(len(self))
+        ]
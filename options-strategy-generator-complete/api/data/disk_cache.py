@@ -0,0 +1,280 @@
+"""
+Persistent market-data cache: quotes in SQLite, option chains as memory-mapped .npy columns
+"""
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    # Chain columns need NumPy; it is imported on the first chain read or
+    # write so quote lookups stay cheap on a cold start
+    from .chain import OptionChain
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    ticker TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chains (
+    key TEXT PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    as_of TEXT NOT NULL,
+    min_dte INTEGER NOT NULL,
+    max_dte INTEGER NOT NULL,
+    fetched_at TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chains_by_ticker ON chains (ticker, stored_at);
+"""
+
+
+class DiskCache:
+    """
+    Market data persisted below the in-process caches, shared by every
+    worker pointed at the same directory.
+
+    Each chain is a directory holding one .npy file per column, opened with
+    mmap_mode='r' so loading maps pages instead of parsing or copying.
+    Quotes and the chain index live in one SQLite file. Once the total size
+    passes max_bytes, the least recently read entries are deleted.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chain_dir = os.path.join(root, 'chains')
+        os.makedirs(self.chain_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(root, 'market_data.sqlite3'), check_same_thread=False, timeout=5.0
+        )
+        self._db.execute('PRAGMA journal_mode=WAL')
+        # Losing the last access-time updates on a crash only perturbs LRU order
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Quotes
+
+    def get_quote(self, ticker: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """Stored quote dict, or None if missing or older than max_age seconds"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT data, stored_at FROM quotes WHERE ticker = ?', (ticker,)
+            ).fetchone()
+            if row is None or (max_age is not None and time.time() - row[1] > max_age):
+                self.misses += 1
+                return None
+            self._db.execute(
+                'UPDATE quotes SET accessed_at = ? WHERE ticker = ?', (time.time(), ticker)
+            )
+            self._db.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put_quote(self, ticker: str, data: Dict):
+        payload = json.dumps(data, default=str)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO quotes VALUES (?, ?, ?, ?, ?)',
+                (ticker, payload, now, now, len(payload))
+            )
+            self._db.commit()
+            self._evict()
+
+    # Chains
+
+    @staticmethod
+    def _chain_key(ticker: str, as_of: str, min_dte: int, max_dte: int) -> str:
+        return f"{ticker}/{as_of}/{min_dte}-{max_dte}"
+
+    def _chain_path(self, key: str) -> str:
+        return os.path.join(self.chain_dir, key.replace('/', '_'))
+
+    def get_chain(
+        self,
+        ticker: str,
+        min_dte: int,
+        max_dte: int,
+        as_of: Optional[str] = None,
+        max_age: Optional[float] = None
+    ) -> Optional["OptionChain"]:
+        """
+        Most recent stored chain covering [min_dte, max_dte], memory-mapped.
+
+        as_of restricts the match to chains recorded on that date; None
+        accepts any date (replay). A wider stored window is sliced down.
+        """
+        query = (
+            'SELECT key, as_of, min_dte, max_dte, fetched_at, stored_at FROM chains '
+            'WHERE ticker = ? AND min_dte <= ? AND max_dte >= ?'
+        )
+        params: Tuple[Any, ...] = (ticker, min_dte, max_dte)
+        if as_of is not None:
+            query += ' AND as_of = ?'
+            params += (as_of,)
+        query += ' ORDER BY stored_at DESC LIMIT 1'
+
+        with self._lock:
+            row = self._db.execute(query, params).fetchone()
+            if row is None or (max_age is not None and time.time() - row[5] > max_age):
+                self.misses += 1
+                return None
+            key, stored_as_of, stored_min, stored_max, fetched_at, _ = row
+            self._db.execute('UPDATE chains SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self._db.commit()
+
+        import numpy as np
+        from .chain import COLUMNS, OptionChain
+
+        path = self._chain_path(key)
+        try:
+            columns = {
+                name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+                for name in COLUMNS
+            }
+            symbols = np.load(os.path.join(path, 'symbols.npy'), mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable cached chain {key}: {e}")
+            self._delete_chain(key)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        chain = OptionChain(
+            ticker, columns, symbols=symbols, as_of=stored_as_of,
+            presorted=True, fetched_at=fetched_at
+        )
+        if (stored_min, stored_max) != (min_dte, max_dte):
+            chain = chain.slice_dte(min_dte, max_dte)
+        return chain
+
+    def put_chain(self, ticker: str, min_dte: int, max_dte: int, chain: "OptionChain"):
+        """
+        Write the chain's columns to a fresh directory and swap it in.
+
+        A directory cannot be replaced while it has contents, so an existing
+        copy is renamed aside first and deleted only once the new one is in
+        place; readers never find the path missing or half-deleted.
+        """
+        import numpy as np
+
+        as_of = str(chain.as_of)
+        key = self._chain_key(ticker, as_of, min_dte, max_dte)
+        path = self._chain_path(key)
+        token = uuid.uuid4().hex
+        staging = f"{path}.{token}.tmp"
+        retired = f"{path}.{token}.old"
+
+        os.makedirs(staging)
+        try:
+            for name, column in chain.columns.items():
+                np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(column))
+            # Fixed-width unicode keeps symbols mappable (object arrays are pickled)
+            np.save(os.path.join(staging, 'symbols.npy'), np.asarray(chain.symbols, dtype=str))
+            size = sum(entry.stat().st_size for entry in os.scandir(staging))
+
+            try:
+                os.rename(path, retired)
+            except FileNotFoundError:
+                retired = None
+            try:
+                os.replace(staging, path)
+            except OSError:
+                if retired is not None:
+                    # Put the previous copy back rather than leave nothing
+                    os.rename(retired, path)
+                raise
+        except OSError as e:
+            # Another worker may have written the same chain concurrently
+            logger.warning(f"Could not persist chain {key}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        if retired is not None:
+            shutil.rmtree(retired, ignore_errors=True)
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO chains VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, ticker, as_of, min_dte, max_dte, chain.fetched_at, now, now, size)
+            )
+            self._db.commit()
+            self._evict()
+
+    def _delete_chain(self, key: str):
+        with self._lock:
+            self._db.execute('DELETE FROM chains WHERE key = ?', (key,))
+            self._db.commit()
+        shutil.rmtree(self._chain_path(key), ignore_errors=True)
+
+    # Size management
+
+    def size(self) -> int:
+        row = self._db.execute(
+            'SELECT (SELECT COALESCE(SUM(size), 0) FROM quotes) + '
+            '(SELECT COALESCE(SUM(size), 0) FROM chains)'
+        ).fetchone()
+        return int(row[0])
+
+    def _evict(self):
+        """Delete least recently read entries until the cache fits max_bytes; caller holds the lock"""
+        total = self.size()
+        while total > self.max_bytes:
+            row = self._db.execute(
+                "SELECT 'quotes', ticker, size, accessed_at FROM quotes "
+                "UNION ALL SELECT 'chains', key, size, accessed_at FROM chains "
+                "ORDER BY accessed_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            table, key, size, _ = row
+            if table == 'quotes':
+                self._db.execute('DELETE FROM quotes WHERE ticker = ?', (key,))
+            else:
+                self._db.execute('DELETE FROM chains WHERE key = ?', (key,))
+                shutil.rmtree(self._chain_path(key), ignore_errors=True)
+            total -= size
+            self.evictions += 1
+        self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            quotes = self._db.execute('SELECT COUNT(*) FROM quotes').fetchone()[0]
+            chains = self._db.execute('SELECT COUNT(*) FROM chains').fetchone()[0]
+            size = self.size()
+        return {
+            'root': self.root,
+            'quotes': quotes,
+            'chains': chains,
+            'size_bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -2,57 +2,352 @@
 Async Polygon API client for real-time market data
 """
 
-import aiohttp
 import asyncio
 import logging
-from typing import Dict, Optional, List
-from datetime import datetime, timedelta
+from dataclasses import replace
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+
+from .cache import TTLCache
+from .snapshot import MarketSnapshot
+from .streaming import LIVE_PRICE_STEP, LIVE_QUOTE_MAX_AGE, LastValueStore
+from .transport import PolygonTransport, TransportConfig
+from monitoring import REGISTRY
+
+if TYPE_CHECKING:
+    # NumPy-backed; imported when the first chain is parsed so quote-only
+    # cold starts never load NumPy
+    from .chain import OptionChain
+    from .disk_cache import DiskCache
 
 logger = logging.getLogger(__name__)
 
+FALLBACKS = REGISTRY.counter(
+    'market_data_fallbacks_total', 'Quotes and chains served stale or as demo data', ('kind',)
+)
+
+# Previous-day aggregates only change once per session
+QUOTE_CACHE_TTL = 900.0
+QUOTE_CACHE_SIZE = 1024
+
+# Option quotes move intraday, so chains are cached briefly
+CHAIN_CACHE_TTL = 60.0
+CHAIN_CACHE_SIZE = 64
+CHAIN_PAGE_LIMIT = 250
+CHAIN_MAX_PAGES = 40
+
+# How long past expiry a cached quote or chain may still be served, flagged stale,
+# when Polygon cannot be reached
+STALE_TTL = 86400.0
+
 class PolygonClient:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        cache_ttl: float = QUOTE_CACHE_TTL,
+        cache_size: int = QUOTE_CACHE_SIZE,
+        transport_config: Optional[TransportConfig] = None,
+        demo_fallback: bool = True,
+        disk_cache: Optional["DiskCache"] = None,
+        offline: bool = False,
+        live_quotes: Optional[LastValueStore] = None,
+        live_max_age: float = LIVE_QUOTE_MAX_AGE,
+        live_price_step: float = LIVE_PRICE_STEP,
+        base_url: str = "https://api.polygon.io"
+    ):
         self.api_key = api_key
-        self.base_url = "https://api.polygon.io"
-        self.session = None
+        self.base_url = base_url
+        self.transport = PolygonTransport(self.base_url, transport_config)
+        self.demo_fallback = demo_fallback
+        # Offline replay serves everything from disk_cache and never calls Polygon
+        self.disk_cache = disk_cache
+        self.offline = offline
+        self.quote_cache = TTLCache(max_size=cache_size, ttl=cache_ttl, stale_ttl=STALE_TTL)
+        self.chain_cache = TTLCache(max_size=CHAIN_CACHE_SIZE, ttl=CHAIN_CACHE_TTL, stale_ttl=STALE_TTL)
+        # Streamed quotes, kept current by a QuoteStream, take precedence over REST
+        self.live_quotes = live_quotes
+        self.live_max_age = live_max_age
+        self.live_price_step = live_price_step
 
-    async def get_session(self):
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-        return self.session
+    async def start(self, prewarm: bool = False):
+        """Open the pooled HTTP session; call from application startup"""
+        await self.transport.start(prewarm=prewarm)
 
     async def get_stock_price(self, ticker: str) -> Optional[Dict]:
-        """Get current stock price and basic info"""
+        """
+        Get current stock price and basic info, served from the quote cache when fresh.
+
+        A fresh streamed quote is returned without any I/O; its price replaces
+        the last REST quote's, whose session fields are kept.
+
+        When Polygon cannot be reached the last known quote is returned with
+        stale=True, or demo data (source 'demo', also stale) if there is none
+        and demo_fallback is enabled.
+        """
+        live = self.get_live_quote(ticker)
+        if live is not None:
+            return live
+
+        data = await self.quote_cache.get_or_load(ticker, lambda: self._load_stock_price(ticker))
+        if data is not None:
+            return dict(data)
+
+        data = self.quote_cache.get_stale(ticker) or self._disk('get_quote', ticker)
+        if data is not None:
+            logger.warning(f"Serving stale quote for {ticker}")
+            FALLBACKS.labels('stale_quote').inc()
+            return {**data, 'stale': True, 'source': 'cache'}
+
+        if not self.demo_fallback:
+            return None
+        logger.warning(f"No market data for {ticker}, using demo data")
+        FALLBACKS.labels('demo').inc()
+        return self._get_demo_data(ticker)
+
+    def get_live_quote(self, ticker: str) -> Optional[Dict]:
+        """Fresh streamed quote in get_stock_price() shape, or None"""
+        if self.live_quotes is None:
+            return None
+        quote = self.live_quotes.get(ticker, max_age=self.live_max_age)
+        if quote is None:
+            return None
+        return quote.as_quote(self.quote_cache.get_stale(ticker), self.live_price_step)
+
+    async def get_snapshot(
+        self,
+        ticker: str,
+        min_dte: Optional[int] = None,
+        max_dte: Optional[int] = None
+    ) -> Optional[MarketSnapshot]:
+        """
+        Get an immutable market-data snapshot to share across a scan.
+
+        When a DTE window is given the options chain for that window is fetched
+        concurrently with the quote and attached to the snapshot.
+        """
+        chain_stale = False
+        if min_dte is None or max_dte is None:
+            data = await self.get_stock_price(ticker)
+            chain = None
+        else:
+            data, (chain, chain_stale) = await asyncio.gather(
+                self.get_stock_price(ticker),
+                self._load_options_chain(ticker, min_dte, max_dte)
+            )
+
+        if not data:
+            return None
+        snapshot = MarketSnapshot.from_quote(data, chain=chain)
+        if chain_stale and not snapshot.stale:
+            snapshot = replace(snapshot, stale=True)
+        return snapshot
+
+    async def get_options_chain(self, ticker: str, min_dte: int, max_dte: int) -> Optional["OptionChain"]:
+        """Get the options chain expiring within [min_dte, max_dte], or None if unavailable"""
+        chain, _ = await self._load_options_chain(ticker, min_dte, max_dte)
+        return chain
+
+    async def _load_options_chain(self, ticker: str, min_dte: int, max_dte: int) -> Tuple[Optional["OptionChain"], bool]:
+        """Fresh chain, else the last cached chain for the window; returns (chain, stale)"""
+        key = (ticker, min_dte, max_dte)
+        chain = await self.chain_cache.get_or_load(
+            key, lambda: self._load_chain(ticker, min_dte, max_dte)
+        )
+        if chain is not None:
+            return chain, False
+
+        chain = self.chain_cache.get_stale(key) or self._disk('get_chain', ticker, min_dte, max_dte)
+        if chain is not None:
+            logger.warning(f"Serving stale options chain for {ticker}")
+            FALLBACKS.labels('stale_chain').inc()
+        return chain, chain is not None
+
+    def _disk(self, method: str, *args, **kwargs):
+        """Call a disk cache method, treating any failure as a miss"""
+        if self.disk_cache is None:
+            return None
+        try:
+            return getattr(self.disk_cache, method)(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"Disk cache {method} failed: {e}")
+            return None
+
+    async def _load_stock_price(self, ticker: str) -> Optional[Dict]:
+        """Quote from the disk cache while it is fresh (always, offline), else from Polygon"""
+        data = self._disk('get_quote', ticker, max_age=None if self.offline else self.quote_cache.ttl)
+        if data is not None:
+            if self.offline:
+                data['source'] = 'replay'
+            return data
+        if self.offline:
+            return None
+
+        data = await self._fetch_stock_price(ticker)
+        if data is not None:
+            self._disk('put_quote', ticker, data)
+        return data
+
+    async def _load_chain(self, ticker: str, min_dte: int, max_dte: int) -> Optional["OptionChain"]:
+        """Chain from the disk cache while it is fresh (any recorded date, offline), else from Polygon"""
+        if self.offline:
+            return self._disk('get_chain', ticker, min_dte, max_dte)
+
+        chain = self._disk(
+            'get_chain', ticker, min_dte, max_dte,
+            as_of=datetime.now().date().isoformat(), max_age=self.chain_cache.ttl
+        )
+        if chain is not None:
+            return chain
+
+        chain = await self._fetch_options_chain(ticker, min_dte, max_dte)
+        if chain is not None:
+            self._disk('put_chain', ticker, min_dte, max_dte, chain)
+        return chain
+
+    async def _fetch_options_chain(self, ticker: str, min_dte: int, max_dte: int) -> Optional["OptionChain"]:
+        """Load the chain from the snapshot endpoint, falling back to contract reference data"""
+        today = datetime.now().date()
+        window = {
+            'expiration_date.gte': (today + timedelta(days=min_dte)).isoformat(),
+            'expiration_date.lte': (today + timedelta(days=max_dte)).isoformat(),
+        }
+
         try:
-            session = await self.get_session()
+            records = [
+                self._parse_snapshot_contract(result)
+                async for result in self._paginate(
+                    f"{self.base_url}/v3/snapshot/options/{ticker}",
+                    {**window, 'limit': CHAIN_PAGE_LIMIT},
+                    'options_snapshot'
+                )
+            ]
+
+            if not records:
+                # Plans without options snapshots still expose the contract list
+                records = [
+                    self._parse_reference_contract(result)
+                    async for result in self._paginate(
+                        f"{self.base_url}/v3/reference/options/contracts",
+                        {**window, 'underlying_ticker': ticker, 'limit': 1000},
+                        'options_contracts'
+                    )
+                ]
+
+            if not records:
+                logger.warning(f"No options chain available for {ticker}")
+                return None
+
+            from .chain import OptionChain
+            return OptionChain.from_records(ticker, records, as_of=today)
+
+        except Exception as e:
+            logger.error(f"Error fetching options chain for {ticker}: {e}")
+            return None
+
+    async def get_daily_bars(self, ticker: str, start: str, end: str) -> List[Dict]:
+        """Adjusted daily aggregates from start to end (ISO dates, inclusive), oldest first"""
+        if self.offline:
+            return []
+        url = f"{self.base_url}/v2/aggs/ticker/{ticker}/range/1/day/{start}/{end}"
+        try:
+            return [
+                {
+                    'date': datetime.fromtimestamp(bar['t'] / 1000, tz=timezone.utc).date().isoformat(),
+                    'open': bar['o'],
+                    'high': bar['h'],
+                    'low': bar['l'],
+                    'close': bar['c'],
+                    'volume': bar.get('v'),
+                }
+                async for bar in self._paginate(url, {'adjusted': 'true', 'sort': 'asc', 'limit': 50000}, 'daily_bars')
+            ]
+        except Exception as e:
+            logger.error(f"Error fetching daily bars for {ticker}: {e}")
+            return []
+
+    async def _paginate(self, url: str, params: Dict, endpoint: str = 'other'):
+        """Yield results across pages by following next_url"""
+        params = {**params, 'apiKey': self.api_key}
+
+        for _ in range(CHAIN_MAX_PAGES):
+            status, data = await self.transport.get_json(url, params, endpoint)
+            if status != 200:
+                logger.warning(f"Request to {url} failed with HTTP {status}")
+                return
 
+            for result in data.get('results') or []:
+                yield result
+
+            url = data.get('next_url')
+            if not url:
+                return
+            # next_url already carries the cursor and filters
+            params = {'apiKey': self.api_key}
+
+    @staticmethod
+    def _parse_snapshot_contract(result: Dict) -> Dict:
+        details = result.get('details', {})
+        quote = result.get('last_quote') or {}
+        return {
+            'symbol': details.get('ticker', ''),
+            'strike': details['strike_price'],
+            'expiry': details['expiration_date'],
+            'type': details['contract_type'],
+            'bid': quote.get('bid'),
+            'ask': quote.get('ask'),
+            'iv': result.get('implied_volatility'),
+            'open_interest': result.get('open_interest'),
+        }
+
+    @staticmethod
+    def _parse_reference_contract(result: Dict) -> Dict:
+        return {
+            'symbol': result.get('ticker', ''),
+            'strike': result['strike_price'],
+            'expiry': result['expiration_date'],
+            'type': result['contract_type'],
+        }
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss/eviction counters for the quote cache"""
+        return self.quote_cache.stats()
+
+    def transport_stats(self) -> Dict:
+        """Request, retry and rate-limiter counters for the HTTP transport"""
+        return self.transport.stats()
+
+    def disk_cache_stats(self) -> Optional[Dict]:
+        """Size and hit counters for the on-disk cache, if one is configured"""
+        return self._disk('stats')
+
+    async def _fetch_stock_price(self, ticker: str) -> Optional[Dict]:
+        """Fetch the previous-day aggregate from Polygon, or None on failure"""
+        try:
             # Try previous day aggregates first
             url = f"{self.base_url}/v2/aggs/ticker/{ticker}/prev"
             params = {'adjusted': 'true', 'apikey': self.api_key}
 
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-
-                    if data.get('status') == 'OK' and data.get('resultsCount', 0) > 0:
-                        result = data['results'][0]
-                        return {
-                            'ticker': ticker,
-                            'price': result['c'],  # closing price
-                            'high': result['h'],
-                            'low': result['l'],
-                            'open': result['o'],
-                            'volume': result['v'],
-                            'timestamp': datetime.now().isoformat()
-                        }
-
-                # Fallback to demo data if API fails
-                logger.warning(f"API request failed for {ticker}, using demo data")
-                return self._get_demo_data(ticker)
+            status, data = await self.transport.get_json(url, params, 'previous_close')
+            if status == 200 and data.get('status') == 'OK' and data.get('resultsCount', 0) > 0:
+                result = data['results'][0]
+                return {
+                    'ticker': ticker,
+                    'price': result['c'],  # closing price
+                    'high': result['h'],
+                    'low': result['l'],
+                    'open': result['o'],
+                    'volume': result['v'],
+                    'timestamp': datetime.now().isoformat(),
+                    'stale': False,
+                    'source': 'polygon'
+                }
+
+            logger.warning(f"API request failed for {ticker} with HTTP {status}")
+            return None
 
         except Exception as e:
             logger.error(f"Error fetching stock price for {ticker}: {e}")
-            return self._get_demo_data(ticker)
+            return None
 
     def _get_demo_data(self, ticker: str) -> Dict:
         """Generate demo data for testing"""
@@ -68,6 +363,10 @@ class PolygonClient:
         }
 
         base_price = demo_prices.get(ticker, 150.0)
+        # Demo prices are fixed, so the timestamp (and the snapshot version
+        # derived from it) only changes once a day; memoized responses and
+        # ETags then keep working while demo data is served
+        as_of = datetime.combine(datetime.now().date(), datetime.min.time())
 
         return {
             'ticker': ticker,
@@ -76,9 +375,11 @@ class PolygonClient:
             'low': base_price * 0.98,
             'open': base_price * 1.001,
             'volume': 1000000,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': as_of.isoformat(),
+            'stale': True,
+            'source': 'demo'
         }
 
     async def close(self):
-        if self.session:
-            await self.session.close()
+        await self.transport.close()
+        self._disk('close')
@@ -0,0 +1,104 @@
+"""
+Memoized API response bodies with ETag validators for conditional requests
+"""
+
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from .cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str
+    body: bytes
+    stored_at: float                # Epoch seconds
+
+
+def etag_for(key: Hashable) -> str:
+    """
+    Weak ETag derived from the cache key alone.
+
+    The key carries the data snapshot version and every request parameter,
+    so two instances serving the same snapshot agree on the validator even
+    though their bodies differ in the response timestamp.
+    """
+    return 'W/"' + hashlib.sha1(repr(key).encode()).hexdigest()[:32] + '"'
+
+
+def _opaque(etag: str) -> str:
+    """ETag without the weak prefix and quotes, as sent back by clients as an id"""
+    etag = etag.strip()
+    if etag.startswith('W/'):
+        etag = etag[2:]
+    return etag.strip('"')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Serialized response bodies keyed by request parameters and data version.
+
+    Identical concurrent requests share one computation through
+    TTLCache.get_or_load, and entries expire after ttl seconds or once
+    max_size newer responses have been stored. Entries can also be looked
+    up by their ETag, which exports use as a scan id.
+    """
+
+    def __init__(self, max_size: int = 2048, ttl: float = 60.0):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+        self._keys: Dict[str, Hashable] = {}
+        self.not_modified = 0
+
+    async def get_or_render(
+        self,
+        key: Hashable,
+        render: Callable[[], Awaitable[Optional[bytes]]]
+    ) -> Optional[CachedResponse]:
+        """Cached response for key, or render() and store it; None bodies are not cached"""
+        async def load() -> Optional[CachedResponse]:
+            body = await render()
+            if body is None:
+                return None
+            etag = etag_for(key)
+            self._remember(etag, key)
+            return CachedResponse(etag, body, time.time())
+
+        return await self._cache.get_or_load(key, load)
+
+    def _remember(self, etag: str, key: Hashable):
+        self._keys[_opaque(etag)] = key
+        if len(self._keys) > 2 * self._cache.max_size:
+            # Forget ids of entries that were evicted or expired
+            self._keys = {tag: k for tag, k in self._keys.items() if k in self._cache}
+
+    def get_by_etag(self, etag: str) -> Optional[CachedResponse]:
+        """The cached response with this ETag, with or without W/ and quotes, if still fresh"""
+        key = self._keys.get(_opaque(etag))
+        return None if key is None else self._cache.get(key)
+
+    def invalidate(self, key: Hashable):
+        self._cache.invalidate(key)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._cache.stats(), 'not_modified': self.not_modified}
@@ -0,0 +1,61 @@
+"""
+Immutable market-data snapshot shared by the request handler, engine and batch scans
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    ticker: str
+    price: float
+    high: Optional[float] = None
+    low: Optional[float] = None
+    open: Optional[float] = None
+    volume: Optional[float] = None
+    timestamp: str = ''
+    stale: bool = False             # Served from an expired cache entry or demo data
+    source: str = 'polygon'         # 'polygon', 'cache' or 'demo'
+    quote_version: str = ''         # Set by sources whose timestamp changes too often to key caches on
+    chain: Optional[Any] = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def from_quote(cls, data: Dict, chain: Optional[Any] = None) -> 'MarketSnapshot':
+        """Build a snapshot from a get_stock_price() quote dict and optional OptionChain"""
+        return cls(
+            ticker=data['ticker'],
+            price=data['price'],
+            high=data.get('high'),
+            low=data.get('low'),
+            open=data.get('open'),
+            volume=data.get('volume'),
+            timestamp=data.get('timestamp') or datetime.now().isoformat(),
+            stale=data.get('stale', False),
+            source=data.get('source', 'polygon'),
+            quote_version=data.get('version', ''),
+            chain=chain
+        )
+
+    @property
+    def version(self) -> str:
+        """Identifies the data this snapshot was built from"""
+        quote = self.quote_version or self.timestamp
+        if self.chain is not None:
+            return f"{self.ticker}@{quote}/chain@{self.chain.fetched_at}"
+        return f"{self.ticker}@{quote}"
+
+    def as_quote(self) -> Dict:
+        """Quote dict in the shape returned by get_stock_price()"""
+        return {
+            'ticker': self.ticker,
+            'price': self.price,
+            'high': self.high,
+            'low': self.low,
+            'open': self.open,
+            'volume': self.volume,
+            'timestamp': self.timestamp,
+            'stale': self.stale,
+            'source': self.source,
+        }
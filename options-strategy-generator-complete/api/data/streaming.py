@@ -0,0 +1,422 @@
+"""
+Streaming stock quotes from Polygon's WebSocket feed into an in-memory
+last-value store, with throttled triggers on large price moves
+"""
+
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from monitoring import REGISTRY
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = logging.getLogger(__name__)
+
+STREAM_EVENTS = REGISTRY.counter(
+    'quote_stream_events_total', 'WebSocket feed events received, by event type', ('event',)
+)
+STREAM_RECONNECTS = REGISTRY.counter(
+    'quote_stream_reconnects_total', 'WebSocket feed connections lost and retried'
+)
+RERANKS = REGISTRY.counter(
+    'quote_move_reranks_total', 'Re-ranks triggered by price moves, by outcome', ('result',)
+)
+
+# Real-time and 15-minute delayed stock clusters
+STREAM_URL = "wss://socket.polygon.io/stocks"
+DELAYED_STREAM_URL = "wss://delayed.polygon.io/stocks"
+
+# A live quote older than this is ignored and the REST quote is used instead
+LIVE_QUOTE_MAX_AGE = 15.0
+# Width of the log-price buckets that version live quotes; matches
+# MoveTrigger's default threshold, so a scan is reused until a re-rank is due
+LIVE_PRICE_STEP = 0.005
+
+# Feed channels subscribed per ticker: trades, NBBO quotes and per-second bars
+CHANNELS = ('T', 'Q', 'A')
+
+
+@dataclass(frozen=True)
+class LiveQuote:
+    ticker: str
+    price: float                    # Last trade, else the latest bar close or NBBO midpoint
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+    last_trade: Optional[float] = None
+    timestamp: float = 0.0          # Exchange time, epoch seconds
+    received_at: float = field(default_factory=time.monotonic)
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Seconds since the quote arrived"""
+        return (time.monotonic() if now is None else now) - self.received_at
+
+    def price_bucket(self, step: float = LIVE_PRICE_STEP) -> int:
+        """Index of the log-price bucket of width `step` (a fraction) holding the price"""
+        return math.floor(math.log(self.price) / math.log1p(step))
+
+    def as_quote(self, base: Optional[Dict] = None, price_step: float = LIVE_PRICE_STEP) -> Dict:
+        """
+        Quote dict in the shape returned by PolygonClient.get_stock_price().
+
+        The feed carries no session range, so high/low/open/volume come from
+        `base`, the last REST quote for the ticker, when one is given.
+
+        Every tick has a new exchange time, so the quote is versioned by day
+        and `price_step` price bucket instead. Snapshots built from ticks in
+        the same bucket share cached surfaces, scans and responses.
+        """
+        base = base or {}
+        timestamp = datetime.fromtimestamp(self.timestamp, tz=timezone.utc) if self.timestamp else datetime.now()
+        return {
+            'ticker': self.ticker,
+            'price': self.price,
+            'high': base.get('high'),
+            'low': base.get('low'),
+            'open': base.get('open'),
+            'volume': base.get('volume'),
+            'bid': self.bid,
+            'ask': self.ask,
+            'timestamp': timestamp.isoformat(),
+            'version': f"live:{timestamp.date().isoformat()}:{self.price_bucket(price_step)}",
+            'stale': False,
+            'source': 'live'
+        }
+
+
+class LastValueStore:
+    """
+    Latest LiveQuote per ticker.
+
+    The feed task is the only writer and replaces each entry with a new
+    immutable LiveQuote, while readers do a single dict lookup. A dict
+    assignment is atomic under the GIL, so readers on the event loop or in
+    the engine's worker threads never take a lock and never see a partly
+    updated quote.
+    """
+
+    def __init__(self):
+        self._quotes: Dict[str, LiveQuote] = {}
+        self.updates = 0
+
+    def get(self, ticker: str, max_age: Optional[float] = None) -> Optional[LiveQuote]:
+        """Latest quote for a ticker, or None if there is none or it is older than max_age"""
+        quote = self._quotes.get(ticker)
+        if quote is None or (max_age is not None and quote.age() > max_age):
+            return None
+        return quote
+
+    def put(self, quote: LiveQuote):
+        self._quotes[quote.ticker] = quote
+        self.updates += 1
+
+    def discard(self, ticker: str):
+        self._quotes.pop(ticker, None)
+
+    def snapshot(self) -> Dict[str, LiveQuote]:
+        return dict(self._quotes)
+
+    def __len__(self) -> int:
+        return len(self._quotes)
+
+
+class _AiohttpConnection:
+    """WebSocket connection owning its aiohttp session"""
+
+    def __init__(self, session: "aiohttp.ClientSession", ws: "aiohttp.ClientWebSocketResponse"):
+        self._session = session
+        self._ws = ws
+
+    async def send_json(self, data: Dict):
+        await self._ws.send_json(data)
+
+    async def receive(self) -> Optional[str]:
+        import aiohttp
+
+        msg = await self._ws.receive()
+        if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+            return msg.data if isinstance(msg.data, str) else msg.data.decode()
+        if msg.type == aiohttp.WSMsgType.ERROR:
+            raise ConnectionError(f"WebSocket error: {self._ws.exception()}")
+        return None
+
+    async def close(self):
+        await self._ws.close()
+        await self._session.close()
+
+
+async def aiohttp_connect(url: str) -> _AiohttpConnection:
+    import aiohttp
+
+    session = aiohttp.ClientSession()
+    try:
+        ws = await session.ws_connect(url, heartbeat=30.0, autoping=True)
+    except BaseException:
+        await session.close()
+        raise
+    return _AiohttpConnection(session, ws)
+
+
+# connect(url) returns a connection with async send_json(dict),
+# receive() -> Optional[str] (None once closed) and close()
+Connect = Callable[[str], Awaitable[Any]]
+QuoteListener = Callable[[Optional[LiveQuote], LiveQuote], None]
+
+
+class QuoteStream:
+    """
+    Keeps a LastValueStore current from Polygon's stock WebSocket feed.
+
+    The connection is held by one background task that authenticates,
+    subscribes to every ticker in `tickers`, and reconnects with jittered
+    exponential backoff when the feed drops. `connect` can be swapped for a
+    local fake in tests and benchmarks.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        store: Optional[LastValueStore] = None,
+        url: str = STREAM_URL,
+        connect: Optional[Connect] = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0
+    ):
+        self.api_key = api_key
+        self.store = store if store is not None else LastValueStore()
+        self.url = url
+        self.connect = connect or aiohttp_connect
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.tickers: Set[str] = set()
+        self.connected = False
+        self.error: Optional[str] = None
+        self.reconnects = 0
+        self._listeners: List[QuoteListener] = []
+        self._conn = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: QuoteListener):
+        """Call listener(previous, quote) on the event loop after every store update"""
+        self._listeners.append(listener)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name='quote-stream')
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self._close_connection()
+
+    async def subscribe(self, tickers: Iterable[str]):
+        added = {t.upper() for t in tickers} - self.tickers
+        self.tickers |= added
+        if added and self.connected:
+            await self._send_channels('subscribe', added)
+
+    async def unsubscribe(self, tickers: Iterable[str]):
+        removed = {t.upper() for t in tickers} & self.tickers
+        self.tickers -= removed
+        for ticker in removed:
+            self.store.discard(ticker)
+        if removed and self.connected:
+            await self._send_channels('unsubscribe', removed)
+
+    async def _send_channels(self, action: str, tickers: Iterable[str]):
+        params = ','.join(f'{channel}.{ticker}' for ticker in sorted(tickers) for channel in CHANNELS)
+        await self._conn.send_json({'action': action, 'params': params})
+
+    async def _close_connection(self):
+        conn, self._conn = self._conn, None
+        self.connected = False
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception:
+                pass
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                self._conn = await self.connect(self.url)
+                await self._conn.send_json({'action': 'auth', 'params': self.api_key})
+                while True:
+                    message = await self._conn.receive()
+                    if message is None:
+                        raise ConnectionError("Feed closed the connection")
+                    if self.handle(message):
+                        delay = self.reconnect_delay
+                        if self.tickers:
+                            await self._send_channels('subscribe', self.tickers)
+            except asyncio.CancelledError:
+                raise
+            except PermissionError as e:
+                # Retrying with the same key cannot succeed
+                self.error = str(e)
+                logger.error(f"Quote stream stopped: {e}")
+                await self._close_connection()
+                return
+            except Exception as e:
+                self.error = str(e)
+                logger.warning(f"Quote stream disconnected: {e}; reconnecting in {delay:.1f}s")
+            await self._close_connection()
+            self.reconnects += 1
+            STREAM_RECONNECTS.inc()
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def handle(self, message: str) -> bool:
+        """Apply one feed message; returns True when it completes authentication"""
+        events = json.loads(message)
+        if isinstance(events, dict):
+            events = [events]
+
+        authenticated = False
+        for event in events:
+            kind = event.get('ev')
+            STREAM_EVENTS.labels(kind or 'unknown').inc()
+            if kind == 'status':
+                status = event.get('status')
+                if status == 'auth_success':
+                    self.connected = True
+                    self.error = None
+                    authenticated = True
+                elif status == 'auth_failed':
+                    raise PermissionError(event.get('message') or "Authentication failed")
+                continue
+            self._apply(kind, event)
+        return authenticated
+
+    def _apply(self, kind: Optional[str], event: Dict):
+        ticker = event.get('sym')
+        if ticker not in self.tickers:
+            return
+        previous = self.store.get(ticker)
+
+        bid = previous.bid if previous else None
+        ask = previous.ask if previous else None
+        last_trade = previous.last_trade if previous else None
+        if kind == 'T':
+            price = last_trade = event.get('p')
+            timestamp = event.get('t')
+        elif kind in ('A', 'AM'):
+            price = last_trade = event.get('c')
+            timestamp = event.get('e')
+        elif kind == 'Q':
+            bid, ask, timestamp = event.get('bp'), event.get('ap'), event.get('t')
+            # The NBBO midpoint stands in until the first trade is seen
+            price = last_trade or ((bid + ask) / 2 if bid and ask else None)
+        else:
+            return
+
+        if not price or price <= 0:
+            return
+        quote = LiveQuote(
+            ticker=ticker,
+            price=float(price),
+            bid=bid,
+            ask=ask,
+            last_trade=last_trade,
+            timestamp=timestamp / 1000.0 if timestamp else time.time()
+        )
+        self.store.put(quote)
+        for listener in self._listeners:
+            try:
+                listener(previous, quote)
+            except Exception as e:
+                logger.error(f"Quote listener failed for {ticker}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'connected': self.connected,
+            'tickers': sorted(self.tickers),
+            'quotes': len(self.store),
+            'updates': self.store.updates,
+            'reconnects': self.reconnects,
+            'error': self.error,
+        }
+
+
+class MoveTrigger:
+    """
+    Runs `callback(ticker)` when a ticker has moved at least `threshold`
+    (a fraction) from the price at its last run, at most once per
+    `min_interval` seconds per ticker.
+
+    A move inside the quiet period schedules a single trailing run at the
+    end of it, so a burst of ticks costs one re-rank and the last move of a
+    burst is never dropped. Each run re-reads the store, so it always sees
+    the newest price rather than the tick that triggered it.
+    """
+
+    def __init__(
+        self,
+        store: LastValueStore,
+        callback: Callable[[str], Awaitable[Any]],
+        threshold: float = 0.005,
+        min_interval: float = 5.0
+    ):
+        self.store = store
+        self.callback = callback
+        self.threshold = threshold
+        self.min_interval = min_interval
+        self._reference: Dict[str, float] = {}
+        self._last_run: Dict[str, float] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    def __call__(self, previous: Optional[LiveQuote], quote: LiveQuote):
+        reference = self._reference.get(quote.ticker)
+        if reference is None:
+            self._reference[quote.ticker] = quote.price
+            return
+        if abs(quote.price / reference - 1.0) < self.threshold or quote.ticker in self._pending:
+            return
+        self._pending[quote.ticker] = asyncio.get_running_loop().create_task(self._run(quote.ticker))
+
+    def reset(self, ticker: str, price: Optional[float] = None):
+        """Set the reference price, e.g. after a ticker is scanned by other means"""
+        if price is None:
+            self._reference.pop(ticker, None)
+        else:
+            self._reference[ticker] = price
+
+    async def _run(self, ticker: str):
+        try:
+            wait = self._last_run.get(ticker, float('-inf')) + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            quote = self.store.get(ticker)
+            if quote is None:
+                return
+            self._reference[ticker] = quote.price
+            self._last_run[ticker] = time.monotonic()
+            await self.callback(ticker)
+            RERANKS.labels('ok').inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            RERANKS.labels('error').inc()
+            logger.error(f"Re-rank for {ticker} failed: {e}")
+        finally:
+            self._pending.pop(ticker, None)
+
+    async def close(self):
+        tasks = list(self._pending.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,282 @@
+"""
+Managed HTTP transport for Polygon: pooled keep-alive session, client-side
+rate limiting, jittered retries and an outage cooldown
+"""
+
+import asyncio
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Tuple
+
+from monitoring import REGISTRY
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    'polygon_request_seconds', 'Polygon request latency per attempt, by endpoint', ('endpoint',)
+)
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    'polygon_requests_total', 'Polygon request attempts by endpoint and outcome', ('endpoint', 'status')
+)
+
+# Polygon asks paid plans to stay under ~100 requests/second; the free tier
+# allows 5 requests/minute (rate=5/60, burst=5)
+DEFAULT_RATE_LIMIT = 100.0
+DEFAULT_BURST = 100
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class RequestTally:
+    """Polygon requests sent inside a count_requests() block, retries included"""
+
+    def __init__(self):
+        self.requests = 0
+
+
+# Tally of the count_requests() block the current task runs in; tasks it
+# starts inherit the context, so their requests are counted too
+_tally: ContextVar[Optional[RequestTally]] = ContextVar('polygon_request_tally', default=None)
+
+
+@contextmanager
+def count_requests() -> Iterator[RequestTally]:
+    """Count the Polygon requests made by this task, and the tasks it starts, within the block"""
+    tally = RequestTally()
+    token = _tally.set(tally)
+    try:
+        yield tally
+    finally:
+        _tally.reset(token)
+
+
+class TransportError(Exception):
+    """A request that failed for good, after any retries, or was not sent during an outage"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter: `rate` requests per second with bursts up to
+    `capacity`.
+
+    Tokens may go negative; each caller reserves its slot synchronously and
+    then sleeps until the slot comes up, so waiters are served in arrival
+    order without a lock.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    async def acquire(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            delay = -self._tokens / self.rate
+            self.waits += 1
+            self.waited_seconds += delay
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class TransportConfig:
+    rate_limit: float = DEFAULT_RATE_LIMIT  # Requests per second
+    burst: int = DEFAULT_BURST
+    max_connections: int = 100
+    max_connections_per_host: int = 50
+    keepalive_timeout: float = 30.0
+    dns_cache_ttl: int = 300
+    connect_timeout: float = 5.0
+    total_timeout: float = 15.0
+    max_retries: int = 3
+    # DNS and connection failures mean the host is unreachable, which
+    # backoff rarely fixes; they get at most this many retries
+    max_connect_retries: int = 1
+    backoff_base: float = 0.25          # Seconds; doubles every attempt
+    backoff_max: float = 8.0
+    # After a request fails for good, requests fail at once for this long
+    # (seconds) instead of each waiting out its own retries; 0 disables
+    outage_cooldown: float = 5.0
+
+
+class PolygonTransport:
+    """
+    Owns the aiohttp session used for every Polygon request.
+
+    Call start() and close() from the application lifespan so connections
+    and TLS sessions are reused across requests. Without a lifespan the
+    session is created on first use, and recreated if the event loop it was
+    bound to has gone away (serverless invocations, test clients).
+    """
+
+    def __init__(self, base_url: str, config: Optional[TransportConfig] = None):
+        self.base_url = base_url
+        self.config = config or TransportConfig()
+        self.limiter = TokenBucket(self.config.rate_limit, self.config.burst)
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self._down_until = 0.0
+        self._last_failure: Optional[TransportError] = None
+
+    async def start(self, prewarm: bool = False):
+        """Open the pooled session, optionally completing a TLS handshake up front"""
+        import aiohttp
+
+        session = await self.session()
+        if prewarm:
+            try:
+                async with session.head(self.base_url, timeout=aiohttp.ClientTimeout(total=3)):
+                    pass
+            except Exception as e:
+                logger.info(f"Polygon connection prewarm failed: {e}")
+
+    async def session(self) -> "aiohttp.ClientSession":
+        # Imported on first use: aiohttp is one of the largest imports on the cold-start path
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        if self._session is not None and (self._session.closed or self._loop is not loop):
+            # A session cannot outlive the loop it was created on
+            if self._loop is not None and not self._loop.is_closed():
+                await self._session.close()
+            else:
+                self._session.detach()
+            self._session = None
+
+        if self._session is None:
+            config = self.config
+            connector = aiohttp.TCPConnector(
+                limit=config.max_connections,
+                limit_per_host=config.max_connections_per_host,
+                keepalive_timeout=config.keepalive_timeout,
+                ttl_dns_cache=config.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(
+                    total=config.total_timeout, sock_connect=config.connect_timeout
+                ),
+            )
+            self._loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After"""
+        cap = min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+        delay = random.uniform(0, cap)
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.config.backoff_max))
+            except ValueError:
+                pass
+        return delay
+
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        endpoint: str = 'other'
+    ) -> Tuple[int, Any]:
+        """
+        GET a JSON document, retrying 429/5xx responses and connection errors.
+
+        Returns (status, body) for any response that is not retried. Raises
+        TransportError once retries are exhausted, and for the next
+        `outage_cooldown` seconds raises it at once without sending anything,
+        so callers fall back to cached or demo data without waiting.
+        ``endpoint`` labels the request in the latency metrics.
+        """
+        import aiohttp
+
+        if time.monotonic() < self._down_until:
+            self.short_circuited += 1
+            UPSTREAM_REQUESTS.labels(endpoint, 'short_circuit').inc()
+            raise TransportError(f"Polygon unavailable, not requesting {url}: {self._last_failure}")
+
+        latency = UPSTREAM_SECONDS.labels(endpoint)
+        last_error = None
+        retries = self.config.max_retries
+        for attempt in range(self.config.max_retries + 1):
+            if attempt > retries:
+                break
+            if attempt:
+                self.retries += 1
+
+            await self.limiter.acquire()
+            self.requests += 1
+            tally = _tally.get()
+            if tally is not None:
+                tally.requests += 1
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                session = await self.session()
+                async with session.get(url, params=params) as response:
+                    if response.status not in RETRY_STATUSES:
+                        body = await response.json(content_type=None)
+                        latency.observe(time.perf_counter() - started)
+                        UPSTREAM_REQUESTS.labels(endpoint, str(response.status)).inc()
+                        return response.status, body
+                    retry_after = response.headers.get('Retry-After')
+                    last_error = TransportError(f"HTTP {response.status} from {url}", response.status)
+                    UPSTREAM_REQUESTS.labels(endpoint, str(response.status)).inc()
+            except aiohttp.ClientConnectorError as e:
+                # Includes DNS failures (ClientConnectorDNSError)
+                last_error = TransportError(f"{type(e).__name__} requesting {url}: {e}")
+                UPSTREAM_REQUESTS.labels(endpoint, 'connect_error').inc()
+                retries = min(retries, self.config.max_connect_retries)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = TransportError(f"{type(e).__name__} requesting {url}: {e}")
+                UPSTREAM_REQUESTS.labels(endpoint, 'error').inc()
+            latency.observe(time.perf_counter() - started)
+
+            if attempt < retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.warning(f"{last_error}; retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        self.failures += 1
+        self._last_failure = last_error
+        self._down_until = time.monotonic() + self.config.outage_cooldown
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'failures': self.failures,
+            'short_circuited': self.short_circuited,
+            'outage': time.monotonic() < self._down_until,
+            'rate_limit': self.limiter.rate,
+            'burst': self.limiter.capacity,
+            'throttled': self.limiter.waits,
+            'throttled_seconds': round(self.limiter.waited_seconds, 3),
+            'session_open': self._session is not None and not self._session.closed,
+        }
@@ -0,0 +1,225 @@
+"""
+Streaming CSV, NDJSON and Parquet encoders for bulk strategy exports
+"""
+
+import asyncio
+import csv
+import importlib.util
+import io
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from monitoring import REGISTRY
+from responses import StrategyResult, dumps
+
+EXPORT_ROWS = REGISTRY.counter('export_rows_total', 'Strategy rows written by /api/export', ('format',))
+EXPORT_BYTES = REGISTRY.counter('export_bytes_total', 'Bytes streamed by /api/export, after compression', ('format',))
+
+# Every StrategyResult field, plus the row's rank within its scan, whether the
+# data was stale, and why a ticker has no strategies (set only on that ticker's row)
+COLUMNS = (*StrategyResult.__annotations__, 'rank', 'stale', 'error')
+
+# format -> (media type, file extension)
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+# Parquet needs the optional pyarrow; find_spec checks without importing it
+if importlib.util.find_spec('pyarrow') is not None:
+    FORMATS['parquet'] = ('application/vnd.apache.parquet', 'parquet')
+
+# Nested columns, written as JSON text in CSV and Parquet
+NESTED = ('legs',)
+
+# Parquet column types; the rest are strings
+_ARROW_TYPES = {
+    'confidence': 'float64',
+    'maxProfit': 'float64',
+    'maxLoss': 'float64',
+    'unlimitedProfit': 'bool',
+    'unlimitedLoss': 'bool',
+    'capitalRequired': 'float64',
+    'probabilityOfProfit': 'float64',
+    'netPremium': 'float64',
+    'expirationDays': 'float64',
+    'currentPrice': 'float64',
+    'rank': 'int32',
+    'stale': 'bool',
+}
+
+Row = Dict[str, Any]
+
+
+def select_columns(columns: Optional[Sequence[str]]) -> List[str]:
+    """Validated export columns in the requested order; all columns if none are given"""
+    if not columns:
+        return list(COLUMNS)
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}; available: {', '.join(COLUMNS)}")
+    return list(dict.fromkeys(columns))
+
+
+def _json(value: Any) -> Optional[str]:
+    return None if value is None else dumps(value).decode()
+
+
+class CSVEncoder:
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self._nested = [i for i, c in enumerate(columns) if c in NESTED]
+
+    def _write(self, rows: List[List[Any]]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+    def header(self) -> bytes:
+        return self._write([self.columns])
+
+    def encode(self, rows: List[Row]) -> bytes:
+        # csv writes None as an empty field
+        lines = []
+        for row in rows:
+            values = [row.get(column) for column in self.columns]
+            for i in self._nested:
+                values[i] = _json(values[i])
+            lines.append(values)
+        return self._write(lines)
+
+    def close(self) -> bytes:
+        return b''
+
+
+class NDJSONEncoder:
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+
+    def header(self) -> bytes:
+        return b''
+
+    def encode(self, rows: List[Row]) -> bytes:
+        return b''.join(dumps({c: row.get(c) for c in self.columns}) + b'\n' for row in rows)
+
+    def close(self) -> bytes:
+        return b''
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b''.join(self._chunks), []
+        return data
+
+
+class ParquetEncoder:
+    """
+    One Parquet row group per encoded chunk. The footer is written by
+    close(), so only the finished stream is a readable file.
+    """
+
+    def __init__(self, columns: List[str], compression: Optional[str] = None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet export needs pyarrow: pip install pyarrow")
+        self._pa = pa
+        self.columns = columns
+        self.schema = pa.schema([(c, _ARROW_TYPES.get(c, 'string')) for c in columns])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression=compression or 'snappy')
+
+    def header(self) -> bytes:
+        return self._sink.drain()
+
+    def encode(self, rows: List[Row]) -> bytes:
+        arrays = []
+        for column in self.columns:
+            values = [row.get(column) for row in rows]
+            if column in NESTED:
+                values = [_json(v) for v in values]
+            arrays.append(self._pa.array(values, type=self.schema.field(column).type))
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self.schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def encoder_for(export_format: str, columns: List[str], compression: Optional[str] = None):
+    if export_format == 'csv':
+        return CSVEncoder(columns)
+    if export_format == 'ndjson':
+        return NDJSONEncoder(columns)
+    if export_format == 'parquet':
+        return ParquetEncoder(columns, compression)
+    raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+
+
+async def encode_stream(
+    batches: AsyncIterator[List[Row]],
+    export_format: str,
+    columns: List[str],
+    compression: Optional[str] = None,
+    chunk_rows: int = 2000
+) -> AsyncIterator[bytes]:
+    """
+    Encode row batches into file chunks of about `chunk_rows` rows each.
+
+    Only the pending chunk is held in memory, so memory use does not grow
+    with the export size. Chunks are encoded on a worker thread, which keeps
+    the event loop free for other requests during a large export. CSV and
+    NDJSON are gzipped as a stream when `compression` is 'gzip'; Parquet
+    compresses its column chunks instead.
+    """
+    encoder = encoder_for(export_format, columns, compression)
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compression == 'gzip' and export_format != 'parquet' else None
+    rows_written = EXPORT_ROWS.labels(export_format)
+    bytes_written = EXPORT_BYTES.labels(export_format)
+
+    def emit(data: bytes) -> bytes:
+        if gzip is not None:
+            data = gzip.compress(data)
+        bytes_written.inc(len(data))
+        return data
+
+    pending: List[Row] = []
+    # Always yielded, even if empty, so setup errors surface before any rows are scanned
+    yield emit(encoder.header())
+    async for batch in batches:
+        pending.extend(batch)
+        if len(pending) >= chunk_rows:
+            rows_written.inc(len(pending))
+            data = emit(await asyncio.to_thread(encoder.encode, pending))
+            pending = []
+            if data:
+                yield data
+
+    tail = await asyncio.to_thread(encoder.encode, pending) if pending else b''
+    rows_written.inc(len(pending))
+    tail += encoder.close()
+    if gzip is not None:
+        tail = gzip.compress(tail) + gzip.flush()
+    bytes_written.inc(len(tail))
+    if tail:
+        yield tail
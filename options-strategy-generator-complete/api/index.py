@@ -4,25 +4,37 @@ Vercel-compatible entry point for Options Strategy Generator API
 This file serves as the main handler for all API routes in Vercel's serverless environment
 """
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import Annotated, AsyncIterator, Awaitable, Hashable, List, Optional, Dict, Any
 import os
 import asyncio
 import logging
 from datetime import datetime, timedelta
 import json
 import sys
+import tempfile
+from contextlib import asynccontextmanager
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(__file__))
 
-# Import our existing strategy modules
+# Import our existing strategy modules. Only modules that are cheap to import
+# load here; the NumPy-backed engines are imported by init_engine() and
+# aiohttp on the first upstream request, so routes that need neither (health,
+# strategy catalog, metrics) never pay for them on a cold start.
 try:
-    from strategies.options_engine import OptionsStrategyEngine
+    from strategies.catalog import find_strategy, strategy_catalog
     from data.polygon_client import PolygonClient
+    from data.transport import TransportConfig, count_requests
+    from data.response_cache import ResponseCache, etag_for, etag_matches
+    from data.streaming import STREAM_URL, LastValueStore, MoveTrigger, QuoteStream
+    from strategies.screener import ScreenerIndex, WatchlistScheduler
+    from export import FORMATS, encode_stream, select_columns
+    from responses import FastJSONResponse, PayoffResponse, ScanResponse, ScreenerResponse, dumps, strategy_result
+    from monitoring import REGISTRY, MetricsMiddleware, SamplingProfiler, stage
 except ImportError as e:
     logging.error(f"Import error: {e}")
     # Fallback imports or error handling
@@ -31,13 +43,277 @@ except ImportError as e:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Initialize services
+POLYGON_API_KEY = os.getenv("POLYGON_API_KEY", "75rlu6cWGNnIqqR_x8M384YUjBgGk6kT")
+BATCH_SCAN_CONCURRENCY = int(os.getenv("BATCH_SCAN_CONCURRENCY", "20"))
+QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "900"))
+QUOTE_CACHE_SIZE = int(os.getenv("QUOTE_CACHE_SIZE", "1024"))
+# Client-side limit matching the Polygon plan (free tier: 0.083 req/s, burst 5)
+POLYGON_RATE_LIMIT = float(os.getenv("POLYGON_RATE_LIMIT", "100"))
+POLYGON_RATE_BURST = int(os.getenv("POLYGON_RATE_BURST", "100"))
+POLYGON_MAX_RETRIES = int(os.getenv("POLYGON_MAX_RETRIES", "3"))
+# After Polygon fails for good, skip it for this many seconds and serve fallbacks
+POLYGON_OUTAGE_COOLDOWN = float(os.getenv("POLYGON_OUTAGE_COOLDOWN", "5"))
+POLYGON_PREWARM = os.getenv("POLYGON_PREWARM", "1") == "1"
+DEMO_DATA_FALLBACK = os.getenv("DEMO_DATA_FALLBACK", "1") == "1"
+# Persistent cache shared by warm processes and new workers; empty disables it
+MARKET_DATA_CACHE_DIR = os.getenv(
+    "MARKET_DATA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "options-market-data")
+)
+MARKET_DATA_CACHE_MAX_MB = float(os.getenv("MARKET_DATA_CACHE_MAX_MB", "512"))
+MARKET_DATA_OFFLINE = os.getenv("MARKET_DATA_OFFLINE", "0") == "1"
+# Memoized scan and quote responses; RESPONSE_MAX_AGE is the browser/CDN freshness window
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_MAX_AGE = int(os.getenv("RESPONSE_MAX_AGE", "15"))
+# Per-stage durations in a Server-Timing header; the on-demand profiler is off in production
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") == "1"
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+# Live quotes from Polygon's WebSocket feed; subscribed tickers are re-ranked on large moves
+POLYGON_STREAM_ENABLED = os.getenv("POLYGON_STREAM_ENABLED", "0") == "1"
+POLYGON_STREAM_URL = os.getenv("POLYGON_STREAM_URL", STREAM_URL)
+POLYGON_STREAM_TICKERS = [t for t in os.getenv("POLYGON_STREAM_TICKERS", "").upper().split(",") if t]
+LIVE_QUOTE_MAX_AGE = float(os.getenv("LIVE_QUOTE_MAX_AGE", "15"))
+# Streamed quotes within one RERANK_MOVE_THRESHOLD price bucket share cached scans
+RERANK_MOVE_THRESHOLD = float(os.getenv("RERANK_MOVE_THRESHOLD", "0.005"))
+RERANK_MIN_INTERVAL = float(os.getenv("RERANK_MIN_INTERVAL", "5"))
+# Serverless cold starts build services on the first route that needs them
+# instead of in the lifespan; on by default when running on Vercel
+LAZY_STARTUP = os.getenv("LAZY_STARTUP", "1" if os.getenv("VERCEL") else "0") == "1"
+POLYGON_BASE_URL = os.getenv("POLYGON_BASE_URL", "https://api.polygon.io")
+# Where CPU-bound strategy evaluation runs: 'thread', 'process' or 'inline' (on the
+# event loop); SCAN_WORKERS=0 sizes the pool from the CPU count
+SCAN_EXECUTOR = os.getenv("SCAN_EXECUTOR", "thread")
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "0"))
+# How often a running scan checks whether its client is still connected
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.1"))
+# Watchlist re-scanned in the background for /api/screener; empty disables it.
+# Background scans may use SCREENER_RATE_SHARE of POLYGON_RATE_LIMIT, charged
+# by the requests each scan actually sends
+SCREENER_TICKERS = [t for t in os.getenv("SCREENER_TICKERS", "").upper().replace(" ", "").split(",") if t]
+SCREENER_INTERVAL = float(os.getenv("SCREENER_INTERVAL", "300"))
+SCREENER_CONCURRENCY = int(os.getenv("SCREENER_CONCURRENCY", "2"))
+SCREENER_RATE_SHARE = float(os.getenv("SCREENER_RATE_SHARE", "0.5"))
+SCREENER_RISK_PROFILE = os.getenv("SCREENER_RISK_PROFILE", "moderate_aggressive")
+SCREENER_MAX_STRATEGIES = int(os.getenv("SCREENER_MAX_STRATEGIES", "20"))
+# Rows per encoded /api/export chunk, and per Parquet row group
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "2000"))
+
+# Global variables for services (initialized on startup or first request)
+polygon_client = None
+strategy_engine = None
+risk_engine = None
+response_cache = None
+active_profiler = None
+quote_stream = None
+move_trigger = None
+live_rankings: Dict[str, Dict[str, Any]] = {}
+screener_index = None
+watchlist_scheduler = None
+
+def init_disk_cache() -> Optional["DiskCache"]:
+    """Open the on-disk market data cache, or run without one if it is disabled or unwritable"""
+    if not MARKET_DATA_CACHE_DIR:
+        return None
+    from data.disk_cache import DiskCache
+    try:
+        return DiskCache(MARKET_DATA_CACHE_DIR, max_bytes=int(MARKET_DATA_CACHE_MAX_MB * 1024 * 1024))
+    except Exception as e:
+        logger.warning(f"Disk cache unavailable at {MARKET_DATA_CACHE_DIR}: {e}")
+        return None
+
+def init_services():
+    """Initialize market data and response caching on first request"""
+    global polygon_client, response_cache, quote_stream, move_trigger, screener_index, watchlist_scheduler
+    if polygon_client is None:
+        live_quotes = LastValueStore() if POLYGON_STREAM_ENABLED and not MARKET_DATA_OFFLINE else None
+        polygon_client = PolygonClient(
+            api_key=POLYGON_API_KEY,
+            cache_ttl=QUOTE_CACHE_TTL,
+            cache_size=QUOTE_CACHE_SIZE,
+            transport_config=TransportConfig(
+                rate_limit=POLYGON_RATE_LIMIT,
+                burst=POLYGON_RATE_BURST,
+                max_retries=POLYGON_MAX_RETRIES,
+                outage_cooldown=POLYGON_OUTAGE_COOLDOWN
+            ),
+            demo_fallback=DEMO_DATA_FALLBACK,
+            disk_cache=init_disk_cache(),
+            offline=MARKET_DATA_OFFLINE,
+            live_quotes=live_quotes,
+            live_max_age=LIVE_QUOTE_MAX_AGE,
+            live_price_step=RERANK_MOVE_THRESHOLD,
+            base_url=POLYGON_BASE_URL
+        )
+        response_cache = ResponseCache(max_size=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+        if live_quotes is not None:
+            quote_stream = QuoteStream(POLYGON_API_KEY, live_quotes, url=POLYGON_STREAM_URL)
+            move_trigger = MoveTrigger(
+                live_quotes, rerank_ticker, threshold=RERANK_MOVE_THRESHOLD, min_interval=RERANK_MIN_INTERVAL
+            )
+            quote_stream.add_listener(move_trigger)
+        if SCREENER_TICKERS:
+            watchlist_scheduler = WatchlistScheduler(
+                screen_ticker,
+                SCREENER_TICKERS,
+                interval=SCREENER_INTERVAL,
+                concurrency=SCREENER_CONCURRENCY,
+                rate_limit=POLYGON_RATE_LIMIT,
+                rate_share=SCREENER_RATE_SHARE,
+                count_requests=count_requests
+            )
+            # Rows that missed three passes in a row are no longer served
+            screener_index = ScreenerIndex(max_age=3 * watchlist_scheduler.interval)
+        register_collectors()
+
+def init_engine():
+    """Initialize services plus the strategy and risk engines, which import NumPy"""
+    global strategy_engine, risk_engine
+    init_services()
+    if strategy_engine is None:
+        from strategies.executor import ScanExecutor
+        from strategies.options_engine import OptionsStrategyEngine
+        from strategies.portfolio import PortfolioRiskEngine
+        strategy_engine = OptionsStrategyEngine(
+            polygon_client, executor=ScanExecutor(SCAN_EXECUTOR, SCAN_WORKERS or None)
+        )
+        risk_engine = PortfolioRiskEngine()
+
+async def rerank_ticker(ticker: str):
+    """Re-scan a streamed ticker with the default scan parameters and keep the ranking"""
+    init_engine()
+    request = ScanRequest(ticker=ticker)
+    snapshot = await polygon_client.get_snapshot(ticker, request.min_dte, request.max_dte)
+    if not snapshot:
+        return
+    strategies = await strategy_engine.scan_strategies(
+        ticker=ticker,
+        risk_profile=request.risk_profile,
+        min_dte=request.min_dte,
+        max_dte=request.max_dte,
+        max_strategies=request.max_strategies,
+        snapshot=snapshot
+    )
+    if ticker not in quote_stream.tickers:
+        return
+    live_rankings[ticker] = {
+        "ticker": ticker,
+        "currentPrice": snapshot.price,
+        "stale": snapshot.stale,
+        "dataSource": snapshot.source,
+        "strategies": [strategy_result(strategy, snapshot.price, ticker) for strategy in strategies],
+        "rankedAt": datetime.now().isoformat()
+    }
+
+async def screen_ticker(ticker: str) -> bool:
+    """Background scan of one watchlist ticker into the screener index"""
+    init_engine()
+    request = ScanRequest(
+        ticker=ticker, risk_profile=SCREENER_RISK_PROFILE, max_strategies=SCREENER_MAX_STRATEGIES
+    )
+    snapshot = await polygon_client.get_snapshot(ticker, request.min_dte, request.max_dte)
+    if not snapshot:
+        # Keep the last results; they drop out of queries once they are too old
+        raise LookupError(f"Stock data not found for {ticker}")
+    strategies = await strategy_engine.scan_strategies(
+        ticker=ticker,
+        risk_profile=request.risk_profile,
+        min_dte=request.min_dte,
+        max_dte=request.max_dte,
+        max_strategies=request.max_strategies,
+        snapshot=snapshot
+    )
+    screener_index.update(ticker, [
+        {**strategy_result(strategy, snapshot.price, ticker), "stale": snapshot.stale}
+        for strategy in strategies
+    ])
+    return bool(strategies)
+
+def cache_samples():
+    """(labels, stats) for every cache that keeps its own hit/miss counters"""
+    yield {"cache": "quote"}, polygon_client.cache_stats()
+    yield {"cache": "chain"}, polygon_client.chain_cache.stats()
+    yield {"cache": "response"}, response_cache.stats()
+    disk = polygon_client.disk_cache_stats()
+    if disk:
+        yield {"cache": "disk"}, disk
+
+def register_collectors():
+    """Export cache and transport counters, read from the components at scrape time"""
+    def field(name):
+        return lambda: ((labels, stats.get(name)) for labels, stats in cache_samples())
+
+    def hit_ratio():
+        for labels, stats in cache_samples():
+            lookups = stats["hits"] + stats["misses"]
+            yield labels, stats["hits"] / lookups if lookups else 0.0
+
+    REGISTRY.collector("cache_hits_total", "counter", "Cache lookups served from the cache", field("hits"))
+    REGISTRY.collector("cache_misses_total", "counter", "Cache lookups that had to load", field("misses"))
+    REGISTRY.collector("cache_evictions_total", "counter", "Entries evicted to stay within size", field("evictions"))
+    REGISTRY.collector("cache_hit_ratio", "gauge", "Hits over lookups since startup", hit_ratio)
+    REGISTRY.collector("cache_entries", "gauge", "Entries currently held in memory", field("size"))
+    REGISTRY.collector(
+        "polygon_retries_total", "counter", "Upstream requests retried after a failure",
+        lambda: [({}, polygon_client.transport_stats()["retries"])]
+    )
+    REGISTRY.collector(
+        "polygon_throttled_seconds_total", "counter", "Time spent waiting on the client-side rate limiter",
+        lambda: [({}, polygon_client.transport_stats()["throttled_seconds"])]
+    )
+    REGISTRY.collector(
+        "strategy_scan_cache_entries", "gauge", "Scan results held by the engine",
+        lambda: [({}, len(strategy_engine._scan_cache) if strategy_engine else 0)]
+    )
+    REGISTRY.collector(
+        "screener_index_rows", "gauge", "Strategies held in the screener index",
+        lambda: [({}, len(screener_index) if screener_index is not None else 0)]
+    )
+    REGISTRY.collector(
+        "scan_executor_inflight", "gauge", "Strategy evaluations submitted to the executor and not yet finished",
+        lambda: [({}, strategy_engine.executor.inflight if strategy_engine else 0)]
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Build services and open the pooled Polygon session on startup, unless
+    LAZY_STARTUP defers them to the first request; close them on shutdown
+    """
+    if not LAZY_STARTUP:
+        init_engine()
+        strategy_engine.executor.start()
+        await polygon_client.start(prewarm=POLYGON_PREWARM and not MARKET_DATA_OFFLINE)
+        if quote_stream is not None:
+            await quote_stream.subscribe(POLYGON_STREAM_TICKERS)
+            await quote_stream.start()
+    if SCREENER_TICKERS:
+        # A configured watchlist starts scanning even with LAZY_STARTUP
+        init_services()
+        await watchlist_scheduler.start()
+    try:
+        yield
+    finally:
+        if watchlist_scheduler is not None:
+            await watchlist_scheduler.stop()
+        if quote_stream is not None:
+            await quote_stream.stop()
+            await move_trigger.close()
+        if polygon_client is not None:
+            await polygon_client.close()
+        if strategy_engine is not None:
+            strategy_engine.executor.shutdown()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Options Strategy Generator API",
     description="Professional options strategy analysis and recommendation system",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware for frontend integration
@@ -49,19 +325,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-POLYGON_API_KEY = os.getenv("POLYGON_API_KEY", "75rlu6cWGNnIqqR_x8M384YUjBgGk6kT")
-
-# Global variables for services (initialized on first request)
-polygon_client = None
-strategy_engine = None
-
-def init_services():
-    """Initialize services on first request"""
-    global polygon_client, strategy_engine
-    if polygon_client is None:
-        polygon_client = PolygonClient(api_key=POLYGON_API_KEY)
-        strategy_engine = OptionsStrategyEngine(polygon_client)
+# Request metrics; added last so it is outermost and times the whole stack
+app.add_middleware(MetricsMiddleware, server_timing=SERVER_TIMING)
 
 # Pydantic models for request/response
 class ScanRequest(BaseModel):
@@ -72,13 +337,80 @@ class ScanRequest(BaseModel):
     max_strategies: int = Field(default=10, ge=1, le=20, description="Maximum number of strategies to return")
     max_capital: Optional[int] = Field(default=None, description="Maximum capital per trade")
 
-class ScanResponse(BaseModel):
-    success: bool
-    strategies: List[Dict[str, Any]]
-    current_price: Optional[float] = Field(default=None, alias="currentPrice")
-    ticker: str
-    error: Optional[str] = None
-    timestamp: str
+class BatchScanRequest(BaseModel):
+    tickers: List[str] = Field(..., min_length=1, max_length=500, description="Stock ticker symbols")
+    risk_profile: str = Field(default="moderate_aggressive", description="Risk tolerance level")
+    min_dte: int = Field(default=30, ge=1, le=365, description="Minimum days to expiration")
+    max_dte: int = Field(default=45, ge=1, le=365, description="Maximum days to expiration")
+    max_strategies: int = Field(default=10, ge=1, le=20, description="Maximum number of strategies per ticker")
+    max_results: int = Field(default=100, ge=1, le=10000, description="Maximum number of strategies in the merged result")
+    max_capital: Optional[int] = Field(default=None, description="Maximum capital per trade")
+    concurrency: Optional[int] = Field(default=None, ge=1, le=100, description="Maximum concurrent ticker scans")
+
+class StreamScanRequest(BaseModel):
+    ticker: Optional[str] = Field(default=None, min_length=1, max_length=10, description="Single ticker; streams one event per ranked strategy")
+    tickers: Optional[List[str]] = Field(default=None, min_length=1, max_length=500, description="Watchlist; streams one event per ticker as it completes")
+    risk_profile: str = Field(default="moderate_aggressive", description="Risk tolerance level")
+    min_dte: int = Field(default=30, ge=1, le=365, description="Minimum days to expiration")
+    max_dte: int = Field(default=45, ge=1, le=365, description="Maximum days to expiration")
+    max_strategies: int = Field(default=10, ge=1, le=20, description="Maximum number of strategies per ticker")
+    max_capital: Optional[int] = Field(default=None, description="Maximum capital per trade")
+    concurrency: Optional[int] = Field(default=None, ge=1, le=100, description="Maximum concurrent ticker scans")
+    format: Optional[str] = Field(default=None, description="'ndjson' or 'sse'; defaults from the Accept header")
+
+class StreamSubscribeRequest(BaseModel):
+    tickers: List[str] = Field(..., min_length=1, max_length=500, description="Stock ticker symbols")
+
+class ScreenerQuery(BaseModel):
+    type: Optional[str] = Field(default=None, description="Strategy types, comma-separated: bullish, bearish, neutral, volatility")
+    tickers: Optional[str] = Field(default=None, description="Restrict to these watchlist tickers, comma-separated")
+    complexity: Optional[str] = Field(default=None, description="Complexity levels, comma-separated")
+    max_capital: Optional[float] = Field(default=None, ge=0, description="Maximum capital per trade")
+    min_confidence: Optional[float] = Field(default=None, description="Minimum confidence score")
+    min_probability: Optional[float] = Field(default=None, ge=0, le=1, description="Minimum probability of profit")
+    limit: int = Field(default=50, ge=1, le=1000, description="Maximum number of strategies to return")
+
+class PayoffGrid(BaseModel):
+    price_range: float = Field(default=0.25, gt=0, le=0.9, description="Price grid spans spot -/+ this fraction")
+    points: int = Field(default=200, ge=2, le=5000, description="Evenly spaced prices in the grid; strikes and spot are added")
+    dates: Optional[int] = Field(default=None, ge=1, le=366, description="T+n curves; defaults to one per day until expiration")
+    width: Optional[int] = Field(default=None, ge=2, le=10000, description="Thin the returned prices to about this many, e.g. the chart's pixel width")
+
+class PayoffRequest(PayoffGrid):
+    strategy: Dict[str, Any] = Field(..., description="Strategy as returned by a scan, including legs")
+    quantity: float = Field(default=1.0, description="Units of the strategy held; negative for short")
+    spot: Optional[float] = Field(default=None, gt=0, description="Underlying price; defaults to the latest quote")
+
+class StrategyPayoffQuery(PayoffGrid):
+    risk_profile: str = Field(default="moderate_aggressive", description="Risk profile of the scan the id came from")
+    min_dte: int = Field(default=30, ge=1, le=365, description="Minimum days to expiration of the scan")
+    max_dte: int = Field(default=45, ge=1, le=365, description="Maximum days to expiration of the scan")
+    max_strategies: int = Field(default=10, ge=1, le=20, description="Strategies returned by the scan")
+    max_capital: Optional[int] = Field(default=None, description="Maximum capital per trade of the scan")
+    quantity: float = Field(default=1.0, description="Units of the strategy held; negative for short")
+
+class ExportRequest(BaseModel):
+    format: str = Field(default="csv", description="'csv', 'ndjson', or 'parquet' when pyarrow is installed")
+    columns: Optional[List[str]] = Field(default=None, description="Columns to export, in order; defaults to all")
+    compression: Optional[str] = Field(default=None, description="'gzip'; Parquet compresses its column chunks instead")
+    scan_id: Optional[str] = Field(default=None, description="ETag of a cached /api/scan response to export")
+    tickers: Optional[List[str]] = Field(default=None, min_length=1, max_length=20000, description="Tickers to scan and export")
+    risk_profile: str = Field(default="moderate_aggressive", description="Risk tolerance level")
+    min_dte: int = Field(default=30, ge=1, le=365, description="Minimum days to expiration")
+    max_dte: int = Field(default=45, ge=1, le=365, description="Maximum days to expiration")
+    max_strategies: int = Field(default=20, ge=1, le=20, description="Maximum number of strategies per ticker")
+    max_capital: Optional[int] = Field(default=None, description="Maximum capital per trade")
+    concurrency: Optional[int] = Field(default=None, ge=1, le=100, description="Maximum concurrent ticker scans")
+
+class PortfolioPosition(BaseModel):
+    strategy: Dict[str, Any] = Field(..., description="Strategy as returned by a scan, including legs")
+    quantity: float = Field(default=1.0, description="Units of the strategy held; negative for short")
+
+class PortfolioRiskRequest(BaseModel):
+    positions: List[PortfolioPosition] = Field(..., min_length=1, max_length=5000)
+    spots: Optional[Dict[str, float]] = Field(default=None, description="Underlying prices; missing tickers use the latest quote")
+    spot_shocks: Optional[List[float]] = Field(default=None, max_length=41, description="Relative spot moves, e.g. -0.1 for -10%")
+    vol_shocks: Optional[List[float]] = Field(default=None, max_length=21, description="Absolute IV changes, e.g. 0.05 for +5 vol points")
 
 # Health check endpoint
 @app.get("/")
@@ -93,14 +425,91 @@ async def health_check():
         "version": "1.0.0"
     }
 
+def cache_headers(etag: str, stale: bool) -> Dict[str, str]:
+    """ETag and Cache-Control for a memoized response"""
+    # Stale or demo data is always revalidated so clients switch to live data as soon as it returns
+    if stale or RESPONSE_MAX_AGE <= 0:
+        cache_control = "no-cache"
+    else:
+        cache_control = f"public, max-age={RESPONSE_MAX_AGE}"
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+async def memoized_response(
+    http_request: Request,
+    key: Hashable,
+    render,
+    stale: bool = False
+) -> Response:
+    """
+    Serve a rendered JSON body from the response cache.
+
+    ETags derive from the key, so a GET whose If-None-Match already names
+    the current snapshot gets a 304 without rendering anything.
+    """
+    etag = etag_for(key)
+    headers = cache_headers(etag, stale)
+    if http_request.method in ("GET", "HEAD") and etag_matches(http_request.headers.get("if-none-match"), etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    cached = await response_cache.get_or_render(key, render)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+async def cancel_on_disconnect(http_request: Request, work: Awaitable[Any]) -> Any:
+    """
+    Await work, cancelling it if the client disconnects first.
+
+    Cancellation reaches the scan executor, which drops queued evaluations
+    and stops running ones, so abandoned requests stop using CPU. The work
+    runs in the request's own task and a watcher task polls the connection,
+    so requests are scheduled exactly as if the work were awaited directly.
+    """
+    request_task = asyncio.current_task()
+    disconnected = False
+
+    async def watch():
+        nonlocal disconnected
+        while True:
+            await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+            if await http_request.is_disconnected():
+                disconnected = True
+                request_task.cancel()
+                return
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        return await work
+    except asyncio.CancelledError:
+        if not disconnected:
+            raise
+        if hasattr(request_task, "uncancel"):
+            request_task.uncancel()
+        logger.info(f"Client disconnected, cancelling {http_request.url.path}")
+        # Nobody reads this; 499 is the de facto "client closed request" status
+        return Response(status_code=499)
+    finally:
+        watcher.cancel()
+
 # Main strategy scanning endpoint
-@app.post("/api/scan")
-async def scan_strategies(request: ScanRequest):
+@app.post("/api/scan", response_model=ScanResponse)
+async def scan_strategies(request: ScanRequest, http_request: Request):
     """
     Scan and rank options strategies for a given ticker
     """
+    return await scan_response(request, http_request)
+
+# Cacheable scan: same fields as query parameters, honours If-None-Match
+@app.get("/api/scan", response_model=ScanResponse)
+async def scan_strategies_get(request: Annotated[ScanRequest, Query()], http_request: Request):
+    """
+    Scan and rank options strategies for a given ticker, cacheable by browsers and CDNs
+    """
+    return await scan_response(request, http_request)
+
+async def scan_response(request: ScanRequest, http_request: Request) -> Response:
+    """Scan response memoized per request parameters and data snapshot"""
     try:
-        init_services()
+        init_engine()
         logger.info(f"Scanning strategies for {request.ticker}")
 
         # Validate ticker
@@ -108,67 +517,365 @@ async def scan_strategies(request: ScanRequest):
         if not ticker:
             raise HTTPException(status_code=400, detail="Ticker is required")
 
-        # Get current stock price
-        stock_data = await polygon_client.get_stock_price(ticker)
-        if not stock_data:
+        # Fetch market data once and share the snapshot with the engine
+        with stage("fetch"):
+            snapshot = await polygon_client.get_snapshot(ticker, request.min_dte, request.max_dte)
+        if not snapshot:
             raise HTTPException(status_code=404, detail=f"Stock data not found for {ticker}")
 
-        current_price = stock_data.get('price', 0)
+        current_price = snapshot.price
 
-        # Generate strategies
-        strategies = await strategy_engine.scan_strategies(
-            ticker=ticker,
-            risk_profile=request.risk_profile,
-            min_dte=request.min_dte,
-            max_dte=request.max_dte,
-            max_strategies=request.max_strategies
+        async def render() -> bytes:
+            # Generate strategies
+            strategies = await strategy_engine.scan_strategies(
+                ticker=ticker,
+                risk_profile=request.risk_profile,
+                min_dte=request.min_dte,
+                max_dte=request.max_dte,
+                max_strategies=request.max_strategies,
+                snapshot=snapshot,
+                max_capital=request.max_capital
+            )
+
+            with stage("serialize"):
+                if not strategies:
+                    return dumps({
+                        "success": False,
+                        "strategies": [],
+                        "currentPrice": current_price,
+                        "ticker": ticker,
+                        "stale": snapshot.stale,
+                        "dataSource": snapshot.source,
+                        "error": "No viable strategies found",
+                        "timestamp": datetime.now().isoformat()
+                    })
+
+                return dumps({
+                    "success": True,
+                    "strategies": [strategy_result(strategy, current_price, ticker) for strategy in strategies],
+                    "currentPrice": current_price,
+                    "ticker": ticker,
+                    "stale": snapshot.stale,
+                    "dataSource": snapshot.source,
+                    "timestamp": datetime.now().isoformat()
+                })
+
+        from strategies.registry import registry_version
+        key = (
+            "scan", ticker, request.risk_profile, request.min_dte, request.max_dte,
+            request.max_strategies, request.max_capital, snapshot.version, registry_version()
         )
+        return await cancel_on_disconnect(
+            http_request, memoized_response(http_request, key, render, stale=snapshot.stale)
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error scanning strategies: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+async def scan_ticker(request: BatchScanRequest, ticker: str, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    """Fetch a quote and scan strategies for one ticker of a batch"""
+    async with semaphore:
+        try:
+            with stage("fetch"):
+                snapshot = await polygon_client.get_snapshot(ticker, request.min_dte, request.max_dte)
+            if not snapshot:
+                return {"ticker": ticker, "strategies": [], "error": "Stock data not found"}
+
+            current_price = snapshot.price
+            strategies = await strategy_engine.scan_strategies(
+                ticker=ticker,
+                risk_profile=request.risk_profile,
+                min_dte=request.min_dte,
+                max_dte=request.max_dte,
+                max_strategies=request.max_strategies,
+                snapshot=snapshot,
+                max_capital=request.max_capital
+            )
 
-        if not strategies:
             return {
-                "success": False,
-                "strategies": [],
-                "currentPrice": current_price,
                 "ticker": ticker,
-                "error": "No viable strategies found",
-                "timestamp": datetime.now().isoformat()
+                "currentPrice": current_price,
+                "stale": snapshot.stale,
+                "dataSource": snapshot.source,
+                "strategies": [strategy_result(s, current_price, ticker) for s in strategies],
+                "error": None if strategies else "No viable strategies found"
             }
 
-        # Format strategies for response
-        formatted_strategies = []
-        for strategy in strategies:
-            formatted_strategies.append({
-                "id": strategy.get("id", ""),
-                "name": strategy.get("name", ""),
-                "type": strategy.get("type", ""),
-                "complexity": strategy.get("complexity", ""),
-                "confidence": strategy.get("confidence_score", 0),
-                "maxProfit": strategy.get("max_profit", 0),
-                "maxLoss": strategy.get("max_loss", 0),
-                "capitalRequired": strategy.get("capital_required", 0),
-                "probabilityOfProfit": strategy.get("probability_of_profit"),
-                "description": strategy.get("description", ""),
+        except Exception as e:
+            logger.error(f"Error scanning {ticker} in batch: {str(e)}")
+            return {"ticker": ticker, "strategies": [], "error": str(e)}
+
+# Batch strategy scanning endpoint
+@app.post("/api/scan/batch")
+async def scan_strategies_batch(request: BatchScanRequest, http_request: Request):
+    """
+    Scan a watchlist of tickers concurrently and return one merged, ranked result set
+    """
+    try:
+        init_engine()
+
+        # Normalize and de-duplicate tickers, preserving order
+        tickers = list(dict.fromkeys(t.upper().strip() for t in request.tickers if t.strip()))
+        if not tickers:
+            raise HTTPException(status_code=400, detail="At least one ticker is required")
+
+        logger.info(f"Batch scanning strategies for {len(tickers)} tickers")
+
+        semaphore = asyncio.Semaphore(request.concurrency or BATCH_SCAN_CONCURRENCY)
+        results = await cancel_on_disconnect(
+            http_request, asyncio.gather(*(scan_ticker(request, t, semaphore) for t in tickers))
+        )
+        if isinstance(results, Response):
+            return results
+
+        merged = [strategy for result in results for strategy in result["strategies"]]
+        merged.sort(key=lambda x: x["confidence"], reverse=True)
+
+        # Returned as a response so the merged rows skip jsonable_encoder
+        return FastJSONResponse({
+            "success": bool(merged),
+            "strategies": merged[:request.max_results],
+            "tickers": {
+                result["ticker"]: {
+                    "currentPrice": result.get("currentPrice"),
+                    "stale": result.get("stale"),
+                    "count": len(result["strategies"]),
+                    "error": result["error"]
+                }
+                for result in results
+            },
+            "totalCount": len(merged),
+            "timestamp": datetime.now().isoformat()
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error batch scanning strategies: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+def encode_event(event: str, data: Dict[str, Any], stream_format: str) -> str:
+    """Serialize one stream event as an SSE frame or an NDJSON line"""
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+    return dumps({"event": event, "data": data}).decode() + "\n"
+
+async def stream_single_scan(request: StreamScanRequest, ticker: str, stream_format: str) -> AsyncIterator[str]:
+    """Quote, then each ranked strategy, then a summary for one ticker"""
+    started = datetime.now()
+    count = 0
+    error = None
+    try:
+        snapshot = await polygon_client.get_snapshot(ticker, request.min_dte, request.max_dte)
+        if not snapshot:
+            error = "Stock data not found"
+        else:
+            current_price = snapshot.price
+            yield encode_event("quote", {
+                "ticker": ticker,
                 "currentPrice": current_price,
-                "ticker": ticker
-            })
+                "stale": snapshot.stale,
+                "dataSource": snapshot.source
+            }, stream_format)
 
-        return {
+            strategies = await strategy_engine.scan_strategies(
+                ticker=ticker,
+                risk_profile=request.risk_profile,
+                min_dte=request.min_dte,
+                max_dte=request.max_dte,
+                max_strategies=request.max_strategies,
+                snapshot=snapshot,
+                max_capital=request.max_capital
+            )
+            for rank, strategy in enumerate(strategies, 1):
+                data = strategy_result(strategy, current_price, ticker)
+                data["rank"] = rank
+                count += 1
+                yield encode_event("strategy", data, stream_format)
+
+            if not strategies:
+                error = "No viable strategies found"
+
+    except Exception as e:
+        logger.error(f"Error streaming scan for {ticker}: {str(e)}")
+        error = str(e)
+
+    if error:
+        yield encode_event("error", {"ticker": ticker, "error": error}, stream_format)
+    yield encode_event("summary", {
+        "success": count > 0,
+        "ticker": ticker,
+        "totalCount": count,
+        "elapsedMs": round((datetime.now() - started).total_seconds() * 1000, 1),
+        "timestamp": datetime.now().isoformat()
+    }, stream_format)
+
+async def stream_batch_scan(request: StreamScanRequest, tickers: List[str], stream_format: str) -> AsyncIterator[str]:
+    """One event per ticker in completion order, then a summary; results are not retained"""
+    started = datetime.now()
+    semaphore = asyncio.Semaphore(request.concurrency or BATCH_SCAN_CONCURRENCY)
+    tasks = [asyncio.ensure_future(scan_ticker(request, t, semaphore)) for t in tickers]
+    summary = {}
+    total = 0
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+            summary[result["ticker"]] = {
+                "currentPrice": result.get("currentPrice"),
+                "stale": result.get("stale"),
+                "count": len(result["strategies"]),
+                "error": result["error"]
+            }
+            total += len(result["strategies"])
+            yield encode_event("ticker", result, stream_format)
+    finally:
+        # Client went away (or the generator was closed): stop outstanding scans
+        for task in tasks:
+            task.cancel()
+
+    yield encode_event("summary", {
+        "success": total > 0,
+        "tickers": summary,
+        "totalCount": total,
+        "elapsedMs": round((datetime.now() - started).total_seconds() * 1000, 1),
+        "timestamp": datetime.now().isoformat()
+    }, stream_format)
+
+# Streaming strategy scanning endpoint
+@app.post("/api/scan/stream")
+async def scan_strategies_stream(request: StreamScanRequest, http_request: Request):
+    """
+    Stream scan results as Server-Sent Events or NDJSON while they are produced
+    """
+    init_engine()
+
+    stream_format = (request.format or "").lower()
+    if not stream_format:
+        accept = http_request.headers.get("accept", "")
+        stream_format = "sse" if "text/event-stream" in accept else "ndjson"
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    if request.tickers:
+        tickers = list(dict.fromkeys(t.upper().strip() for t in request.tickers if t.strip()))
+        if not tickers:
+            raise HTTPException(status_code=400, detail="At least one ticker is required")
+        logger.info(f"Streaming batch scan for {len(tickers)} tickers")
+        events = stream_batch_scan(request, tickers, stream_format)
+    else:
+        ticker = (request.ticker or "").upper().strip()
+        if not ticker:
+            raise HTTPException(status_code=400, detail="Ticker is required")
+        logger.info(f"Streaming scan for {ticker}")
+        events = stream_single_scan(request, ticker, stream_format)
+
+    return StreamingResponse(
+        events,
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def format_greeks(greeks: Dict[str, float]) -> Dict[str, float]:
+    return {
+        "delta": greeks["delta"],
+        "gamma": greeks["gamma"],
+        "theta": greeks["theta"],
+        "vega": greeks["vega"],
+        "rho": greeks["rho"],
+        **({"dollarDelta": greeks["dollar_delta"]} if "dollar_delta" in greeks else {})
+    }
+
+# Portfolio risk endpoint
+@app.post("/api/portfolio/risk")
+async def portfolio_risk(request: PortfolioRiskRequest):
+    """
+    Net Greeks, spot x vol scenario P&L and margin across a set of positions
+    """
+    try:
+        init_engine()
+        from strategies.portfolio import Position
+
+        try:
+            positions = [Position.from_strategy(p.strategy, p.quantity) for p in request.positions]
+        except (KeyError, TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid position: {e}")
+
+        spots = {ticker.upper(): price for ticker, price in (request.spots or {}).items()}
+        missing = sorted({p.ticker for p in positions} - set(spots))
+        quotes = await asyncio.gather(*(polygon_client.get_stock_price(t) for t in missing))
+        stale = {}
+        for ticker, quote in zip(missing, quotes):
+            if not quote:
+                raise HTTPException(status_code=404, detail=f"Stock data not found for {ticker}")
+            spots[ticker] = quote["price"]
+            stale[ticker] = quote.get("stale", False)
+
+        risk = risk_engine.evaluate(
+            positions, spots, spot_shocks=request.spot_shocks, vol_shocks=request.vol_shocks
+        )
+
+        return FastJSONResponse({
             "success": True,
-            "strategies": formatted_strategies,
-            "currentPrice": current_price,
-            "ticker": ticker,
+            "greeks": format_greeks(risk["greeks"]),
+            "value": risk["value"],
+            "pnl": risk["pnl"],
+            "scenarios": {
+                "spotShocks": risk["scenarios"]["spot_shocks"],
+                "volShocks": risk["scenarios"]["vol_shocks"],
+                "pnl": risk["scenarios"]["pnl"]
+            },
+            "margin": {
+                "strategy": risk["margin"]["strategy"],
+                "scenario": risk["margin"]["scenario"],
+                "scenarioByUnderlying": risk["margin"]["scenario_by_underlying"]
+            },
+            "underlyings": {
+                ticker: {
+                    "spot": group["spot"],
+                    "stale": stale.get(ticker, False),
+                    "positions": group["positions"],
+                    "greeks": format_greeks(group["greeks"]),
+                    "value": group["value"],
+                    "pnl": group["pnl"],
+                    "scenarioPnl": group["scenarios"],
+                    "strategyMargin": group["strategy_margin"],
+                    "scenarioMargin": group["scenario_margin"]
+                }
+                for ticker, group in risk["by_underlying"].items()
+            },
+            "positions": [
+                {
+                    "id": p["id"],
+                    "ticker": p["ticker"],
+                    "greeks": format_greeks(p["greeks"]),
+                    "value": p["value"],
+                    "pnl": p["pnl"],
+                    "margin": p["margin"]
+                }
+                for p in risk["positions"]
+            ],
+            "recomputed": risk["recomputed"],
+            "reused": risk["reused"],
             "timestamp": datetime.now().isoformat()
-        }
+        })
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error scanning strategies: {str(e)}")
+        logger.error(f"Error computing portfolio risk: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 # Get stock quote endpoint
 @app.get("/api/quote/{ticker}")
-async def get_stock_quote(ticker: str):
+async def get_stock_quote(ticker: str, http_request: Request):
     """Get current stock quote"""
     try:
         init_services()
@@ -178,11 +885,15 @@ async def get_stock_quote(ticker: str):
         if not stock_data:
             raise HTTPException(status_code=404, detail=f"Stock data not found for {ticker}")
 
-        return {
-            "success": True,
-            "data": stock_data,
-            "timestamp": datetime.now().isoformat()
-        }
+        async def render() -> bytes:
+            return dumps({
+                "success": True,
+                "data": stock_data,
+                "timestamp": datetime.now().isoformat()
+            })
+
+        key = ("quote", ticker, stock_data.get("timestamp"), stock_data.get("price"), stock_data.get("source"))
+        return await memoized_response(http_request, key, render, stale=bool(stock_data.get("stale")))
 
     except HTTPException:
         raise
@@ -190,50 +901,435 @@ async def get_stock_quote(ticker: str):
         logger.error(f"Error getting quote: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Strategy details endpoint
+# Quote cache statistics endpoint
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Quote cache and HTTP transport counters"""
+    init_services()
+    return {
+        "success": True,
+        "quoteCache": polygon_client.cache_stats(),
+        "transport": polygon_client.transport_stats(),
+        "diskCache": polygon_client.disk_cache_stats(),
+        "offline": polygon_client.offline,
+        "responseCache": response_cache.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Screener over the background-scanned watchlist
+def split_param(value: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated query parameter as a list, or None if empty"""
+    items = [item.strip() for item in (value or "").split(",") if item.strip()]
+    return items or None
+
+@app.get("/api/screener", response_model=ScreenerResponse)
+async def screen_strategies(query: Annotated[ScreenerQuery, Query()]):
+    """
+    Top strategies across the watchlist, answered from the pre-computed index
+    """
+    init_services()
+    if screener_index is None:
+        raise HTTPException(status_code=404, detail="The screener is disabled; set SCREENER_TICKERS")
+
+    tickers = split_param(query.tickers)
+    strategies = screener_index.query(
+        types=split_param((query.type or "").lower()),
+        tickers=[t.upper() for t in tickers] if tickers else None,
+        complexity=split_param((query.complexity or "").lower()),
+        max_capital=query.max_capital,
+        min_confidence=query.min_confidence,
+        min_probability=query.min_probability,
+        limit=query.limit
+    )
+    oldest = screener_index.oldest_scan()
+    return FastJSONResponse({
+        "success": bool(strategies),
+        "strategies": strategies,
+        "count": len(strategies),
+        "indexedTickers": len(screener_index.tickers),
+        "watchlistSize": len(watchlist_scheduler.tickers),
+        "oldestScan": datetime.fromtimestamp(oldest).isoformat() if oldest else None,
+        "scanParams": {
+            "riskProfile": SCREENER_RISK_PROFILE,
+            "maxStrategies": SCREENER_MAX_STRATEGIES,
+            "interval": watchlist_scheduler.interval
+        },
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.get("/api/screener/status")
+async def get_screener_status():
+    """Scheduler and index counters"""
+    init_services()
+    if screener_index is None:
+        raise HTTPException(status_code=404, detail="The screener is disabled; set SCREENER_TICKERS")
+    return {
+        "success": True,
+        "scheduler": watchlist_scheduler.stats(),
+        "index": screener_index.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Live quote stream endpoints
+def require_stream():
+    init_services()
+    if quote_stream is None:
+        raise HTTPException(status_code=404, detail="Quote streaming is disabled; set POLYGON_STREAM_ENABLED=1")
+
+@app.post("/api/stream/subscribe")
+async def subscribe_quotes(request: StreamSubscribeRequest):
+    """
+    Stream live quotes for tickers and keep a ranking for each that is
+    re-computed when the price moves past RERANK_MOVE_THRESHOLD
+    """
+    require_stream()
+    init_engine()
+    await quote_stream.start()
+    tickers = [t for t in dict.fromkeys(t.upper().strip() for t in request.tickers) if t]
+    added = [t for t in tickers if t not in quote_stream.tickers]
+    await quote_stream.subscribe(added)
+
+    # Initial rankings; this also caches the REST quote that live quotes are merged into
+    results = await asyncio.gather(*(rerank_ticker(t) for t in added), return_exceptions=True)
+    for ticker, result in zip(added, results):
+        if isinstance(result, Exception):
+            logger.error(f"Initial ranking for {ticker} failed: {result}")
+        elif ticker in live_rankings:
+            move_trigger.reset(ticker, live_rankings[ticker]["currentPrice"])
+
+    return {
+        "success": True,
+        "subscribed": sorted(quote_stream.tickers),
+        "added": added,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/api/stream/unsubscribe")
+async def unsubscribe_quotes(request: StreamSubscribeRequest):
+    """Stop streaming tickers and drop their rankings"""
+    require_stream()
+    tickers = [t.upper().strip() for t in request.tickers]
+    await quote_stream.unsubscribe(tickers)
+    for ticker in tickers:
+        live_rankings.pop(ticker, None)
+        move_trigger.reset(ticker)
+    return {"success": True, "subscribed": sorted(quote_stream.tickers), "timestamp": datetime.now().isoformat()}
+
+@app.get("/api/stream")
+async def get_stream_status():
+    """Feed connection state and the latest streamed quote per ticker"""
+    require_stream()
+    quotes = quote_stream.store.snapshot()
+    return {
+        "success": True,
+        **quote_stream.stats(),
+        "quotes": {
+            ticker: {
+                "price": quote.price,
+                "bid": quote.bid,
+                "ask": quote.ask,
+                "ageSeconds": round(quote.age(), 3)
+            }
+            for ticker, quote in sorted(quotes.items())
+        },
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/stream/rankings/{ticker}")
+async def get_live_ranking(ticker: str):
+    """Latest ranking for a streamed ticker, as of its last re-rank"""
+    require_stream()
+    ranking = live_rankings.get(ticker.upper())
+    if ranking is None:
+        raise HTTPException(status_code=404, detail=f"{ticker.upper()} is not subscribed or has no ranking yet")
+    return {"success": True, **ranking, "timestamp": datetime.now().isoformat()}
+
+# Prometheus scrape endpoint
+@app.get("/api/metrics")
+async def get_metrics():
+    """Request, stage, upstream and cache metrics in the Prometheus text format"""
+    return Response(REGISTRY.expose(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# On-demand sampling profiler
+@app.get("/api/metrics/profile")
+async def get_profile(
+    seconds: float = Query(default=5.0, gt=0),
+    interval_ms: float = Query(default=5.0, ge=1, le=100),
+    format: str = Query(default="json", pattern="^(json|collapsed)$")
+):
+    """
+    Sample every thread's stack for the given window while the server keeps
+    serving traffic. format=collapsed returns flame graph input.
+    """
+    global active_profiler
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled; set PROFILER_ENABLED=1")
+    if active_profiler is not None:
+        raise HTTPException(status_code=409, detail="A profile is already being recorded")
+
+    profiler = SamplingProfiler(interval=interval_ms / 1e3)
+    active_profiler = profiler
+    try:
+        profiler.start()
+        await asyncio.sleep(min(seconds, PROFILE_MAX_SECONDS))
+    finally:
+        profiler.stop()
+        active_profiler = None
+
+    if format == "collapsed":
+        return Response(profiler.collapsed(), media_type="text/plain")
+    return {"success": True, **profiler.report(), "timestamp": datetime.now().isoformat()}
+
+# Strategy catalog endpoints
+@app.get("/api/strategies")
+async def list_strategies():
+    """Every registered strategy with its legs and capital rule"""
+    strategies = strategy_catalog()
+    return {
+        "success": True,
+        "strategies": strategies,
+        "count": len(strategies),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/api/strategy/{strategy_id}")
 async def get_strategy_details(strategy_id: str):
-    """Get detailed information about a specific strategy"""
+    """Get detailed information about a strategy, by slug or scan result id"""
     try:
+        strategy = find_strategy(strategy_id)
+        if strategy is None:
+            raise HTTPException(status_code=404, detail=f"Unknown strategy: {strategy_id}")
         return {
             "success": True,
-            "strategy": {
-                "id": strategy_id,
-                "name": "Sample Strategy",
-                "description": "Detailed strategy information would go here"
-            },
+            "strategy": {**strategy, "id": strategy_id, "strategyId": strategy["id"]},
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting strategy details: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Export strategies endpoint
-@app.post("/api/export")
-async def export_strategies(strategies: List[Dict[str, Any]]):
-    """Export strategies to various formats"""
+# Payoff diagram endpoints
+def payoff_response(strategy: Dict[str, Any], spot: float, grid: PayoffGrid, quantity: float) -> Response:
+    from strategies.payoff import strategy_payoff
+
     try:
-        export_data = {
-            "strategies": strategies,
-            "generated_at": datetime.now().isoformat(),
-            "total_count": len(strategies)
-        }
+        with stage("payoff"):
+            payoff = strategy_payoff(
+                strategy,
+                spot,
+                quantity=quantity,
+                price_range=grid.price_range,
+                points=grid.points,
+                dates=grid.dates,
+                width=grid.width
+            )
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid strategy: {e}")
 
-        return JSONResponse(
-            content=export_data,
-            headers={
-                "Content-Disposition": "attachment; filename=strategies.json"
-            }
+    with stage("serialize"):
+        return FastJSONResponse({
+            "success": True,
+            "id": strategy.get("id", ""),
+            "ticker": str(strategy.get("ticker", "")).upper(),
+            "spot": spot,
+            "quantity": quantity,
+            "prices": payoff["prices"],
+            "dates": payoff["dates"],
+            "daysToExpiry": payoff["days_to_expiry"],
+            "pnl": payoff["pnl"],
+            "expiration": {
+                "pnl": payoff["expiration_pnl"],
+                "breakevens": payoff["breakevens"],
+                "maxProfit": payoff["max_profit"],
+                "maxLoss": payoff["max_loss"]
+            },
+            "expirationDate": payoff["expiration_date"],
+            "gridPoints": payoff["grid_points"],
+            "timestamp": datetime.now().isoformat()
+        })
+
+@app.post("/api/strategy/payoff", response_model=PayoffResponse)
+async def strategy_payoff_post(request: PayoffRequest):
+    """
+    Expiration payoff and T+n P&L curves for a strategy sent in the request
+    """
+    try:
+        init_engine()
+        spot = request.spot
+        if spot is None:
+            ticker = str(request.strategy.get("ticker", "")).upper()
+            quote = await polygon_client.get_stock_price(ticker) if ticker else None
+            if not quote:
+                raise HTTPException(status_code=404, detail=f"Stock data not found for {ticker or 'strategy'}")
+            spot = quote["price"]
+        return payoff_response(request.strategy, spot, request, request.quantity)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error computing payoff: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.get("/api/strategy/{strategy_id}/payoff", response_model=PayoffResponse)
+async def strategy_payoff_get(strategy_id: str, query: Annotated[StrategyPayoffQuery, Query()]):
+    """
+    Payoff curves for a scan result id, looked up by rerunning the scan it
+    came from; the engine's result cache usually answers that without
+    recomputing
+    """
+    try:
+        entry = find_strategy(strategy_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail=f"Unknown strategy: {strategy_id}")
+        ticker = strategy_id[len(entry["id"]) + 1:].split("_")[0].upper()
+        if not ticker:
+            raise HTTPException(status_code=400, detail="Payoffs need a scan result id, e.g. iron_condor_SPY_440_445")
+
+        init_engine()
+        with stage("fetch"):
+            snapshot = await polygon_client.get_snapshot(ticker, query.min_dte, query.max_dte)
+        if not snapshot:
+            raise HTTPException(status_code=404, detail=f"Stock data not found for {ticker}")
+
+        strategies = await strategy_engine.scan_strategies(
+            ticker=ticker,
+            risk_profile=query.risk_profile,
+            min_dte=query.min_dte,
+            max_dte=query.max_dte,
+            max_strategies=query.max_strategies,
+            snapshot=snapshot,
+            max_capital=query.max_capital
         )
+        strategy = next((s for s in strategies if s.get("id") == strategy_id), None)
+        if strategy is None:
+            raise HTTPException(status_code=404, detail=f"{strategy_id} is not in the current scan of {ticker}")
+        return payoff_response({**strategy, "ticker": ticker}, snapshot.price, query, query.quantity)
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error exporting strategies: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error computing payoff: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+# Bulk export endpoint
+async def scan_batches(request: ExportRequest, tickers: List[str]) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Each ticker's ranked rows in completion order. At most `concurrency`
+    scans are in flight and a new one starts only once a finished ticker is
+    handed on, so a slow reader slows the scans rather than queueing rows.
+    """
+    concurrency = request.concurrency or BATCH_SCAN_CONCURRENCY
+    semaphore = asyncio.Semaphore(concurrency)
+    remaining = iter(tickers)
+    pending = set()
+    failed = 0
+    try:
+        while True:
+            for ticker in remaining:
+                pending.add(asyncio.ensure_future(scan_ticker(request, ticker, semaphore)))
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                if failed:
+                    logger.warning(f"Export: {failed} of {len(tickers)} tickers returned no strategies")
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                stale = bool(result.get("stale"))
+                if not result["strategies"]:
+                    # One row per ticker without strategies, so it is visible in the file
+                    failed += 1
+                    yield [{
+                        "ticker": result["ticker"],
+                        "currentPrice": result.get("currentPrice"),
+                        "stale": stale,
+                        "error": result.get("error") or "No viable strategies found"
+                    }]
+                    continue
+                yield [
+                    {**row, "rank": rank, "stale": stale}
+                    for rank, row in enumerate(result["strategies"], 1)
+                ]
+    finally:
+        # Client went away (or the generator was closed): stop outstanding scans
+        for task in pending:
+            task.cancel()
+
+async def cached_scan_batches(body: Dict[str, Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+    stale = bool(body.get("stale"))
+    yield [{**row, "rank": rank, "stale": stale} for rank, row in enumerate(body["strategies"], 1)]
+
+@app.post("/api/export")
+async def export_strategies(request: ExportRequest):
+    """
+    Stream scan results as a CSV, NDJSON or Parquet file, from a cached scan
+    or by scanning a list of tickers
+    """
+    export_format = request.format.lower()
+    if export_format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(FORMATS)}")
+    if request.compression not in (None, "gzip"):
+        raise HTTPException(status_code=400, detail="compression must be 'gzip'")
+    if (request.scan_id is None) == (request.tickers is None):
+        raise HTTPException(status_code=400, detail="Send either scan_id or tickers")
+
+    try:
+        columns = select_columns(request.columns)
+        if request.scan_id is not None:
+            cached = response_cache.get_by_etag(request.scan_id) if response_cache else None
+            body = json.loads(cached.body) if cached else None
+            if not body or "strategies" not in body:
+                raise HTTPException(status_code=404, detail="Scan not found; it may have expired from the response cache")
+            batches = cached_scan_batches(body)
+        else:
+            tickers = list(dict.fromkeys(t.upper().strip() for t in request.tickers if t.strip()))
+            if not tickers:
+                raise HTTPException(status_code=400, detail="At least one ticker is required")
+            init_engine()
+            logger.info(f"Exporting strategies for {len(tickers)} tickers as {export_format}")
+            batches = scan_batches(request, tickers)
+
+        chunks = encode_stream(batches, export_format, columns, request.compression, EXPORT_CHUNK_ROWS)
+        # The header chunk comes first, so encoder errors are raised here
+        # rather than midway through the response
+        first = await chunks.__anext__()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def body_chunks() -> AsyncIterator[bytes]:
+        if first:
+            yield first
+        async for chunk in chunks:
+            yield chunk
+
+    media_type, extension = FORMATS[export_format]
+    filename = f"strategies-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+    if request.compression == "gzip" and export_format != "parquet":
+        media_type, filename = "application/gzip", filename + ".gz"
+    return StreamingResponse(
+        body_chunks(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
 
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
+    # A matched route raised the 404 itself, so its detail says what was missing
+    if "endpoint" in request.scope and isinstance(exc, HTTPException):
+        return JSONResponse(
+            status_code=404,
+            content={"success": False, "error": exc.detail},
+            headers=exc.headers
+        )
     return JSONResponse(
         status_code=404,
         content={"success": False, "error": "Endpoint not found"}
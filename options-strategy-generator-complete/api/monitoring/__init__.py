@@ -0,0 +1,33 @@
+"""
+Metrics, request timing and sampling profiler
+"""
+
+from .metrics import (
+    COUNT_BUCKETS,
+    LATENCY_BUCKETS,
+    REGISTRY,
+    STAGE_SECONDS,
+    Counter,
+    Histogram,
+    Registry,
+    begin_request_timings,
+    record_stages,
+    stage,
+)
+from .http import MetricsMiddleware
+from .profiler import SamplingProfiler
+
+__all__ = [
+    'COUNT_BUCKETS',
+    'LATENCY_BUCKETS',
+    'REGISTRY',
+    'STAGE_SECONDS',
+    'Counter',
+    'Histogram',
+    'MetricsMiddleware',
+    'Registry',
+    'SamplingProfiler',
+    'begin_request_timings',
+    'record_stages',
+    'stage',
+]
@@ -0,0 +1,55 @@
+"""
+ASGI middleware recording request metrics and the Server-Timing header
+"""
+
+import time
+
+from .metrics import REGISTRY, begin_request_timings
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests_total', 'HTTP requests by method, route template and status', ('method', 'route', 'status')
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    'http_request_seconds', 'Time to the end of the response handler, by route template', ('method', 'route')
+)
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request and, with server_timing, reports the stage
+    durations collected during it as a Server-Timing response header.
+
+    Routes are labelled by their template (/api/quote/{ticker}) rather than
+    the raw path so label cardinality stays bounded.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings = begin_request_timings()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if self.server_timing:
+                    timings['total'] = time.perf_counter() - started
+                    header = ', '.join(f'{name};dur={seconds * 1e3:.2f}' for name, seconds in timings.items())
+                    message = {**message, 'headers': [*message.get('headers', []), (b'server-timing', header.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = getattr(scope.get('route'), 'path', 'unmatched')
+            method = scope.get('method', '')
+            HTTP_SECONDS.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
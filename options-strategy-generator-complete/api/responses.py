@@ -0,0 +1,150 @@
+"""
+Typed API response shapes and the orjson-backed encoding path
+"""
+
+import json
+import math
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import JSONResponse
+# Pydantic only builds schemas from typing_extensions' TypedDict before Python 3.12
+from typing_extensions import TypedDict
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+class StrategyResult(TypedDict):
+    id: str
+    name: str
+    type: str
+    complexity: str
+    confidence: Optional[float]
+    maxProfit: float
+    maxLoss: float
+    unlimitedProfit: bool           # maxProfit is an estimate; the payoff is unbounded
+    unlimitedLoss: bool             # maxLoss is an estimate; the payoff is unbounded
+    capitalRequired: float
+    probabilityOfProfit: Optional[float]
+    description: str
+    netPremium: Optional[float]
+    expirationDays: Optional[float]
+    expirationDate: Optional[str]
+    legs: List[Dict[str, Any]]
+    currentPrice: float
+    ticker: str
+
+
+class ScreenerResult(StrategyResult):
+    stale: bool                     # Scanned from stale or demo data
+    scannedAt: str
+
+
+class ScreenerResponse(TypedDict):
+    success: bool
+    strategies: List[ScreenerResult]
+    count: int
+    indexedTickers: int
+    watchlistSize: int
+    oldestScan: Optional[str]
+    scanParams: Dict[str, Any]
+    timestamp: str
+
+
+class PayoffResponse(TypedDict):
+    success: bool
+    id: str
+    ticker: str
+    spot: float
+    quantity: float
+    prices: List[float]
+    dates: List[str]                # One T+n curve per date, starting today
+    daysToExpiry: List[float]
+    pnl: List[List[float]]          # [date][price], dollars for the position
+    expiration: Dict[str, Any]      # pnl, breakevens, maxProfit, maxLoss
+    expirationDate: Optional[str]
+    gridPoints: int                 # Prices evaluated; len(prices) is smaller when downsampled
+    timestamp: str
+
+
+class ScanResponse(TypedDict, total=False):
+    success: bool
+    strategies: List[StrategyResult]
+    currentPrice: Optional[float]
+    ticker: str
+    stale: bool
+    dataSource: str
+    error: Optional[str]
+    timestamp: str
+
+
+def strategy_result(strategy: Dict[str, Any], current_price: float, ticker: str) -> StrategyResult:
+    """
+    The API view of an engine strategy dict; legs are passed through unchanged.
+
+    Rows stay plain dicts: the screener index and exports read and extend
+    them by key, and a scan's body is rendered once per snapshot version.
+    """
+    get = strategy.get
+    return {
+        "id": get("id", ""),
+        "name": get("name", ""),
+        "type": get("type", ""),
+        "complexity": get("complexity", ""),
+        "confidence": get("confidence_score", 0),
+        "maxProfit": get("max_profit", 0),
+        "maxLoss": get("max_loss", 0),
+        "unlimitedProfit": get("unlimited_profit", False),
+        "unlimitedLoss": get("unlimited_loss", False),
+        "capitalRequired": get("capital_required", 0),
+        "probabilityOfProfit": get("probability_of_profit"),
+        "description": get("description", ""),
+        "netPremium": get("net_premium"),
+        "expirationDays": get("expiration_days"),
+        "expirationDate": get("expiration_date"),
+        "legs": get("legs", []),
+        "currentPrice": current_price,
+        "ticker": ticker,
+    }
+
+
+def _finite(value: Any) -> Any:
+    """Replace non-finite floats with None, recursively, for the stdlib encoder"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(v) for v in value]
+    if hasattr(value, 'tolist'):
+        return _finite(value.tolist())
+    return value
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def dumps(payload: Any) -> bytes:
+    """
+    Encode a response payload as JSON bytes.
+
+    NumPy scalars and arrays are encoded natively. Infinity and NaN, which
+    are not valid JSON, become null on both the orjson and stdlib paths.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(_finite(payload), default=_default, allow_nan=False, separators=(',', ':')).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that encodes with dumps(); return it directly to skip jsonable_encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
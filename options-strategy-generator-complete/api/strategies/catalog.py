@@ -0,0 +1,99 @@
+"""
+Prebuilt strategy catalog: registry metadata as JSON, readable without NumPy
+
+The registry module imports NumPy for its payoff functions, which a cold
+start should not pay for just to list strategies. The catalog is generated
+from the registry at build time and checked in next to it:
+
+    cd api && python -m strategies.catalog          # rebuild catalog.json
+    cd api && python -m strategies.catalog --check  # exit 1 if out of date
+"""
+
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog.json')
+
+_prebuilt: Optional[List[Dict[str, Any]]] = None
+
+
+def catalog_entry(definition) -> Dict[str, Any]:
+    """API representation of one StrategyDefinition"""
+    return {
+        'id': definition.slug,
+        'name': definition.name,
+        'type': definition.type,
+        'complexity': definition.complexity,
+        'structure': definition.structure,
+        'capitalRule': definition.capital_rule.__name__.replace('capital_', ''),
+        'legs': [
+            {'type': leg.type, 'offset': leg.offset, 'quantity': leg.quantity}
+            for leg in definition.legs
+        ],
+        'description': definition.description,
+    }
+
+
+def build_catalog() -> List[Dict[str, Any]]:
+    """Catalog of the live registry; imports the registry and so NumPy"""
+    from .registry import all_strategies
+    return [catalog_entry(definition) for definition in all_strategies()]
+
+
+def load_catalog() -> List[Dict[str, Any]]:
+    """Catalog written at build time, read once per process"""
+    global _prebuilt
+    if _prebuilt is None:
+        with open(CATALOG_PATH) as f:
+            _prebuilt = json.load(f)['strategies']
+    return _prebuilt
+
+
+def strategy_catalog() -> List[Dict[str, Any]]:
+    """
+    The live registry once something has imported it, so strategies
+    registered at runtime are listed; the prebuilt file before that or if
+    it is missing.
+    """
+    if 'strategies.registry' not in sys.modules:
+        try:
+            return load_catalog()
+        except (OSError, ValueError, KeyError):
+            pass
+    return build_catalog()
+
+
+def find_strategy(strategy_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Catalog entry for a strategy slug or a scan result id, which extends
+    the slug with the ticker and strikes (iron_condor_SPY_440_445)
+    """
+    matches = [
+        entry for entry in strategy_catalog()
+        if strategy_id == entry['id'] or strategy_id.startswith(entry['id'] + '_')
+    ]
+    return max(matches, key=lambda entry: len(entry['id']), default=None)
+
+
+def write_catalog(path: str = CATALOG_PATH) -> List[Dict[str, Any]]:
+    strategies = build_catalog()
+    with open(path, 'w') as f:
+        json.dump({'strategies': strategies}, f, indent=2)
+        f.write('\n')
+    return strategies
+
+
+if __name__ == '__main__':
+    if '--check' in sys.argv[1:]:
+        try:
+            current = load_catalog()
+        except (OSError, ValueError, KeyError):
+            current = None
+        if current != build_catalog():
+            print(f"{CATALOG_PATH} is out of date; run: python -m strategies.catalog")
+            sys.exit(1)
+        print(f"{CATALOG_PATH} is up to date")
+    else:
+        print(f"Wrote {len(write_catalog())} strategies to {CATALOG_PATH}")
@@ -0,0 +1,361 @@
+"""
+Execution layer that keeps CPU-bound strategy evaluation off the event loop
+
+A scan's fetch and cache lookups stay on the loop; surface fitting, spread
+search, simulation and scoring run elsewhere:
+
+    inline   on the event loop (the previous behaviour; benchmarks and tests)
+    thread   on a thread pool. NumPy releases the GIL in its kernels, and a
+             cancelled scan stops at the next stage boundary
+    process  on a process pool. The snapshot goes out as its chain columns
+             and the ranked strategies come back as parallel arrays, so
+             neither side pickles dict lists. Queued scans are dropped on
+             cancellation; a running one finishes and is discarded
+
+Strategies registered at runtime exist only in this process, so once the
+registry changes the process mode evaluates on the thread pool instead.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .pricing import CALL, PUT
+from .registry import registry_version
+from monitoring import REGISTRY, begin_request_timings, record_stages
+
+logger = logging.getLogger(__name__)
+
+MODES = ('inline', 'thread', 'process')
+
+EXECUTIONS = REGISTRY.counter(
+    'scan_executor_tasks_total', 'Strategy evaluations by executor and outcome', ('executor', 'result')
+)
+
+# Numeric strategy fields, in the column order of PackedStrategies.values
+STRATEGY_FIELDS = (
+    'current_price', 'max_profit', 'max_loss', 'capital_required', 'probability_of_profit',
+    'net_premium', 'expiration_days', 'expected_value', 'cvar', 'confidence_score', 'iv_rank'
+)
+GREEKS = ('delta', 'gamma', 'theta', 'vega', 'rho')
+LEG_FIELDS = ('strike', 'premium', 'iv', 'spread', 'open_interest')
+LEG_CODES = {'call': CALL, 'put': PUT, 'stock': 0}
+LEG_TYPES = {code: name for name, code in LEG_CODES.items()}
+
+# (result, number of candidates evaluated), or None when the DTE window has no expiry
+Evaluation = Optional[Tuple[List[Dict[str, Any]], int]]
+
+
+class ScanCancelled(Exception):
+    """Raised inside an evaluation whose caller has gone away"""
+
+
+def check_cancelled(cancelled: Optional[Callable[[], bool]]):
+    if cancelled is not None and cancelled():
+        raise ScanCancelled()
+
+
+@dataclass(frozen=True)
+class PackedSnapshot:
+    """A MarketSnapshot as its quote fields and chain columns"""
+    quote: Dict[str, Any]
+    underlying: Optional[str] = None
+    as_of: Any = None
+    fetched_at: Optional[str] = None
+    columns: Optional[Dict[str, np.ndarray]] = None
+    symbols: Optional[np.ndarray] = None
+
+    @classmethod
+    def pack(cls, snapshot: Any) -> 'PackedSnapshot':
+        chain = snapshot.chain
+        if chain is None:
+            return cls(snapshot.as_quote())
+        return cls(
+            snapshot.as_quote(),
+            chain.underlying,
+            chain.as_of,
+            chain.fetched_at,
+            # Memory-mapped or sliced columns go out as plain contiguous arrays
+            {name: np.ascontiguousarray(col) for name, col in chain.columns.items()},
+            np.asarray(chain.symbols, dtype=str)
+        )
+
+    def unpack(self) -> Any:
+        from data.chain import OptionChain
+        from data.snapshot import MarketSnapshot
+
+        chain = None
+        if self.columns is not None:
+            chain = OptionChain(
+                self.underlying, self.columns, self.symbols,
+                as_of=self.as_of, presorted=True, fetched_at=self.fetched_at
+            )
+        return MarketSnapshot.from_quote(self.quote, chain)
+
+
+@dataclass(frozen=True)
+class PackedStrategies:
+    """
+    Ranked strategies as parallel arrays: one row per strategy, legs flattened
+    in strategy order with leg_offsets[i]:leg_offsets[i + 1] selecting row i's.
+    Values repeated across rows (template, expiration) are sent once and
+    indexed; missing values are NaN in float columns and empty in byte strings.
+    """
+    templates: Tuple[Tuple[str, str, str], ...]     # (name, type, complexity)
+    expirations: Tuple[Optional[str], ...]
+    template: np.ndarray                            # int16 index into templates
+    expiration: np.ndarray                          # int16 index into expirations
+    ids: np.ndarray                                 # ASCII bytes
+    values: np.ndarray                              # (n, STRATEGY_FIELDS + GREEKS)
+    unlimited: np.ndarray                           # (n, 2): profit, loss
+    leg_offsets: np.ndarray
+    leg_type: np.ndarray
+    leg_quantity: np.ndarray
+    leg_values: np.ndarray                          # (legs, LEG_FIELDS); option strikes unrounded
+    leg_symbols: np.ndarray                         # ASCII bytes
+
+    @classmethod
+    def pack(cls, strategies: List[Dict[str, Any]]) -> 'PackedStrategies':
+        templates = list(dict.fromkeys((s['name'], s['type'], s['complexity']) for s in strategies))
+        expirations = list(dict.fromkeys(s['expiration_date'] for s in strategies))
+        legs = [leg for s in strategies for leg in s['legs']]
+        # The unrounded option strikes are the strategy's 'strikes'; stock legs follow them
+        strikes = [
+            k for s in strategies
+            for k in s['strikes'] + [leg['strike'] for leg in s['legs'][len(s['strikes']):]]
+        ]
+        leg_values = [
+            [strike] + [np.nan if leg.get(f) is None else leg[f] for f in LEG_FIELDS[1:]]
+            for strike, leg in zip(strikes, legs)
+        ]
+
+        return cls(
+            templates=tuple(templates),
+            expirations=tuple(expirations),
+            template=np.array(
+                [templates.index((s['name'], s['type'], s['complexity'])) for s in strategies], dtype=np.int16
+            ),
+            expiration=np.array([expirations.index(s['expiration_date']) for s in strategies], dtype=np.int16),
+            ids=np.array([s['id'].encode() for s in strategies], dtype=bytes),
+            values=np.array(
+                [[s[f] for f in STRATEGY_FIELDS] + [s['greeks'][g] for g in GREEKS] for s in strategies],
+                dtype=np.float64
+            ).reshape(len(strategies), len(STRATEGY_FIELDS) + len(GREEKS)),
+            unlimited=np.array(
+                [(s['unlimited_profit'], s['unlimited_loss']) for s in strategies], dtype=bool
+            ).reshape(len(strategies), 2),
+            leg_offsets=np.cumsum([0] + [len(s['legs']) for s in strategies], dtype=np.int32),
+            leg_type=np.array([LEG_CODES[leg['type']] for leg in legs], dtype=np.int8),
+            leg_quantity=np.array([leg['quantity'] for leg in legs], dtype=np.int32),
+            leg_values=np.array(leg_values, dtype=np.float64).reshape(len(legs), len(LEG_FIELDS)),
+            leg_symbols=np.array([(leg.get('symbol') or '').encode() for leg in legs], dtype=bytes)
+        )
+
+    def unpack(self, ticker: str) -> List[Dict[str, Any]]:
+        def optional(value: float) -> Optional[float]:
+            return None if value != value else value
+
+        legs = []
+        for kind, quantity, values, symbol in zip(
+            self.leg_type.tolist(), self.leg_quantity.tolist(), self.leg_values.tolist(), self.leg_symbols.tolist()
+        ):
+            strike, premium, iv, spread, open_interest = values
+            leg = {'type': LEG_TYPES[kind], 'strike': round(strike, 2), 'quantity': quantity, 'premium': optional(premium)}
+            if kind != 0:
+                leg['iv'] = iv
+                leg['symbol'] = symbol.decode() or None
+                leg['spread'] = optional(spread)
+                leg['open_interest'] = optional(open_interest)
+            legs.append(leg)
+
+        strategies = []
+        offsets = self.leg_offsets.tolist()
+        for i, row in enumerate(self.values.tolist()):
+            name, kind, complexity = self.templates[self.template[i]]
+            start, stop = offsets[i], offsets[i + 1]
+            fields = dict(zip(STRATEGY_FIELDS, row))
+            strategies.append({
+                'id': self.ids[i].decode(),
+                'name': name,
+                'type': kind,
+                'complexity': complexity,
+                'confidence_score': fields['confidence_score'],
+                'ticker': ticker,
+                'current_price': fields['current_price'],
+                'max_profit': fields['max_profit'],
+                'max_loss': fields['max_loss'],
+                'unlimited_profit': bool(self.unlimited[i, 0]),
+                'unlimited_loss': bool(self.unlimited[i, 1]),
+                'capital_required': fields['capital_required'],
+                'probability_of_profit': fields['probability_of_profit'],
+                'net_premium': fields['net_premium'],
+                'expiration_days': fields['expiration_days'],
+                'expiration_date': self.expirations[self.expiration[i]],
+                'greeks': dict(zip(GREEKS, row[len(STRATEGY_FIELDS):])),
+                'strikes': [
+                    float(k) for k, code in zip(self.leg_values[start:stop, 0], self.leg_type[start:stop]) if code != 0
+                ],
+                'legs': legs[start:stop],
+                'expected_value': fields['expected_value'],
+                'cvar': fields['cvar'],
+                'iv_rank': fields['iv_rank']
+            })
+        return strategies
+
+
+def engine_settings(engine: Any) -> Dict[str, Any]:
+    """Constructor arguments that reproduce an engine's evaluation in a worker"""
+    return {
+        'default_iv': engine.default_iv,
+        'risk_free_rate': engine.risk_free_rate,
+        'search_config': engine.search_config,
+        'simulation_config': engine.simulation_config,
+        'risk_multipliers': dict(engine.risk_multipliers),
+    }
+
+
+# Worker process state: one engine, rebuilt only if the parent's settings change
+_worker_engine = None
+_worker_settings: Optional[Dict[str, Any]] = None
+
+
+def _init_worker():
+    """Import the engine up front so the first scan does not pay for it"""
+    from . import options_engine  # noqa: F401
+
+
+def _warm_worker() -> int:
+    return os.getpid()
+
+
+def _evaluate_packed(
+    settings: Dict[str, Any],
+    snapshot: PackedSnapshot,
+    ticker: str,
+    params: Dict[str, Any]
+) -> Tuple[Optional[PackedStrategies], int, Dict[str, float]]:
+    """Process pool entry point: evaluate one ticker, return arrays and stage timings"""
+    global _worker_engine, _worker_settings
+    from .options_engine import OptionsStrategyEngine
+
+    if _worker_engine is None or settings != _worker_settings:
+        _worker_engine = OptionsStrategyEngine(
+            None,
+            default_iv=settings['default_iv'],
+            risk_free_rate=settings['risk_free_rate'],
+            search_config=settings['search_config'],
+            simulation_config=settings['simulation_config']
+        )
+        _worker_engine.risk_multipliers = settings['risk_multipliers']
+        _worker_settings = settings
+
+    timings = begin_request_timings()
+    evaluated = _worker_engine.evaluate(snapshot.unpack(), ticker, **params)
+    if evaluated is None:
+        return None, 0, timings
+    strategies, count = evaluated
+    return PackedStrategies.pack(strategies), count, timings
+
+
+class ScanExecutor:
+    """
+    Runs OptionsStrategyEngine.evaluate inline, on a thread pool or on a
+    process pool, and cancels the work when the awaiting task is cancelled.
+    """
+
+    def __init__(self, mode: str = 'thread', workers: Optional[int] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown executor mode '{mode}', expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        # Registry state the worker processes were started with
+        self._registry_version: Optional[int] = None
+        self._fallback_logged = False
+        self.inflight = 0
+
+    def start(self):
+        """Create the pools; worker processes are started and warmed here rather than on the first scan"""
+        if self.mode == 'inline' or self._threads is not None:
+            return
+        self._threads = ThreadPoolExecutor(self.workers, thread_name_prefix='scan')
+        if self.mode == 'process':
+            import multiprocessing
+            # Forking a process with a running event loop and client threads
+            # can copy held locks, so workers start from a fresh interpreter
+            self._processes = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker
+            )
+            self._registry_version = registry_version()
+            for _ in range(self.workers):
+                self._processes.submit(_warm_worker)
+
+    def shutdown(self):
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._threads = self._processes = None
+
+    def _submit(self, engine: Any, snapshot: Any, ticker: str, params: Dict[str, Any], cancel: threading.Event):
+        """(future, mode actually used) for one evaluation"""
+        if self._processes is not None:
+            if registry_version() == self._registry_version:
+                future = self._processes.submit(
+                    _evaluate_packed, engine_settings(engine), PackedSnapshot.pack(snapshot), ticker, params
+                )
+                return future, 'process'
+            if not self._fallback_logged:
+                logger.info("Strategy registry changed since the worker processes started; evaluating on threads")
+                self._fallback_logged = True
+        # Threads see the caller's context, so stage timings reach its Server-Timing
+        context = contextvars.copy_context()
+        future = self._threads.submit(
+            context.run, engine.evaluate, snapshot, ticker, cancelled=cancel.is_set, **params
+        )
+        return future, 'thread'
+
+    async def evaluate(self, engine: Any, snapshot: Any, ticker: str, **params) -> Evaluation:
+        """engine.evaluate(snapshot, ticker, **params) on the configured executor"""
+        if self.mode == 'inline':
+            return engine.evaluate(snapshot, ticker, **params)
+
+        self.start()
+        cancel = threading.Event()
+        future, mode = self._submit(engine, snapshot, ticker, params, cancel)
+        self.inflight += 1
+        try:
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A thread stops at its next stage boundary; a queued task never starts
+            cancel.set()
+            future.cancel()
+            EXECUTIONS.labels(mode, 'cancelled').inc()
+            raise
+        except Exception:
+            EXECUTIONS.labels(mode, 'failed').inc()
+            raise
+        finally:
+            self.inflight -= 1
+        EXECUTIONS.labels(mode, 'completed').inc()
+
+        if mode == 'thread':
+            return result
+        packed, count, timings = result
+        record_stages(timings)
+        return None if packed is None else (packed.unpack(ticker), count)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'workers': self.workers,
+            'inflight': self.inflight,
+            'process_fallback': self._processes is not None and registry_version() != self._registry_version,
+        }
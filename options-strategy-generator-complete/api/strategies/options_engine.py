@@ -4,77 +4,104 @@ Core options strategy generation and ranking engine
 
 import asyncio
 import logging
-from typing import List, Dict, Optional, Any
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from dataclasses import replace
 from datetime import datetime, timedelta
-import random
+
+import numpy as np
+
+from .pricing import CALL, PUT, DAYS_PER_YEAR, black_scholes
+from .registry import StrategyDefinition, all_strategies, get_strategy, linear_payoff, registry_version
+from .search import SearchConfig, SpreadSearch
+from .scoring import build_components, iv_rank, realized_volatility, score
+from .simulation import SimulationConfig, derive_seed, evaluate_strategies
+from .volatility import VolSurface
+from .executor import Evaluation, ScanExecutor, check_cancelled
+from monitoring import COUNT_BUCKETS, REGISTRY, stage
 
 logger = logging.getLogger(__name__)
 
+SCANS = REGISTRY.counter('strategy_scans_total', 'Strategy scans by outcome', ('result',))
+STRATEGIES_EVALUATED = REGISTRY.histogram(
+    'strategy_candidates_evaluated', 'Candidate strategies priced and scored per computed scan',
+    buckets=COUNT_BUCKETS
+)
+
+DEFAULT_IV = 0.30
+RISK_FREE_RATE = 0.05
+
 class OptionsStrategyEngine:
-    def __init__(self, polygon_client):
+    # Confidence adjustment per risk profile
+    risk_multipliers = {
+        'conservative': 0.85,
+        'moderate': 0.95,
+        'moderate_aggressive': 1.0,
+        'aggressive': 1.1
+    }
+
+    def __init__(
+        self,
+        polygon_client,
+        default_iv: float = DEFAULT_IV,
+        risk_free_rate: float = RISK_FREE_RATE,
+        search_config: Optional[SearchConfig] = None,
+        simulation_config: Optional[SimulationConfig] = None,
+        scan_cache_size: int = 256,
+        surface_cache_size: int = 64,
+        executor: Optional[ScanExecutor] = None
+    ):
         self.polygon_client = polygon_client
-        self.strategies = self._initialize_strategies()
-
-    def _initialize_strategies(self) -> List[Dict]:
-        """Initialize available strategy templates"""
-        return [
-            {
-                'name': 'Bull Put Spread',
-                'type': 'bullish',
-                'complexity': 'intermediate',
-                'min_confidence': 50,
-                'max_confidence': 85,
-            },
-            {
-                'name': 'Iron Condor',
-                'type': 'neutral',
-                'complexity': 'advanced',
-                'min_confidence': 40,
-                'max_confidence': 70,
-            },
-            {
-                'name': 'Cash Secured Put',
-                'type': 'bullish',
-                'complexity': 'beginner',
-                'min_confidence': 45,
-                'max_confidence': 75,
-            },
-            {
-                'name': 'Covered Call',
-                'type': 'bullish',
-                'complexity': 'beginner',
-                'min_confidence': 50,
-                'max_confidence': 80,
-            },
-            {
-                'name': 'Bull Call Spread',
-                'type': 'bullish',
-                'complexity': 'intermediate',
-                'min_confidence': 55,
-                'max_confidence': 78,
-            },
-            {
-                'name': 'Bear Put Spread',
-                'type': 'bearish',
-                'complexity': 'intermediate',
-                'min_confidence': 45,
-                'max_confidence': 75,
-            },
-            {
-                'name': 'Long Straddle',
-                'type': 'volatility',
-                'complexity': 'intermediate',
-                'min_confidence': 40,
-                'max_confidence': 65,
-            },
-            {
-                'name': 'Short Strangle',
-                'type': 'neutral',
-                'complexity': 'advanced',
-                'min_confidence': 50,
-                'max_confidence': 70,
-            }
-        ]
+        self.default_iv = default_iv
+        self.risk_free_rate = risk_free_rate
+        self.search_config = search_config or SearchConfig()
+        self.simulation_config = simulation_config or SimulationConfig()
+        self.scan_cache_size = scan_cache_size
+        self._scan_cache: "OrderedDict[tuple, List[Dict[str, Any]]]" = OrderedDict()
+        self.surface_cache_size = surface_cache_size
+        self._surfaces: "OrderedDict[tuple, Optional[VolSurface]]" = OrderedDict()
+        # Evaluations may run on executor threads, which share the surface cache
+        self._surfaces_lock = threading.Lock()
+        # None evaluates on the event loop
+        self.executor = executor
+
+    @property
+    def strategies(self) -> List[StrategyDefinition]:
+        """Registered strategy definitions, including ones added after startup"""
+        return all_strategies()
+
+    def volatility_surface(self, snapshot: Any) -> Optional[VolSurface]:
+        """
+        Fitted surface for a snapshot's chain, or None without usable quotes.
+
+        Fitting solves IVs for the whole chain, so surfaces are cached on the
+        snapshot version and shared by every scan of the same data.
+        """
+        chain = getattr(snapshot, 'chain', None)
+        if chain is None:
+            return None
+        version = getattr(snapshot, 'version', None)
+        key = (snapshot.ticker, version)
+        if version is not None:
+            with self._surfaces_lock:
+                if key in self._surfaces:
+                    self._surfaces.move_to_end(key)
+                    return self._surfaces[key]
+
+        try:
+            with stage('surface_fit'):
+                surface = VolSurface.from_chain(chain, snapshot.price, self.risk_free_rate)
+        except Exception as e:
+            logger.warning(f"Could not fit volatility surface for {snapshot.ticker}: {e}")
+            surface = None
+
+        if version is not None:
+            with self._surfaces_lock:
+                self._surfaces[key] = surface
+                while len(self._surfaces) > self.surface_cache_size:
+                    self._surfaces.popitem(last=False)
+        return surface
 
     async def scan_strategies(
         self,
@@ -82,161 +109,422 @@ class OptionsStrategyEngine:
         risk_profile: str = "moderate_aggressive",
         min_dte: int = 30,
         max_dte: int = 45,
-        max_strategies: int = 10
+        max_strategies: int = 10,
+        snapshot: Optional[Any] = None,
+        max_capital: Optional[float] = None
     ) -> List[Dict[str, Any]]:
-        """Scan and rank strategies for a ticker"""
+        """
+        Scan and rank strategies for a ticker.
+
+        Pass a pre-fetched MarketSnapshot to avoid a second quote fetch; the
+        engine only fetches one itself when none is given.
+        """
 
         try:
-            # Get current stock data
-            stock_data = await self.polygon_client.get_stock_price(ticker)
-            if not stock_data:
+            if snapshot is None:
+                snapshot = await self.polygon_client.get_snapshot(ticker, min_dte, max_dte)
+            if snapshot is None:
                 return []
 
-            current_price = stock_data['price']
+            # Scoring is deterministic, so results for the same data and
+            # parameters can be reused until the snapshot changes
+            version = getattr(snapshot, 'version', None)
+            cache_key = (
+                ticker, version, registry_version(),
+                risk_profile, min_dte, max_dte, max_strategies, max_capital
+            )
+            if version is not None and cache_key in self._scan_cache:
+                self._scan_cache.move_to_end(cache_key)
+                SCANS.labels('cached').inc()
+                return [dict(strategy) for strategy in self._scan_cache[cache_key]]
 
-            # Generate strategy recommendations
-            recommendations = []
+            params = dict(
+                risk_profile=risk_profile,
+                min_dte=min_dte,
+                max_dte=max_dte,
+                max_strategies=max_strategies,
+                max_capital=max_capital
+            )
+            if self.executor is None:
+                evaluated = self.evaluate(snapshot, ticker, **params)
+            else:
+                evaluated = await self.executor.evaluate(self, snapshot, ticker, **params)
+            if evaluated is None:
+                SCANS.labels('empty').inc()
+                return []
+            recommendations, count = evaluated
+            STRATEGIES_EVALUATED.observe(count)
 
-            for strategy_template in self.strategies[:max_strategies]:
-                strategy = self._generate_strategy(
-                    strategy_template,
-                    current_price,
-                    ticker,
-                    risk_profile
-                )
-                recommendations.append(strategy)
+            # Only strategies that are returned get a rendered description
+            with stage('rank'):
+                for strategy in recommendations:
+                    definition = get_strategy(strategy['name'])
+                    strategy['description'] = definition.describe(
+                        strategy['strikes'], strategy['capital_required']
+                    ) if definition else ''
+            SCANS.labels('computed').inc()
 
-            # Sort by confidence score
-            recommendations.sort(key=lambda x: x['confidence_score'], reverse=True)
+            if version is not None:
+                self._scan_cache[cache_key] = recommendations
+                while len(self._scan_cache) > self.scan_cache_size:
+                    self._scan_cache.popitem(last=False)
 
-            return recommendations[:max_strategies]
+            return [dict(strategy) for strategy in recommendations]
 
         except Exception as e:
             logger.error(f"Error scanning strategies for {ticker}: {e}")
             return []
 
+    def evaluate(
+        self,
+        snapshot: Any,
+        ticker: str,
+        risk_profile: str = "moderate_aggressive",
+        min_dte: int = 30,
+        max_dte: int = 45,
+        max_strategies: int = 10,
+        max_capital: Optional[float] = None,
+        cancelled: Optional[Callable[[], bool]] = None
+    ) -> Evaluation:
+        """
+        Generate, simulate, score and rank strategies for a snapshot.
+
+        This is the CPU-bound part of a scan and touches no I/O, so an
+        executor can run it off the event loop. Returns the ranked strategies
+        without descriptions and the number of candidates evaluated, or None
+        if no expiry falls in the DTE window. ``cancelled`` is polled between
+        stages and raises ScanCancelled once it returns True.
+        """
+
+        current_price = snapshot.price
+        days_to_expiration = (min_dte + max_dte) / 2.0
+
+        # With a loaded chain, trade the listed expiry closest to the middle
+        # of the DTE window; without one, price synthetic strikes.
+        expiry_chain = None
+        surface = None
+        chain = getattr(snapshot, 'chain', None)
+        if chain is not None:
+            window = chain.slice_dte(min_dte, max_dte)
+            expiry = window.nearest_expiry(days_to_expiration)
+            if expiry is None:
+                logger.info(f"No expirations for {ticker} between {min_dte} and {max_dte} DTE")
+                return None
+            expiry_chain = window.expiry_slice(expiry)
+            days_to_expiration = float((expiry - chain.as_of).astype(int))
+            surface = self.volatility_surface(snapshot)
+            check_cancelled(cancelled)
+
+        templates = self.strategies[:max_strategies]
+
+        # Search every leg combination of the loaded expiry for templates
+        # that declare a searchable structure, keeping the best few of each
+        candidates = {}
+        if expiry_chain is not None and len(expiry_chain):
+            config = replace(
+                self.search_config,
+                top_k=min(self.search_config.top_k, max_strategies),
+                max_capital=max_capital if max_capital is not None else self.search_config.max_capital
+            )
+            with stage('spread_search'):
+                candidates = SpreadSearch(
+                    expiry_chain,
+                    current_price,
+                    days_to_expiration,
+                    config,
+                    self.default_iv,
+                    self.risk_free_rate,
+                    surface
+                ).run([t.structure for t in templates if t.structure])
+
+        # Generate strategy recommendations
+        recommendations = []
+
+        with stage('generate'):
+            for strategy_template in templates:
+                check_cancelled(cancelled)
+                leg_sets = [None]
+                if strategy_template.structure in candidates:
+                    leg_sets = [c['legs'] for c in candidates[strategy_template.structure]]
+
+                for legs in leg_sets:
+                    strategy = self._generate_strategy(
+                        strategy_template,
+                        current_price,
+                        ticker,
+                        risk_profile,
+                        days_to_expiration,
+                        expiry_chain,
+                        legs,
+                        surface
+                    )
+                    if max_capital is not None and strategy['capital_required'] > max_capital:
+                        continue
+                    recommendations.append(strategy)
+
+        # Simulate every candidate against one shared set of paths, then
+        # score them deterministically from the simulated and market inputs
+        sigma = self.default_iv
+        if surface is not None:
+            sigma = surface.atm_iv(days_to_expiration)
+        elif expiry_chain is not None:
+            sigma = expiry_chain.atm_iv(current_price) or self.default_iv
+        check_cancelled(cancelled)
+        with stage('simulate'):
+            self._apply_simulation(
+                recommendations,
+                current_price,
+                sigma,
+                days_to_expiration,
+                derive_seed(ticker, getattr(snapshot, 'version', ''))
+            )
+        with stage('score'):
+            rank = iv_rank(
+                sigma,
+                realized_volatility(getattr(snapshot, 'high', None), getattr(snapshot, 'low', None))
+            )
+            self._apply_scores(recommendations, rank, risk_profile)
+        evaluated = len(recommendations)
+
+        # Sort by confidence score, breaking ties by id for a stable order
+        with stage('rank'):
+            recommendations.sort(key=lambda x: (-x['confidence_score'], x['id']))
+            recommendations = recommendations[:max_strategies]
+
+        return recommendations, evaluated
+
     def _generate_strategy(
         self,
-        template: Dict,
+        template: StrategyDefinition,
         stock_price: float,
         ticker: str,
-        risk_profile: str
+        risk_profile: str,
+        days_to_expiration: float = 37.5,
+        chain: Optional[Any] = None,
+        legs: Optional[List[tuple]] = None,
+        surface: Optional[VolSurface] = None
     ) -> Dict[str, Any]:
         """Generate a specific strategy instance"""
 
-        # Calculate confidence based on market conditions and risk profile
-        base_confidence = random.uniform(
-            template['min_confidence'],
-            template['max_confidence']
-        )
-
-        # Adjust for risk profile
-        risk_multipliers = {
-            'conservative': 0.85,
-            'moderate': 0.95,
-            'moderate_aggressive': 1.0,
-            'aggressive': 1.1
-        }
-
-        confidence = base_confidence * risk_multipliers.get(risk_profile, 1.0)
-        confidence = min(95, max(25, confidence))  # Cap between 25-95%
-
         # Generate strategy specifics based on template
         strategy_data = self._calculate_strategy_metrics(
             template,
             stock_price,
-            confidence
+            days_to_expiration,
+            chain,
+            legs,
+            surface
         )
 
+        strategy_id = f"{template.slug}_{ticker}"
+        if legs is not None:
+            strategy_id += ''.join(f"_{strike:g}" for strike in strategy_data['strikes'])
+
         return {
-            'id': f"{template['name'].replace(' ', '_').lower()}_{ticker}",
-            'name': template['name'],
-            'type': template['type'],
-            'complexity': template['complexity'],
-            'confidence_score': confidence,
+            'id': strategy_id,
+            'name': template.name,
+            'type': template.type,
+            'complexity': template.complexity,
+            'confidence_score': None,
             'ticker': ticker,
             'current_price': stock_price,
             **strategy_data
         }
 
+    def _apply_simulation(
+        self,
+        strategies: List[Dict[str, Any]],
+        stock_price: float,
+        sigma: float,
+        days_to_expiration: float,
+        seed: int
+    ):
+        """Set simulated POP, expected value and CVaR on each strategy"""
+        if not strategies:
+            return
+
+        results = evaluate_strategies(
+            strategies,
+            stock_price,
+            sigma,
+            days_to_expiration / DAYS_PER_YEAR,
+            self.risk_free_rate,
+            self.simulation_config,
+            seed
+        )
+
+        for i, strategy in enumerate(strategies):
+            strategy['probability_of_profit'] = float(results['pop'][i])
+            strategy['expected_value'] = float(results['expected_value'][i])
+            strategy['cvar'] = float(results['cvar'][i])
+
+    def _apply_scores(self, strategies: List[Dict[str, Any]], rank: float, risk_profile: str):
+        """Set confidence_score from IV rank, POP, risk/reward, liquidity and edge"""
+        if not strategies:
+            return
+
+        scores = score(
+            build_components(strategies, rank),
+            self.risk_multipliers.get(risk_profile, 1.0)
+        )
+        for strategy, confidence in zip(strategies, scores):
+            strategy['confidence_score'] = float(confidence)
+            strategy['iv_rank'] = rank
+
     def _calculate_strategy_metrics(
         self,
-        template: Dict,
+        template: StrategyDefinition,
         stock_price: float,
-        confidence: float
+        days_to_expiration: float = 37.5,
+        chain: Optional[Any] = None,
+        legs: Optional[List[tuple]] = None,
+        surface: Optional[VolSurface] = None
     ) -> Dict[str, Any]:
-        """Calculate P&L metrics for a strategy"""
-
-        # Simplified P&L calculations for demo
-        # In production, these would be based on real options pricing
-
-        strategy_configs = {
-            'Bull Put Spread': {
-                'max_profit': lambda p: p * 0.05 * 100,  # $5 per share * 100
-                'max_loss': lambda p: p * 0.01 * 100,    # $1 per share * 100
-                'capital_required': lambda p: p * 0.01 * 100,
-                'description': f"Sell 1 put(s) at ${stock_price-5:.2f}, buy 1 put(s) at ${stock_price-10:.2f}"
-            },
-            'Iron Condor': {
-                'max_profit': lambda p: p * 0.03 * 100,
-                'max_loss': lambda p: p * 0.07 * 100,
-                'capital_required': lambda p: p * 0.07 * 100,
-                'description': f"Iron Condor with profit zone between ${stock_price-5:.2f} and ${stock_price+5:.2f}"
-            },
-            'Cash Secured Put': {
-                'max_profit': lambda p: p * 0.02 * 100,
-                'max_loss': lambda p: p * 0.15 * 100,
-                'capital_required': lambda p: p * 100,  # 100 shares worth
-                'description': f"Sell 1 put(s) at ${stock_price-5:.2f} strike, secure with ${p*100:,.0f} cash"
-            },
-            'Covered Call': {
-                'max_profit': lambda p: p * 0.03 * 100,
-                'max_loss': lambda p: p * 0.10 * 100,
-                'capital_required': lambda p: p * 100,
-                'description': f"Own 100 shares, sell 1 call at ${stock_price+5:.2f} strike"
-            },
-            'Bull Call Spread': {
-                'max_profit': lambda p: p * 0.04 * 100,
-                'max_loss': lambda p: p * 0.02 * 100,
-                'capital_required': lambda p: p * 0.02 * 100,
-                'description': f"Buy 1 call(s) at ${stock_price:.2f}, sell 1 call(s) at ${stock_price+5:.2f}"
-            },
-            'Bear Put Spread': {
-                'max_profit': lambda p: p * 0.04 * 100,
-                'max_loss': lambda p: p * 0.02 * 100,
-                'capital_required': lambda p: p * 0.02 * 100,
-                'description': f"Buy 1 put(s) at ${stock_price:.2f}, sell 1 put(s) at ${stock_price-5:.2f}"
-            },
-            'Long Straddle': {
-                'max_profit': lambda p: float('inf'),  # Unlimited upside
-                'max_loss': lambda p: p * 0.05 * 100,
-                'capital_required': lambda p: p * 0.05 * 100,
-                'description': f"Buy 1 call and 1 put both at ${stock_price:.2f} strike"
-            },
-            'Short Strangle': {
-                'max_profit': lambda p: p * 0.04 * 100,
-                'max_loss': lambda p: float('inf'),  # Unlimited risk
-                'capital_required': lambda p: p * 0.20 * 100,  # Margin requirement
-                'description': f"Sell 1 call at ${stock_price+10:.2f} and 1 put at ${stock_price-10:.2f}"
-            }
-        }
+        """
+        Calculate P&L metrics and Greeks for a strategy using Black-Scholes pricing.
 
-        config = strategy_configs.get(template['name'], strategy_configs['Bull Put Spread'])
+        ``legs`` overrides the template's default strike offsets, e.g. with a
+        combination found by the spread search.
+        """
 
-        max_profit = config['max_profit'](stock_price)
-        max_loss = config['max_loss'](stock_price)
-        capital_required = config['capital_required'](stock_price)
+        metrics = self._price_legs(
+            legs or template.build_legs(stock_price),
+            stock_price,
+            days_to_expiration,
+            chain,
+            template.payoff,
+            surface
+        )
+
+        max_profit = metrics['max_profit']
+        max_loss = metrics['max_loss']
+        unlimited_profit = max_profit == float('inf')
+        unlimited_loss = max_loss == float('-inf')
 
         # Handle infinite values for display
-        if max_profit == float('inf'):
+        if unlimited_profit:
             max_profit = stock_price * 2 * 100  # Estimate
-        if max_loss == float('inf'):
-            max_loss = stock_price * 2 * 100  # Estimate
+        if unlimited_loss:
+            max_loss = -stock_price * 2 * 100  # Estimate
+        metrics['max_loss'] = max_loss
 
         return {
             'max_profit': max_profit,
             'max_loss': -abs(max_loss),  # Ensure losses are negative
-            'capital_required': capital_required,
-            'probability_of_profit': confidence / 100.0,
-            'description': config['description']
+            'unlimited_profit': unlimited_profit,
+            'unlimited_loss': unlimited_loss,
+            'capital_required': template.capital_rule(metrics, stock_price),
+            'probability_of_profit': None,
+            'net_premium': metrics['net_premium'] * 100,
+            'expiration_days': days_to_expiration,
+            'expiration_date': metrics['expiration_date'],
+            'greeks': metrics['greeks'],
+            'strikes': metrics['strikes'],
+            'legs': metrics['legs']
+        }
+
+    def _price_legs(
+        self,
+        legs: List[tuple],
+        stock_price: float,
+        days_to_expiration: float,
+        chain: Optional[Any] = None,
+        payoff: Callable[..., np.ndarray] = linear_payoff,
+        surface: Optional[VolSurface] = None
+    ) -> Dict[str, Any]:
+        """
+        Price all option legs in one vectorized call and derive expiration P&L bounds.
+
+        With a single-expiry chain, target strikes snap to the nearest listed
+        contract and its IV and bid/ask mid are used where quoted. A fitted
+        surface, when given, supplies the IVs instead.
+        """
+
+        option_legs = [leg for leg in legs if leg[0] != 'stock']
+        stock_qty = sum(leg[2] for leg in legs if leg[0] == 'stock')
+
+        strikes = np.array([leg[1] for leg in option_legs], dtype=np.float64)
+        codes = np.array([CALL if leg[0] == 'call' else PUT for leg in option_legs], dtype=np.int8)
+        qty = np.array([leg[2] for leg in option_legs], dtype=np.float64)
+        ivs = np.full(len(option_legs), self.default_iv)
+        market = np.full(len(option_legs), np.nan)
+        spreads = np.full(len(option_legs), np.nan)
+        open_interest = np.full(len(option_legs), np.nan)
+        symbols = [None] * len(option_legs)
+        expiration_date = None
+
+        if chain is not None and len(chain):
+            expiry = chain.columns['expiry'][0]
+            expiration_date = str(expiry)
+            for i, code in enumerate(codes):
+                row = chain.nearest_strike(expiry, int(code), strikes[i])
+                if row is None:
+                    continue
+                strikes[i] = chain.columns['strike'][row]
+                symbols[i] = str(chain.symbols[row])
+                iv = chain.columns['iv'][row]
+                if np.isfinite(iv) and iv > 0:
+                    ivs[i] = iv
+                bid, ask = chain.columns['bid'][row], chain.columns['ask'][row]
+                market[i] = (bid + ask) / 2.0
+                if market[i] > 0:
+                    spreads[i] = (ask - bid) / market[i]
+                open_interest[i] = chain.columns['open_interest'][row]
+
+        if surface is not None and len(option_legs):
+            ivs = surface.iv(strikes, days_to_expiration)
+
+        priced = black_scholes(
+            stock_price,
+            strikes,
+            days_to_expiration / DAYS_PER_YEAR,
+            ivs,
+            self.risk_free_rate,
+            codes
+        )
+        premiums = np.where(np.isfinite(market) & (market > 0), market, priced['price'])
+
+        # Net premium per share: positive is a debit, negative a credit
+        net_premium = float(np.dot(qty, premiums))
+
+        # Expiration payoff is piecewise linear, so extremes sit at 0, the strikes
+        # or the slope beyond the highest strike.
+        grid = np.concatenate(([0.0], strikes, [stock_price]))
+        pnl = payoff(grid, strikes, codes, qty, stock_qty, stock_price, net_premium)
+        upper_slope = float(qty[codes == CALL].sum()) + stock_qty
+
+        max_profit = float('inf') if upper_slope > 0 else float(pnl.max()) * 100
+        max_loss = float('-inf') if upper_slope < 0 else float(pnl.min()) * 100
+
+        greeks = {
+            name: float(np.dot(qty, priced[name])) * 100
+            for name in ('delta', 'gamma', 'theta', 'vega', 'rho')
+        }
+        greeks['delta'] += stock_qty * 100
+
+        return {
+            'max_profit': max_profit,
+            'max_loss': max_loss,
+            'net_premium': net_premium,
+            'greeks': greeks,
+            'strikes': [float(k) for k in strikes],
+            'expiration_date': expiration_date,
+            'legs': [
+                {
+                    'type': leg[0],
+                    'strike': round(float(strike), 2),
+                    'quantity': leg[2],
+                    'premium': round(float(premium), 4),
+                    'iv': round(float(iv), 4),
+                    'symbol': symbol,
+                    'spread': None if np.isnan(spread) else float(spread),
+                    'open_interest': None if np.isnan(oi) else float(oi)
+                }
+                for leg, strike, premium, iv, symbol, spread, oi in zip(
+                    option_legs, strikes, premiums, ivs, symbols, spreads, open_interest
+                )
+            ] + [
+                {'type': 'stock', 'strike': round(float(leg[1]), 2), 'quantity': leg[2], 'premium': None}
+                for leg in legs if leg[0] == 'stock'
+            ]
         }
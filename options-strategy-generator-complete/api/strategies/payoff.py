@@ -0,0 +1,152 @@
+"""
+Expiration payoff and theoretical P&L over a grid of underlying prices and dates
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from .portfolio import Position
+from .pricing import DAYS_PER_YEAR, black_scholes_price
+
+DEFAULT_PRICE_RANGE = 0.25      # Grid spans spot -/+ 25%
+DEFAULT_POINTS = 200
+# Legs x prices x dates evaluated in one broadcast; bounds the temporaries to ~16 MB each
+MAX_CELLS = 2_000_000
+
+
+def price_grid(
+    spot: float,
+    strikes: Sequence[float],
+    price_range: float = DEFAULT_PRICE_RANGE,
+    points: int = DEFAULT_POINTS
+) -> np.ndarray:
+    """
+    Evenly spaced underlying prices around spot, plus spot and every strike
+    in range, so the kinks of the expiration payoff fall exactly on the grid
+    """
+    lo = max(spot * (1.0 - price_range), 0.01)
+    hi = spot * (1.0 + price_range)
+    extra = np.asarray([spot, *strikes], dtype=np.float64)
+    return np.union1d(np.linspace(lo, hi, points), extra[(extra > lo) & (extra < hi)])
+
+
+def date_offsets(days: float, steps: Optional[int] = None) -> np.ndarray:
+    """
+    Days from today for the T+n curves: every calendar day until expiration,
+    or `steps` of them spread evenly (always including today)
+    """
+    count = int(np.ceil(days))
+    if count <= 0:
+        return np.empty(0)
+    if steps is None or steps >= count:
+        return np.arange(count, dtype=np.float64)
+    return np.unique(np.round(np.linspace(0, count - 1, max(steps, 1))))
+
+
+def downsample(prices: np.ndarray, width: int, keep: Sequence[float] = ()) -> np.ndarray:
+    """
+    Indices of about `width` evenly spaced grid points, plus the points at
+    `keep` prices (strikes and spot).
+
+    The expiration payoff is linear between strikes and the T+n curves are
+    smooth, so a polyline through one point per pixel column draws the same
+    chart as the full grid.
+    """
+    if len(prices) <= width:
+        return np.arange(len(prices))
+    even = np.round(np.linspace(0, len(prices) - 1, max(width, 2))).astype(np.intp)
+    kept = np.searchsorted(prices, np.asarray(keep, dtype=np.float64))
+    return np.union1d(even, kept[kept < len(prices)])
+
+
+def breakevens(prices: np.ndarray, pnl: np.ndarray) -> np.ndarray:
+    """Prices where a P&L curve crosses zero, interpolated between grid points"""
+    sign = np.sign(pnl)
+    crossing = np.flatnonzero(sign[:-1] * sign[1:] < 0)
+    exact = prices[sign == 0]
+    x0, x1 = prices[crossing], prices[crossing + 1]
+    y0, y1 = pnl[crossing], pnl[crossing + 1]
+    return np.union1d(x0 - y0 * (x1 - x0) / (y1 - y0), exact)
+
+
+def payoff_grid(
+    position: Position,
+    spot: float,
+    prices: np.ndarray,
+    offsets: np.ndarray,
+    rate: float = 0.05
+) -> np.ndarray:
+    """
+    Position P&L in dollars with shape (len(offsets) + 1, len(prices)).
+
+    Row i is the Black-Scholes value `offsets[i]` days from today, with each
+    leg's IV held constant; the last row is the payoff at expiration. All
+    legs, prices and dates are priced in a single broadcast and summed over
+    legs with one tensordot.
+    """
+    days = position.days_remaining(date.today())
+    remaining = np.append(np.maximum(days - offsets, 0.0), 0.0) / DAYS_PER_YEAR
+    value = np.zeros((len(remaining), len(prices)))
+
+    if position.legs:
+        codes, strikes, quantities, ivs = (np.array(col, dtype=np.float64) for col in zip(*position.legs))
+        cells = len(codes) * value.size
+        if cells > MAX_CELLS:
+            raise ValueError(f"Grid of {cells} leg-price-date cells exceeds {MAX_CELLS}")
+        # (legs, dates, prices)
+        legs = black_scholes_price(
+            prices[None, None, :],
+            strikes[:, None, None],
+            remaining[None, :, None],
+            ivs[:, None, None],
+            rate,
+            codes[:, None, None]
+        )
+        value += np.tensordot(quantities, legs, axes=1)
+
+    value += position.stock_quantity * (prices - position.entry_price)
+    return (value * 100.0 - position.net_premium) * position.quantity
+
+
+def strategy_payoff(
+    strategy: Dict[str, Any],
+    spot: float,
+    quantity: float = 1.0,
+    price_range: float = DEFAULT_PRICE_RANGE,
+    points: int = DEFAULT_POINTS,
+    dates: Optional[int] = None,
+    width: Optional[int] = None,
+    rate: float = 0.05
+) -> Dict[str, Any]:
+    """
+    Payoff diagram data for a scanned strategy: the price grid, one T+n P&L
+    curve per date and the expiration payoff with its breakevens.
+
+    Curves are computed on the full grid; `width` only thins the points
+    returned, keeping strikes and spot. Extremes are taken over the grid, so
+    they are estimates for unbounded payoffs.
+    """
+    position = Position.from_strategy(strategy, quantity)
+    strikes = [leg[1] for leg in position.legs]
+    prices = price_grid(spot, strikes, price_range, points)
+    today = date.today()
+    offsets = date_offsets(position.days_remaining(today), dates)
+
+    pnl = payoff_grid(position, spot, prices, offsets, rate)
+    expiration = pnl[-1]
+    shown = downsample(prices, width, [spot, *strikes]) if width else slice(None)
+
+    return {
+        'prices': prices[shown],
+        'dates': [(today + timedelta(days=int(n))).isoformat() for n in offsets],
+        'days_to_expiry': position.days_remaining(today) - offsets,
+        'pnl': np.round(pnl[:-1, shown], 2),
+        'expiration_pnl': np.round(expiration[shown], 2),
+        'breakevens': np.round(breakevens(prices, expiration), 2),
+        'max_profit': float(expiration.max()),
+        'max_loss': float(expiration.min()),
+        'grid_points': len(prices),
+        'expiration_date': position.expiration_date,
+    }
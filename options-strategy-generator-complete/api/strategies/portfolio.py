@@ -0,0 +1,262 @@
+"""
+Portfolio-level Greeks, scenario P&L and margin, recomputed per position only when it changes
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .pricing import CALL, PUT, DAYS_PER_YEAR, black_scholes, black_scholes_price
+
+GREEKS = ('delta', 'gamma', 'theta', 'vega', 'rho')
+
+DEFAULT_SPOT_SHOCKS = (-0.20, -0.10, -0.05, -0.02, 0.0, 0.02, 0.05, 0.10, 0.20)
+DEFAULT_VOL_SHOCKS = (-0.10, -0.05, 0.0, 0.05, 0.10)  # Absolute IV points
+
+
+def _get(strategy: Dict[str, Any], snake: str, camel: str, default: Any = None) -> Any:
+    """Read a field from either an engine strategy dict or its camelCase API form"""
+    if snake in strategy:
+        return strategy[snake]
+    return strategy.get(camel, default)
+
+
+@dataclass(frozen=True)
+class Position:
+    """One held strategy; dollar amounts are for the whole position"""
+    id: str
+    ticker: str
+    legs: Tuple[Tuple[int, float, float, float], ...]  # (type code, strike, quantity, iv)
+    stock_quantity: float           # Lots of 100 shares
+    entry_price: float              # Underlying price the stock legs were bought at
+    net_premium: float              # Dollars per position at entry, positive is a debit
+    capital: float                  # Dollars per position
+    expiration_date: Optional[str]
+    expiration_days: float
+    quantity: float = 1.0
+
+    @classmethod
+    def from_strategy(
+        cls,
+        strategy: Dict[str, Any],
+        quantity: float = 1.0,
+        default_iv: float = 0.30
+    ) -> 'Position':
+        """Build a position from a strategy dict produced by OptionsStrategyEngine"""
+        legs = []
+        stock_quantity = 0.0
+        entry_price = float(_get(strategy, 'current_price', 'currentPrice', 0.0) or 0.0)
+        for leg in strategy.get('legs') or []:
+            if leg['type'] == 'stock':
+                stock_quantity += leg['quantity']
+                entry_price = float(leg.get('strike') or entry_price)
+                continue
+            iv = leg.get('iv')
+            legs.append((
+                CALL if leg['type'] == 'call' else PUT,
+                float(leg['strike']),
+                float(leg['quantity']),
+                float(iv) if iv else default_iv,
+            ))
+        if not legs and not stock_quantity:
+            raise ValueError(f"Strategy {strategy.get('id', '')!r} has no legs")
+
+        return cls(
+            id=str(strategy.get('id', '')),
+            ticker=str(strategy.get('ticker', '')).upper(),
+            legs=tuple(legs),
+            stock_quantity=float(stock_quantity),
+            entry_price=entry_price,
+            net_premium=float(_get(strategy, 'net_premium', 'netPremium', 0.0) or 0.0),
+            capital=float(_get(strategy, 'capital_required', 'capitalRequired', 0.0) or 0.0),
+            expiration_date=_get(strategy, 'expiration_date', 'expirationDate'),
+            expiration_days=float(_get(strategy, 'expiration_days', 'expirationDays', 0.0) or 0.0),
+            quantity=float(quantity),
+        )
+
+    def days_remaining(self, as_of: date) -> float:
+        if self.expiration_date:
+            return max((date.fromisoformat(str(self.expiration_date)[:10]) - as_of).days, 0)
+        return self.expiration_days
+
+
+@dataclass
+class RiskConfig:
+    spot_shocks: Sequence[float] = DEFAULT_SPOT_SHOCKS    # Relative underlying moves
+    vol_shocks: Sequence[float] = DEFAULT_VOL_SHOCKS      # Absolute IV changes
+    rate: float = 0.05
+    cache_size: int = 20000         # Position contributions kept for reuse
+
+
+class PortfolioRiskEngine:
+    """
+    Aggregates Greeks, a spot x vol scenario grid and margin across positions.
+
+    Each position's contribution depends only on the position, its
+    underlying's spot, the valuation date and the shock grid, and is cached
+    on exactly that key. Repeated evaluations of a mostly unchanged book
+    therefore only reprice positions that were added or edited, or whose
+    underlying moved.
+    """
+
+    def __init__(self, config: Optional[RiskConfig] = None):
+        self.config = config or RiskConfig()
+        self._contributions: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self.computed = 0
+        self.reused = 0
+
+    def _contribution(
+        self,
+        position: Position,
+        spot: float,
+        as_of: date,
+        shocks: Tuple[Tuple[float, ...], Tuple[float, ...]]
+    ) -> Tuple[Dict[str, Any], bool]:
+        key = (position, spot, as_of, shocks, self.config.rate)
+        cached = self._contributions.get(key)
+        if cached is not None:
+            self._contributions.move_to_end(key)
+            self.reused += 1
+            return cached, False
+
+        contribution = self._compute(position, spot, as_of, *shocks)
+        self._contributions[key] = contribution
+        while len(self._contributions) > self.config.cache_size:
+            self._contributions.popitem(last=False)
+        self.computed += 1
+        return contribution, True
+
+    def _compute(
+        self,
+        position: Position,
+        spot: float,
+        as_of: date,
+        spot_shocks: Sequence[float],
+        vol_shocks: Sequence[float]
+    ) -> Dict[str, Any]:
+        """Greeks, value and scenario grid for one position, vectorized over legs and shocks"""
+        config = self.config
+        scale = 100.0 * position.quantity
+        years = position.days_remaining(as_of) / DAYS_PER_YEAR
+
+        if position.legs:
+            codes, strikes, quantities, ivs = (np.array(col, dtype=np.float64) for col in zip(*position.legs))
+        else:
+            codes = strikes = quantities = ivs = np.empty(0)
+
+        priced = black_scholes(spot, strikes, years, ivs, config.rate, codes)
+        greeks = {name: float(priced[name] @ quantities) * scale for name in GREEKS}
+        greeks['delta'] += position.stock_quantity * scale
+        value = float(priced['price'] @ quantities) + position.stock_quantity * (spot - position.entry_price)
+
+        spots = spot * (1.0 + np.asarray(spot_shocks, dtype=np.float64))
+        vols = np.maximum(ivs[None, :] + np.asarray(vol_shocks, dtype=np.float64)[:, None], 0.01)
+        shocked = black_scholes_price(
+            spots[:, None, None], strikes, years, vols[None, :, :], config.rate, codes
+        ) @ quantities
+        shocked = shocked + position.stock_quantity * (spots - position.entry_price)[:, None]
+
+        return {
+            'greeks': greeks,
+            'value': value * scale,
+            'pnl': value * scale - position.net_premium * position.quantity,
+            'scenarios': (shocked - value) * scale,
+            'margin': position.capital * abs(position.quantity),
+        }
+
+    def evaluate(
+        self,
+        positions: Iterable[Position],
+        spots: Dict[str, float],
+        as_of: Optional[date] = None,
+        spot_shocks: Optional[Sequence[float]] = None,
+        vol_shocks: Optional[Sequence[float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Net Greeks, scenario P&L and margin for the book, in total and per underlying.
+
+        Scenario grids are the change in position value for each
+        (spot shock, vol shock) pair, applied to every underlying at once.
+        """
+        as_of = as_of or date.today()
+        shocks = (
+            tuple(self.config.spot_shocks if spot_shocks is None else spot_shocks),
+            tuple(self.config.vol_shocks if vol_shocks is None else vol_shocks),
+        )
+        shape = (len(shocks[0]), len(shocks[1]))
+        by_ticker: Dict[str, Dict[str, Any]] = {}
+        details = []
+        computed = reused = 0
+
+        for position in positions:
+            spot = spots.get(position.ticker)
+            if spot is None:
+                raise ValueError(f"No spot price for {position.ticker}")
+            contribution, fresh = self._contribution(position, float(spot), as_of, shocks)
+            computed += fresh
+            reused += not fresh
+
+            group = by_ticker.setdefault(position.ticker, {
+                'spot': float(spot),
+                'positions': 0,
+                'greeks': dict.fromkeys(GREEKS, 0.0),
+                'value': 0.0,
+                'pnl': 0.0,
+                'scenarios': np.zeros(shape),
+                'strategy_margin': 0.0,
+            })
+            group['positions'] += 1
+            for name in GREEKS:
+                group['greeks'][name] += contribution['greeks'][name]
+            group['value'] += contribution['value']
+            group['pnl'] += contribution['pnl']
+            group['scenarios'] += contribution['scenarios']
+            group['strategy_margin'] += contribution['margin']
+            details.append({'id': position.id, 'ticker': position.ticker, **{
+                key: contribution[key] for key in ('greeks', 'value', 'pnl', 'margin')
+            }})
+
+        total_scenarios = np.zeros(shape)
+        totals = dict.fromkeys(GREEKS, 0.0)
+        dollar_delta = 0.0
+        for group in by_ticker.values():
+            total_scenarios += group['scenarios']
+            for name in GREEKS:
+                totals[name] += group['greeks'][name]
+            group['greeks']['dollar_delta'] = group['greeks']['delta'] * group['spot']
+            dollar_delta += group['greeks']['dollar_delta']
+            # Risk-based margin: the worst scenario loss for this underlying alone
+            group['scenario_margin'] = max(0.0, -float(group['scenarios'].min()))
+            group['scenarios'] = group['scenarios'].tolist()
+        totals['dollar_delta'] = dollar_delta
+
+        return {
+            'greeks': totals,
+            'value': sum(g['value'] for g in by_ticker.values()),
+            'pnl': sum(g['pnl'] for g in by_ticker.values()),
+            'scenarios': {
+                'spot_shocks': list(shocks[0]),
+                'vol_shocks': list(shocks[1]),
+                'pnl': total_scenarios.tolist(),
+            },
+            'margin': {
+                'strategy': sum(g['strategy_margin'] for g in by_ticker.values()),
+                'scenario': max(0.0, -float(total_scenarios.min())),
+                # Offsets between underlyings are not credited
+                'scenario_by_underlying': sum(g['scenario_margin'] for g in by_ticker.values()),
+            },
+            'by_underlying': by_ticker,
+            'positions': details,
+            'recomputed': computed,
+            'reused': reused,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'cached': len(self._contributions),
+            'computed': self.computed,
+            'reused': self.reused,
+        }
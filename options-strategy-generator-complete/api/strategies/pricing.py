@@ -0,0 +1,152 @@
+"""
+Vectorized Black-Scholes pricing and Greeks for whole option chains
+"""
+
+import numpy as np
+from typing import Dict, Union
+
+ArrayLike = Union[float, np.ndarray]
+
+# Option type codes used throughout the pricing code
+CALL = 1
+PUT = -1
+
+DAYS_PER_YEAR = 365.0
+
+# Abramowitz & Stegun 7.1.26 coefficients (max abs error ~1.5e-7)
+_ERF_P = 0.3275911
+_ERF_A = (0.254829592, -0.284496736, 1.421413741, -1.453152027, 1.061405429)
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal density"""
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal CDF without a scipy dependency"""
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + _ERF_P * z)
+    a1, a2, a3, a4, a5 = _ERF_A
+    poly = t * (a1 + t * (a2 + t * (a3 + t * (a4 + t * a5))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+def option_type_codes(option_types) -> np.ndarray:
+    """Convert 'call'/'put' (or C/P, 1/-1) values to +1/-1 codes"""
+    arr = np.asarray(option_types)
+    if arr.dtype.kind in 'iuf':
+        return np.where(arr >= 0, CALL, PUT).astype(np.int8)
+    first = np.char.lower(arr.astype(str).astype('U1'))
+    return np.where(first == 'p', PUT, CALL).astype(np.int8)
+
+
+def black_scholes(
+    spot: ArrayLike,
+    strikes: ArrayLike,
+    expiries: ArrayLike,
+    ivs: ArrayLike,
+    rates: ArrayLike = 0.05,
+    option_types: ArrayLike = CALL,
+    dividend_yield: ArrayLike = 0.0
+) -> Dict[str, np.ndarray]:
+    """
+    Price and compute Greeks for a batch of European options in one call.
+
+    All inputs broadcast against each other. ``expiries`` are in years,
+    ``option_types`` are +1 for calls and -1 for puts. Theta is per calendar
+    day, vega and rho are per 1 percentage point move.
+    """
+    s = np.asarray(spot, dtype=np.float64)
+    k = np.asarray(strikes, dtype=np.float64)
+    t = np.maximum(np.asarray(expiries, dtype=np.float64), 0.0)
+    sigma = np.maximum(np.asarray(ivs, dtype=np.float64), 1e-8)
+    r = np.asarray(rates, dtype=np.float64)
+    q = np.asarray(dividend_yield, dtype=np.float64)
+    w = option_type_codes(option_types).astype(np.float64)
+
+    s, k, t, sigma, r, q, w = np.broadcast_arrays(s, k, t, sigma, r, q, w)
+
+    expired = t <= 0.0
+    t_safe = np.where(expired, 1.0, t)
+    sqrt_t = np.sqrt(t_safe)
+    vol_sqrt_t = sigma * sqrt_t
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(s / k) + (r - q + 0.5 * sigma * sigma) * t_safe) / vol_sqrt_t
+    d2 = d1 - vol_sqrt_t
+
+    disc_r = np.exp(-r * t_safe)
+    disc_q = np.exp(-q * t_safe)
+    nd1 = norm_cdf(w * d1)
+    nd2 = norm_cdf(w * d2)
+    pdf_d1 = norm_pdf(d1)
+
+    price = w * (s * disc_q * nd1 - k * disc_r * nd2)
+    delta = w * disc_q * nd1
+    gamma = disc_q * pdf_d1 / (s * vol_sqrt_t)
+    vega = s * disc_q * pdf_d1 * sqrt_t / 100.0
+    theta = (
+        -s * disc_q * pdf_d1 * sigma / (2.0 * sqrt_t)
+        - w * r * k * disc_r * nd2
+        + w * q * s * disc_q * nd1
+    ) / DAYS_PER_YEAR
+    rho = w * k * t_safe * disc_r * nd2 / 100.0
+
+    if expired.any():
+        intrinsic = np.maximum(w * (s - k), 0.0)
+        zero = np.zeros_like(price)
+        price = np.where(expired, intrinsic, price)
+        delta = np.where(expired, np.where(intrinsic > 0, w, 0.0), delta)
+        gamma = np.where(expired, zero, gamma)
+        vega = np.where(expired, zero, vega)
+        theta = np.where(expired, zero, theta)
+        rho = np.where(expired, zero, rho)
+
+    return {
+        'price': price,
+        'delta': delta,
+        'gamma': gamma,
+        'theta': theta,
+        'vega': vega,
+        'rho': rho,
+    }
+
+
+def black_scholes_price(
+    spot: ArrayLike,
+    strikes: ArrayLike,
+    expiries: ArrayLike,
+    ivs: ArrayLike,
+    rates: ArrayLike = 0.05,
+    option_types: ArrayLike = CALL
+) -> np.ndarray:
+    """
+    Black-Scholes price only, for bulk revaluation where Greeks are not needed.
+
+    Same conventions as black_scholes(); expired options are worth intrinsic.
+    """
+    s = np.asarray(spot, dtype=np.float64)
+    k = np.asarray(strikes, dtype=np.float64)
+    t = np.maximum(np.asarray(expiries, dtype=np.float64), 0.0)
+    sigma = np.maximum(np.asarray(ivs, dtype=np.float64), 1e-8)
+    r = np.asarray(rates, dtype=np.float64)
+    w = option_type_codes(option_types).astype(np.float64)
+
+    expired = t <= 0.0
+    t_safe = np.where(expired, 1.0, t)
+    vol_sqrt_t = sigma * np.sqrt(t_safe)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(s / k) + (r + 0.5 * sigma * sigma) * t_safe) / vol_sqrt_t
+    d2 = d1 - vol_sqrt_t
+
+    price = w * (s * norm_cdf(w * d1) - k * np.exp(-r * t_safe) * norm_cdf(w * d2))
+    return np.where(expired, np.maximum(w * (s - k), 0.0), price)
+
+
+def intrinsic_value(prices: ArrayLike, strikes: ArrayLike, option_types: ArrayLike) -> np.ndarray:
+    """Expiration value of options for the given underlying prices"""
+    w = option_type_codes(option_types).astype(np.float64)
+    return np.maximum(w * (np.asarray(prices, dtype=np.float64) - np.asarray(strikes, dtype=np.float64)), 0.0)
@@ -0,0 +1,208 @@
+"""
+Strategy definition registry, built once at import time
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .pricing import intrinsic_value
+
+
+class Leg:
+    """One leg of a template: strike is spot + offset, quantity > 0 is long"""
+
+    __slots__ = ('type', 'offset', 'quantity')
+
+    def __init__(self, type: str, offset: float, quantity: int):
+        self.type = type
+        self.offset = offset
+        self.quantity = quantity
+
+    def __repr__(self) -> str:
+        return f"Leg({self.type!r}, {self.offset:+g}, {self.quantity:+d})"
+
+
+def linear_payoff(
+    prices: np.ndarray,
+    strikes: np.ndarray,
+    codes: np.ndarray,
+    quantities: np.ndarray,
+    stock_quantity: float,
+    entry_price: float,
+    net_premium: float
+) -> np.ndarray:
+    """Expiration P&L per share at each price: sum of leg payoffs minus net premium"""
+    prices = np.asarray(prices, dtype=np.float64)
+    return (
+        intrinsic_value(prices[:, None], strikes[None, :], codes[None, :]) @ quantities
+        + stock_quantity * (prices - entry_price)
+        - net_premium
+    )
+
+
+# Capital rules take the leg metrics (net_premium per share, strikes, max_loss
+# in dollars) and the spot price, and return dollars per position.
+
+def capital_max_loss(metrics: Dict[str, Any], spot: float) -> float:
+    """Defined-risk structures tie up their maximum loss"""
+    return abs(metrics['max_loss'])
+
+
+def capital_net_debit(metrics: Dict[str, Any], spot: float) -> float:
+    """Debit structures cost their premium"""
+    return metrics['net_premium'] * 100
+
+
+def capital_cash_secured(metrics: Dict[str, Any], spot: float) -> float:
+    """Cash to buy the shares at the short strike, less the credit received"""
+    return (metrics['strikes'][0] + metrics['net_premium']) * 100
+
+
+def capital_covered_stock(metrics: Dict[str, Any], spot: float) -> float:
+    """Cost of 100 shares, less the credit received"""
+    return (spot + metrics['net_premium']) * 100
+
+
+def capital_naked_margin(metrics: Dict[str, Any], spot: float) -> float:
+    """Simplified margin requirement for undefined-risk short premium"""
+    return spot * 0.20 * 100
+
+
+class StrategyDefinition:
+    """
+    Everything the engine needs to build, price and describe one strategy.
+
+    ``structure`` names the SpreadSearch builder used when a chain is loaded
+    (None keeps the fixed offsets). ``description`` is a format string
+    rendered with the traded strikes in leg order and ``cash`` (capital),
+    only for strategies that are returned.
+    """
+
+    __slots__ = (
+        'name', 'type', 'complexity', 'legs', 'capital_rule',
+        'description', 'structure', 'payoff', 'slug'
+    )
+
+    def __init__(
+        self,
+        name: str,
+        type: str,
+        complexity: str,
+        legs: Sequence[Leg],
+        capital_rule: Callable[[Dict[str, Any], float], float],
+        description: str,
+        structure: Optional[str] = None,
+        payoff: Callable[..., np.ndarray] = linear_payoff
+    ):
+        self.name = name
+        self.type = type
+        self.complexity = complexity
+        self.legs = tuple(legs)
+        self.capital_rule = capital_rule
+        self.description = description
+        self.structure = structure
+        self.payoff = payoff
+        self.slug = name.replace(' ', '_').lower()
+
+    def build_legs(self, spot: float) -> List[Tuple[str, float, int]]:
+        """Concrete (type, strike, quantity) legs around the spot price"""
+        return [(leg.type, spot + leg.offset, leg.quantity) for leg in self.legs]
+
+    def describe(self, strikes: Sequence[float], capital: float) -> str:
+        return self.description.format(*strikes, cash=capital)
+
+    def __repr__(self) -> str:
+        return f"StrategyDefinition({self.name!r})"
+
+
+STRATEGY_REGISTRY: Dict[str, StrategyDefinition] = {}
+_registry_version = 0
+
+
+def register_strategy(definition: StrategyDefinition, replace: bool = False) -> StrategyDefinition:
+    """Add a strategy to the registry; the engine picks it up on its next scan"""
+    if definition.name in STRATEGY_REGISTRY and not replace:
+        raise ValueError(f"Strategy '{definition.name}' is already registered")
+    global _registry_version
+    STRATEGY_REGISTRY[definition.name] = definition
+    _registry_version += 1
+    return definition
+
+
+def unregister_strategy(name: str):
+    global _registry_version
+    if STRATEGY_REGISTRY.pop(name, None) is not None:
+        _registry_version += 1
+
+
+def registry_version() -> int:
+    """Changes whenever a strategy is registered or removed"""
+    return _registry_version
+
+
+def get_strategy(name: str) -> Optional[StrategyDefinition]:
+    return STRATEGY_REGISTRY.get(name)
+
+
+def all_strategies() -> List[StrategyDefinition]:
+    return list(STRATEGY_REGISTRY.values())
+
+
+for _definition in (
+    StrategyDefinition(
+        'Bull Put Spread', 'bullish', 'intermediate',
+        [Leg('put', -5, -1), Leg('put', -10, 1)],
+        capital_max_loss,
+        "Sell 1 put(s) at ${0:.2f}, buy 1 put(s) at ${1:.2f}",
+        structure='put_credit_vertical'
+    ),
+    StrategyDefinition(
+        'Iron Condor', 'neutral', 'advanced',
+        [Leg('put', -10, 1), Leg('put', -5, -1), Leg('call', 5, -1), Leg('call', 10, 1)],
+        capital_max_loss,
+        "Iron Condor with profit zone between ${1:.2f} and ${2:.2f}",
+        structure='iron_condor'
+    ),
+    StrategyDefinition(
+        'Cash Secured Put', 'bullish', 'beginner',
+        [Leg('put', -5, -1)],
+        capital_cash_secured,
+        "Sell 1 put(s) at ${0:.2f} strike, secure with ${cash:,.0f} cash"
+    ),
+    StrategyDefinition(
+        'Covered Call', 'bullish', 'beginner',
+        [Leg('call', 5, -1), Leg('stock', 0, 1)],
+        capital_covered_stock,
+        "Own 100 shares, sell 1 call at ${0:.2f} strike"
+    ),
+    StrategyDefinition(
+        'Bull Call Spread', 'bullish', 'intermediate',
+        [Leg('call', 0, 1), Leg('call', 5, -1)],
+        capital_net_debit,
+        "Buy 1 call(s) at ${0:.2f}, sell 1 call(s) at ${1:.2f}",
+        structure='call_debit_vertical'
+    ),
+    StrategyDefinition(
+        'Bear Put Spread', 'bearish', 'intermediate',
+        [Leg('put', 0, 1), Leg('put', -5, -1)],
+        capital_net_debit,
+        "Buy 1 put(s) at ${0:.2f}, sell 1 put(s) at ${1:.2f}",
+        structure='put_debit_vertical'
+    ),
+    StrategyDefinition(
+        'Long Straddle', 'volatility', 'intermediate',
+        [Leg('call', 0, 1), Leg('put', 0, 1)],
+        capital_net_debit,
+        "Buy 1 call and 1 put both at ${0:.2f} strike",
+        structure='long_straddle'
+    ),
+    StrategyDefinition(
+        'Short Strangle', 'neutral', 'advanced',
+        [Leg('call', 10, -1), Leg('put', -10, -1)],
+        capital_naked_margin,
+        "Sell 1 call at ${0:.2f} and 1 put at ${1:.2f}",
+        structure='short_strangle'
+    ),
+):
+    register_strategy(_definition)
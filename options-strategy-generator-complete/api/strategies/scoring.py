@@ -0,0 +1,138 @@
+"""
+Deterministic, vectorized confidence scoring for candidate strategies
+"""
+
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Base component weights before the risk-profile tilt
+BASE_WEIGHTS = {
+    'pop': 0.35,
+    'risk_reward': 0.25,
+    'iv': 0.15,
+    'liquidity': 0.15,
+    'edge': 0.10,
+}
+
+# Components that reward taking more risk, and those that reward safety
+RISK_SEEKING = ('risk_reward', 'edge')
+RISK_AVERSE = ('pop', 'liquidity')
+
+NEUTRAL = 0.5
+
+# Reward/risk ratios above this (e.g. unlimited-profit estimates) score the same
+MAX_REWARD_RISK = 3.0
+
+
+def profile_weights(risk_multiplier: float) -> Dict[str, float]:
+    """
+    Normalized component weights for a risk profile multiplier.
+
+    Multipliers above 1 shift weight from POP and liquidity towards
+    risk/reward and edge, below 1 the other way round.
+    """
+    weights = dict(BASE_WEIGHTS)
+    for name in RISK_SEEKING:
+        weights[name] *= risk_multiplier
+    for name in RISK_AVERSE:
+        weights[name] /= risk_multiplier
+    total = sum(weights.values())
+    return {name: w / total for name, w in weights.items()}
+
+
+def realized_volatility(high: Optional[float], low: Optional[float]) -> Optional[float]:
+    """Annualized Parkinson volatility estimate from one day's high/low range"""
+    if not high or not low or high <= low:
+        return None
+    return math.log(high / low) / math.sqrt(4 * math.log(2)) * math.sqrt(252)
+
+
+def iv_rank(implied_vol: float, realized_vol: Optional[float]) -> float:
+    """
+    Where implied vol sits relative to realized, mapped to [0, 1].
+
+    Stands in for a 52-week IV rank until IV history is stored: IV at half of
+    realized maps to 0, IV at twice realized maps to 1.
+    """
+    if not realized_vol or implied_vol <= 0:
+        return NEUTRAL
+    ratio = math.log(implied_vol / realized_vol) / math.log(2)
+    return min(1.0, max(0.0, 0.5 + 0.5 * ratio))
+
+
+def liquidity_score(legs: List[Dict[str, Any]]) -> float:
+    """Score option legs by open interest and relative bid/ask spread"""
+    oi = [leg.get('open_interest') for leg in legs if leg['type'] != 'stock']
+    spreads = [leg.get('spread') for leg in legs if leg['type'] != 'stock']
+    oi = [x for x in oi if x is not None and math.isfinite(x)]
+    spreads = [x for x in spreads if x is not None and math.isfinite(x)]
+    if not oi and not spreads:
+        return NEUTRAL
+
+    # 1,000 contracts of open interest on the thinnest leg scores ~0.75
+    oi_score = 1.0 - 1.0 / (1.0 + min(oi) / 333.0) if oi else NEUTRAL
+    # A 10% spread on the widest leg scores 0.5
+    spread_score = 1.0 / (1.0 + max(spreads) / 0.10) if spreads else NEUTRAL
+    return math.sqrt(oi_score * spread_score)
+
+
+def build_components(strategies: List[Dict[str, Any]], rank: float) -> Dict[str, np.ndarray]:
+    """Gather scoring inputs from strategy dicts into aligned arrays"""
+    n = len(strategies)
+    pop = np.empty(n)
+    reward = np.empty(n)
+    risk = np.empty(n)
+    credit = np.empty(n, dtype=bool)
+    liquidity = np.empty(n)
+    expected_value = np.empty(n)
+    cvar = np.empty(n)
+
+    for i, s in enumerate(strategies):
+        pop[i] = s['probability_of_profit']
+        reward[i] = s['max_profit']
+        risk[i] = abs(s['max_loss'])
+        credit[i] = s['net_premium'] < 0
+        liquidity[i] = liquidity_score(s['legs'])
+        expected_value[i] = s['expected_value']
+        cvar[i] = s['cvar']
+
+    return {
+        'pop': pop,
+        'reward': reward,
+        'risk': risk,
+        'credit': credit,
+        'iv_rank': np.full(n, rank),
+        'liquidity': liquidity,
+        'expected_value': expected_value,
+        'cvar': cvar,
+    }
+
+
+def score(components: Dict[str, np.ndarray], risk_multiplier: float = 1.0) -> np.ndarray:
+    """
+    Confidence in [25, 95] for every strategy, from precomputed components.
+
+    Pure function of its inputs: identical components and multiplier always
+    give identical scores.
+    """
+    weights = profile_weights(risk_multiplier)
+
+    rr = np.minimum(components['reward'] / np.maximum(components['risk'], 1e-9), MAX_REWARD_RISK)
+    risk_reward = rr / (1.0 + rr)
+
+    # Selling premium favours rich IV, buying premium favours cheap IV
+    iv = np.where(components['credit'], components['iv_rank'], 1.0 - components['iv_rank'])
+
+    edge = components['expected_value'] / np.maximum(np.abs(components['cvar']), 1.0)
+    edge = 0.5 + 0.5 * np.clip(edge, -1.0, 1.0)
+
+    total = (
+        weights['pop'] * components['pop']
+        + weights['risk_reward'] * risk_reward
+        + weights['iv'] * iv
+        + weights['liquidity'] * components['liquidity']
+        + weights['edge'] * edge
+    )
+    return np.clip(total * 100, 25, 95)
@@ -0,0 +1,306 @@
+"""
+Background watchlist scans and the ranked index the screener answers from
+"""
+
+import asyncio
+import heapq
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from monitoring import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SCREENER_SCANS = REGISTRY.counter(
+    'screener_scans_total', 'Background watchlist scans by outcome', ('result',)
+)
+SCREENER_LAG = REGISTRY.histogram(
+    'screener_scan_lag_seconds', 'How long after its slot a background scan started'
+)
+SCREENER_REQUESTS = REGISTRY.counter(
+    'screener_upstream_requests_total', 'Upstream requests made by background watchlist scans'
+)
+
+# Fewest upstream requests a scan makes: the quote and one options chain page.
+# Paged chains cost more; scans are charged what they actually send
+REQUESTS_PER_SCAN = 2
+
+Row = Dict[str, Any]
+# (rank key, row); keys are unique, so entries sort without comparing rows
+Entry = Tuple[Tuple[float, str, str], Row]
+
+
+def _entry(row: Row) -> Entry:
+    """Highest confidence first, ties broken by ticker and id"""
+    return (-(row['confidence'] or 0.0), row['ticker'], row['id']), row
+
+
+class ScreenerIndex:
+    """
+    Latest scan results for every watchlist ticker, ranked by confidence.
+
+    Rows are StrategyResult dicts. They are held in one list per ticker, per
+    strategy type and overall, each sorted best first. A top-N query walks
+    the narrowest matching list, or a lazy merge of several, and stops after
+    N matches, so it never sorts at query time. Updates rebuild the lists
+    and swap them in whole, so a query never sees a half-applied update.
+    """
+
+    def __init__(self, max_age: Optional[float] = None):
+        self.max_age = max_age
+        self._by_ticker: Dict[str, List[Entry]] = {}
+        self._by_type: Dict[str, List[Entry]] = {}
+        self._all: List[Entry] = []
+        self._scanned_at: Dict[str, float] = {}
+        self.updates = 0
+
+    def update(self, ticker: str, rows: Iterable[Row], scanned_at: Optional[float] = None):
+        """Replace a ticker's rows with the results of a new scan"""
+        scanned_at = time.time() if scanned_at is None else scanned_at
+        stamp = datetime.fromtimestamp(scanned_at).isoformat()
+        entries = sorted(_entry({**row, 'scannedAt': stamp}) for row in rows)
+        self._scanned_at[ticker] = scanned_at
+        self._replace(ticker, entries)
+
+    def remove(self, ticker: str):
+        self._scanned_at.pop(ticker, None)
+        self._replace(ticker, [])
+
+    def _replace(self, ticker: str, entries: List[Entry]):
+        old = self._by_ticker.pop(ticker, [])
+        if entries:
+            self._by_ticker[ticker] = entries
+        self._all = self._merged(self._all, ticker, entries)
+        for kind in {row['type'] for _, row in old} | {row['type'] for _, row in entries}:
+            merged = self._merged(
+                self._by_type.get(kind, []), ticker, [e for e in entries if e[1]['type'] == kind]
+            )
+            if merged:
+                self._by_type[kind] = merged
+            else:
+                self._by_type.pop(kind, None)
+        self.updates += 1
+
+    @staticmethod
+    def _merged(current: List[Entry], ticker: str, entries: List[Entry]) -> List[Entry]:
+        # Timsort finds the two sorted runs, so this is close to a linear merge
+        return sorted([e for e in current if e[0][1] != ticker] + entries)
+
+    def _candidates(self, types: Optional[Sequence[str]], tickers: Optional[Sequence[str]]) -> Iterator[Entry]:
+        """Rows best first from the narrowest lists that cover the filters"""
+        if tickers:
+            lists = [self._by_ticker.get(t, []) for t in dict.fromkeys(tickers)]
+        elif types:
+            lists = [self._by_type.get(t, []) for t in dict.fromkeys(types)]
+        else:
+            return iter(self._all)
+        if len(lists) == 1:
+            return iter(lists[0])
+        return heapq.merge(*lists)
+
+    def query(
+        self,
+        types: Optional[Sequence[str]] = None,
+        tickers: Optional[Sequence[str]] = None,
+        complexity: Optional[Sequence[str]] = None,
+        max_capital: Optional[float] = None,
+        min_confidence: Optional[float] = None,
+        min_probability: Optional[float] = None,
+        limit: int = 50
+    ) -> List[Row]:
+        """Best `limit` rows matching every given filter, in rank order"""
+        types = set(types) if types else None
+        complexity = set(complexity) if complexity else None
+        oldest = time.time() - self.max_age if self.max_age else None
+        scanned_at = self._scanned_at
+
+        matches = []
+        for _, row in self._candidates(types, tickers):
+            if min_confidence is not None and (row['confidence'] or 0.0) < min_confidence:
+                break   # Every later row scores lower
+            if types is not None and row['type'] not in types:
+                continue
+            if complexity is not None and row['complexity'] not in complexity:
+                continue
+            if max_capital is not None and row['capitalRequired'] > max_capital:
+                continue
+            if min_probability is not None and (row['probabilityOfProfit'] or 0.0) < min_probability:
+                continue
+            if oldest is not None and scanned_at.get(row['ticker'], 0.0) < oldest:
+                continue
+            matches.append(row)
+            if len(matches) >= limit:
+                break
+        return matches
+
+    @property
+    def tickers(self) -> List[str]:
+        return sorted(self._scanned_at)
+
+    def oldest_scan(self) -> Optional[float]:
+        return min(self._scanned_at.values(), default=None)
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def stats(self) -> Dict[str, Any]:
+        oldest = self.oldest_scan()
+        return {
+            'rows': len(self._all),
+            'tickers': len(self._scanned_at),
+            'types': {kind: len(rows) for kind, rows in sorted(self._by_type.items())},
+            'updates': self.updates,
+            'oldest_scan': datetime.fromtimestamp(oldest).isoformat() if oldest else None,
+        }
+
+
+class WatchlistScheduler:
+    """
+    Calls `scan(ticker)` for every watchlist ticker once per interval, in
+    the background.
+
+    Scans are staggered evenly across the interval and each slot moves at
+    random within a `jitter` fraction of the spacing between slots, so
+    upstream requests arrive as a steady trickle rather than a burst every
+    interval. At most `concurrency` scans run at once; a slot that finds them
+    all busy waits.
+
+    Background scans get `rate_share` of the client's `rate_limit` (requests
+    per second). Each scan is charged the requests it actually sent, counted
+    by `count_requests` (REQUESTS_PER_SCAN if it is not given), and the next
+    scan waits until that budget has refilled. The interval is also
+    stretched up front if even REQUESTS_PER_SCAN per ticker would not fit.
+    """
+
+    def __init__(
+        self,
+        scan: Callable[[str], Awaitable[Any]],
+        tickers: Iterable[str],
+        interval: float = 300.0,
+        jitter: float = 0.5,
+        concurrency: int = 2,
+        rate_limit: Optional[float] = None,
+        rate_share: float = 0.5,
+        count_requests: Optional[Callable[[], ContextManager[Any]]] = None
+    ):
+        self.scan = scan
+        self.tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.interval = interval
+        self.count_requests = count_requests
+        # Upstream requests per second the background scans may use
+        self.budget = rate_limit * rate_share if rate_limit else None
+        if self.budget and self.tickers:
+            floor = len(self.tickers) * REQUESTS_PER_SCAN / self.budget
+            if floor > interval:
+                logger.warning(
+                    f"Watchlist of {len(self.tickers)} tickers needs {floor:.0f}s per pass within the "
+                    f"rate limit; stretching the scan interval from {interval:.0f}s"
+                )
+                self.interval = floor
+        self.passes = 0
+        self.running = 0
+        self.scans = 0
+        self.requests = 0
+        self.budget_waits = 0
+        # Loop time until which the budget is spent by earlier scans
+        self._budget_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._scans: set = set()
+
+    async def start(self):
+        if self._task is None and self.tickers:
+            self._task = asyncio.create_task(self._run(), name='watchlist-scheduler')
+
+    async def stop(self):
+        task, self._task = self._task, None
+        tasks = [t for t in (task, *self._scans) if t is not None]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _slot(self, base: float) -> float:
+        spacing = self.interval / len(self.tickers)
+        return base + random.uniform(-0.5, 0.5) * self.jitter * spacing
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.concurrency)
+        spacing = self.interval / len(self.tickers)
+        start = loop.time()
+        # (slot time, rotation position, pass number, ticker)
+        due = [(self._slot(start + i * spacing), i, 0, ticker) for i, ticker in enumerate(self.tickers)]
+        heapq.heapify(due)
+
+        while True:
+            at, i, scan_pass, ticker = due[0]
+            delay = at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            await slots.acquire()
+            wait = self._budget_until - loop.time()
+            if wait > 0:
+                # Earlier scans used up the budget; the slot is kept while it refills
+                self.budget_waits += 1
+                await asyncio.sleep(wait)
+            heapq.heappop(due)
+            now = loop.time()
+            SCREENER_LAG.observe(max(now - at, 0.0))
+            self.passes = max(self.passes, scan_pass + 1)
+
+            # The next pass keeps the ticker's place in the rotation; passes
+            # already missed while the scans were backed up are skipped
+            scan_pass += 1
+            while start + scan_pass * self.interval + i * spacing < now:
+                scan_pass += 1
+            heapq.heappush(due, (self._slot(start + scan_pass * self.interval + i * spacing), i, scan_pass, ticker))
+
+            task = asyncio.create_task(self._scan_one(ticker, slots))
+            self._scans.add(task)
+            task.add_done_callback(self._scans.discard)
+
+    async def _scan_one(self, ticker: str, slots: asyncio.Semaphore):
+        self.running += 1
+        tally = None
+        try:
+            if self.count_requests is None:
+                found = await self.scan(ticker)
+            else:
+                with self.count_requests() as tally:
+                    found = await self.scan(ticker)
+            SCREENER_SCANS.labels('ok' if found else 'empty').inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            SCREENER_SCANS.labels('failed').inc()
+            logger.error(f"Background scan for {ticker} failed: {e}")
+        finally:
+            self._charge(REQUESTS_PER_SCAN if tally is None else tally.requests)
+            self.running -= 1
+            slots.release()
+
+    def _charge(self, requests: int):
+        """Spend a finished scan's upstream requests from the background budget"""
+        self.scans += 1
+        self.requests += requests
+        SCREENER_REQUESTS.inc(requests)
+        if self.budget:
+            now = asyncio.get_running_loop().time()
+            self._budget_until = max(self._budget_until, now) + requests / self.budget
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tickers': len(self.tickers),
+            'interval': self.interval,
+            'concurrency': self.concurrency,
+            'running': self.running,
+            'passes': self.passes,
+            'requests_per_scan': self.requests / self.scans if self.scans else None,
+            'budget_waits': self.budget_waits,
+            'active': self._task is not None and not self._task.done(),
+        }
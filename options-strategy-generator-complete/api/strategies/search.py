@@ -0,0 +1,315 @@
+"""
+Combinatorial leg search over a loaded options chain with pruning and top-K selection
+"""
+
+import heapq
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .pricing import CALL, PUT, DAYS_PER_YEAR, black_scholes, norm_cdf
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SearchConfig:
+    top_k: int = 3                      # Candidates kept per template
+    max_capital: Optional[float] = None  # Dollars per position
+    min_credit: float = 0.10            # Per share, for credit structures
+    min_debit: float = 0.10             # Per share, for debit structures
+    max_width: Optional[float] = None   # Per spread side; defaults to 10% of spot
+    otm_shorts: bool = True             # Only sell out-of-the-money strikes
+    max_side_candidates: int = 64       # Spreads per side combined into condors
+    score: str = 'expected_return'
+
+
+def _capped(values: np.ndarray, cap: float) -> np.ndarray:
+    return np.where(np.isfinite(values), values, cap)
+
+
+def _score_pop(c: Dict[str, np.ndarray], spot: float) -> np.ndarray:
+    return c['pop']
+
+
+def _score_return_on_capital(c: Dict[str, np.ndarray], spot: float) -> np.ndarray:
+    return _capped(c['max_profit'], spot * 2) / np.maximum(c['capital'] / 100.0, 1e-9)
+
+
+def _score_expected_return(c: Dict[str, np.ndarray], spot: float) -> np.ndarray:
+    return c['expected'] / np.maximum(c['capital'] / 100.0, 1e-9)
+
+
+# Score name -> fn(candidate arrays, spot) returning one score per candidate
+SCORERS: Dict[str, Callable[[Dict[str, np.ndarray], float], np.ndarray]] = {
+    'pop': _score_pop,
+    'return_on_capital': _score_return_on_capital,
+    'expected_return': _score_expected_return,
+}
+
+
+class SpreadSearch:
+    """
+    Enumerates every valid leg combination in one expiry of a chain.
+
+    Candidate payoffs, capital and probability of profit are evaluated as
+    NumPy batches per structure; dominated candidates (over the capital limit,
+    under the minimum credit, too wide) are masked out before scoring, and
+    condors are only built from the best surviving spreads on each side.
+    """
+
+    def __init__(
+        self,
+        chain: Any,
+        spot: float,
+        days_to_expiration: float,
+        config: Optional[SearchConfig] = None,
+        default_iv: float = 0.30,
+        risk_free_rate: float = 0.05,
+        surface: Optional[Any] = None
+    ):
+        self.chain = chain
+        self.spot = spot
+        self.days = max(days_to_expiration, 0.5)
+        self.t = self.days / DAYS_PER_YEAR
+        self.config = config or SearchConfig()
+        self.default_iv = default_iv
+        self.rate = risk_free_rate
+        self.surface = surface
+        self.max_width = self.config.max_width or spot * 0.10
+        self.expiry = chain.columns['expiry'][0]
+
+        self.calls = self._side(CALL)
+        self.puts = self._side(PUT)
+        if surface is not None:
+            self.sigma = surface.atm_iv(self.days)
+        else:
+            self.sigma = chain.atm_iv(spot) or default_iv
+
+        # Expected expiration value of each contract under the lognormal model at
+        # the ATM IV; a structure's expected P&L is its fair value minus its cost.
+        growth = np.exp(self.rate * self.t)
+        for code, side in ((CALL, self.calls), (PUT, self.puts)):
+            side['fair'] = black_scholes(
+                spot, side['strike'], self.t, self.sigma, self.rate, code
+            )['price'] * growth
+
+    def _side(self, option_type: int) -> Dict[str, np.ndarray]:
+        side = self.chain.strike_range(self.expiry, option_type, -np.inf, np.inf)
+        strikes = side.columns['strike']
+        if self.surface is not None:
+            iv = self.surface.iv(strikes, self.days)
+        else:
+            iv = side.columns['iv']
+            iv = np.where(np.isfinite(iv) & (iv > 0), iv, self.default_iv)
+        model = black_scholes(self.spot, strikes, self.t, iv, self.rate, option_type)['price']
+        mid = side.mid
+        return {
+            'strike': strikes,
+            'premium': np.where(np.isfinite(mid) & (mid > 0), mid, model),
+            'iv': iv,
+        }
+
+    def _prob_below(self, x: np.ndarray) -> np.ndarray:
+        """P(S_T < x) under a lognormal terminal distribution at the ATM IV"""
+        x = np.maximum(x, 1e-9)
+        vol_t = self.sigma * np.sqrt(self.t)
+        d2 = (np.log(self.spot / x) + (self.rate - 0.5 * self.sigma ** 2) * self.t) / vol_t
+        return 1.0 - norm_cdf(d2)
+
+    def _keep(self, c: Dict[str, np.ndarray], mask: np.ndarray) -> Dict[str, np.ndarray]:
+        if self.config.max_capital is not None:
+            mask &= c['capital'] <= self.config.max_capital
+        return {name: values[mask] for name, values in c.items()}
+
+    def verticals(self, option_type: int, credit: bool) -> Dict[str, np.ndarray]:
+        """Bull put / bear call (credit) or bull call / bear put (debit) spreads"""
+        side = self.calls if option_type == CALL else self.puts
+        k, prem, fair = side['strike'], side['premium'], side['fair']
+        lo, hi = np.triu_indices(len(k), 1)
+        width = k[hi] - k[lo]
+
+        if option_type == PUT:
+            # Credit: short the higher put. Debit: long the higher put.
+            short, long = (hi, lo) if credit else (lo, hi)
+        else:
+            # Credit: short the lower call. Debit: long the lower call.
+            short, long = (lo, hi) if credit else (hi, lo)
+
+        net_credit = prem[short] - prem[long]
+        if credit:
+            max_profit = net_credit
+            max_loss = width - net_credit
+            mask = (net_credit >= self.config.min_credit) & (max_loss > 0)
+            if self.config.otm_shorts:
+                mask &= (k[short] < self.spot) if option_type == PUT else (k[short] > self.spot)
+        else:
+            max_profit = width + net_credit
+            max_loss = -net_credit
+            mask = (max_loss >= self.config.min_debit) & (max_profit > 0)
+        mask &= width <= self.max_width
+
+        # Breakeven and direction of profit
+        if option_type == PUT:
+            breakeven = k[short] - net_credit if credit else k[long] + net_credit
+            pop = self._prob_below(breakeven) if not credit else 1.0 - self._prob_below(breakeven)
+        else:
+            breakeven = k[short] + net_credit if credit else k[long] - net_credit
+            pop = self._prob_below(breakeven) if credit else 1.0 - self._prob_below(breakeven)
+
+        return self._keep({
+            'short': k[short],
+            'long': k[long],
+            'width': width,
+            'credit': net_credit,
+            'max_profit': max_profit,
+            'max_loss': max_loss,
+            'capital': max_loss * 100,
+            'pop': pop,
+            'expected': net_credit - (fair[short] - fair[long]),
+        }, mask)
+
+    def iron_condors(self) -> Dict[str, np.ndarray]:
+        """Bull put spread below combined with a bear call spread above"""
+        put_side = self._best(self.verticals(PUT, credit=True), self.config.max_side_candidates)
+        call_side = self._best(self.verticals(CALL, credit=True), self.config.max_side_candidates)
+        if not len(put_side['short']) or not len(call_side['short']):
+            return self._empty(('long_put', 'short_put', 'short_call', 'long_call'))
+
+        credit = put_side['credit'][:, None] + call_side['credit'][None, :]
+        width = np.maximum(put_side['width'][:, None], call_side['width'][None, :])
+        max_loss = width - credit
+        lower = put_side['short'][:, None] - credit
+        upper = call_side['short'][None, :] + credit
+        mask = (put_side['short'][:, None] < call_side['short'][None, :]) & (max_loss > 0)
+
+        shape = credit.shape
+        return self._keep({
+            'long_put': np.broadcast_to(put_side['long'][:, None], shape).ravel(),
+            'short_put': np.broadcast_to(put_side['short'][:, None], shape).ravel(),
+            'short_call': np.broadcast_to(call_side['short'][None, :], shape).ravel(),
+            'long_call': np.broadcast_to(call_side['long'][None, :], shape).ravel(),
+            'credit': credit.ravel(),
+            'max_profit': credit.ravel(),
+            'max_loss': max_loss.ravel(),
+            'capital': max_loss.ravel() * 100,
+            'pop': (self._prob_below(upper) - self._prob_below(lower)).ravel(),
+            'expected': (put_side['expected'][:, None] + call_side['expected'][None, :]).ravel(),
+        }, mask.ravel())
+
+    def short_strangles(self) -> Dict[str, np.ndarray]:
+        """Short OTM put and short OTM call; capital is a Reg-T style margin estimate"""
+        p_mask = self.puts['strike'] < self.spot
+        c_mask = self.calls['strike'] > self.spot
+        kp, pp = self.puts['strike'][p_mask], self.puts['premium'][p_mask]
+        kc, pc = self.calls['strike'][c_mask], self.calls['premium'][c_mask]
+        fair = self.puts['fair'][p_mask][:, None] + self.calls['fair'][c_mask][None, :]
+
+        credit = pp[:, None] + pc[None, :]
+        put_req = np.maximum(0.20 * self.spot - (self.spot - kp), 0.10 * self.spot) + pp
+        call_req = np.maximum(0.20 * self.spot - (kc - self.spot), 0.10 * self.spot) + pc
+        margin = np.maximum(put_req[:, None] + pc[None, :], call_req[None, :] + pp[:, None])
+        lower = kp[:, None] - credit
+        upper = kc[None, :] + credit
+        mask = credit >= self.config.min_credit
+
+        shape = credit.shape
+        return self._keep({
+            'call': np.broadcast_to(kc[None, :], shape).ravel(),
+            'put': np.broadcast_to(kp[:, None], shape).ravel(),
+            'credit': credit.ravel(),
+            'max_profit': credit.ravel(),
+            'max_loss': np.full(credit.size, np.inf),
+            'capital': margin.ravel() * 100,
+            'pop': (self._prob_below(upper) - self._prob_below(lower)).ravel(),
+            'expected': (credit - fair).ravel(),
+        }, mask.ravel())
+
+    def long_straddles(self) -> Dict[str, np.ndarray]:
+        """Long call and put at the same listed strike"""
+        strikes, ci, pi = np.intersect1d(self.calls['strike'], self.puts['strike'], return_indices=True)
+        debit = self.calls['premium'][ci] + self.puts['premium'][pi]
+        pop = self._prob_below(strikes - debit) + 1.0 - self._prob_below(strikes + debit)
+        return self._keep({
+            'strike': strikes,
+            'credit': -debit,
+            'max_profit': np.full(len(strikes), np.inf),
+            'max_loss': debit,
+            'capital': debit * 100,
+            'pop': pop,
+            'expected': self.calls['fair'][ci] + self.puts['fair'][pi] - debit,
+        }, debit >= self.config.min_debit)
+
+    def _empty(self, leg_fields) -> Dict[str, np.ndarray]:
+        names = tuple(leg_fields) + ('credit', 'max_profit', 'max_loss', 'capital', 'pop', 'expected')
+        return {name: np.empty(0) for name in names}
+
+    def _best(self, c: Dict[str, np.ndarray], n: int) -> Dict[str, np.ndarray]:
+        """Keep the n best candidates of one structure by the configured score"""
+        if len(c['credit']) <= n:
+            return c
+        scores = SCORERS[self.config.score](c, self.spot)
+        idx = np.argpartition(-scores, n - 1)[:n]
+        return {name: values[idx] for name, values in c.items()}
+
+    def _top_k(self, c: Dict[str, np.ndarray], to_legs: Callable[[Dict, int], List[tuple]]) -> List[Dict]:
+        if not len(c['credit']):
+            return []
+        scores = SCORERS[self.config.score](c, self.spot)
+        best = heapq.nlargest(self.config.top_k, range(len(scores)), key=scores.__getitem__)
+        return [
+            {
+                'legs': to_legs(c, i),
+                'score': float(scores[i]),
+                'pop': float(c['pop'][i]),
+                'expected_value': float(c['expected'][i]) * 100,
+                'credit': float(c['credit'][i]),
+                'capital': float(c['capital'][i]),
+            }
+            for i in best
+        ]
+
+    def run(self, structures: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+        """Top-K candidates per structure name, best first"""
+        builders = {
+            'put_credit_vertical': lambda: self._top_k(
+                self.verticals(PUT, credit=True),
+                lambda c, i: [('put', c['short'][i], -1), ('put', c['long'][i], 1)]
+            ),
+            'call_credit_vertical': lambda: self._top_k(
+                self.verticals(CALL, credit=True),
+                lambda c, i: [('call', c['short'][i], -1), ('call', c['long'][i], 1)]
+            ),
+            'call_debit_vertical': lambda: self._top_k(
+                self.verticals(CALL, credit=False),
+                lambda c, i: [('call', c['long'][i], 1), ('call', c['short'][i], -1)]
+            ),
+            'put_debit_vertical': lambda: self._top_k(
+                self.verticals(PUT, credit=False),
+                lambda c, i: [('put', c['long'][i], 1), ('put', c['short'][i], -1)]
+            ),
+            'iron_condor': lambda: self._top_k(
+                self.iron_condors(),
+                lambda c, i: [
+                    ('put', c['long_put'][i], 1), ('put', c['short_put'][i], -1),
+                    ('call', c['short_call'][i], -1), ('call', c['long_call'][i], 1)
+                ]
+            ),
+            'short_strangle': lambda: self._top_k(
+                self.short_strangles(),
+                lambda c, i: [('call', c['call'][i], -1), ('put', c['put'][i], -1)]
+            ),
+            'long_straddle': lambda: self._top_k(
+                self.long_straddles(),
+                lambda c, i: [('call', c['strike'][i], 1), ('put', c['strike'][i], 1)]
+            ),
+        }
+
+        results = {}
+        for name, build in builders.items():
+            if structures is not None and name not in structures:
+                continue
+            results[name] = build()
+        return results
@@ -0,0 +1,384 @@
+"""
+Vectorized implied volatility inversion and per-expiry SVI volatility surfaces
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .pricing import CALL, PUT, DAYS_PER_YEAR, ArrayLike, black_scholes_price, norm_cdf, norm_pdf, option_type_codes
+
+IV_LOWER = 1e-4
+IV_UPPER = 5.0
+# Vega per unit of spot below which a price no longer pins down sigma: the
+# time value is lost in rounding, so any volatility reproduces the quote
+MIN_VEGA = 1e-6
+
+
+def _price_and_vega(s, k, t, sigma, r, w):
+    sqrt_t = np.sqrt(t)
+    vol_sqrt_t = sigma * sqrt_t
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(s / k) + (r + 0.5 * sigma * sigma) * t) / vol_sqrt_t
+    d2 = d1 - vol_sqrt_t
+    price = w * (s * norm_cdf(w * d1) - k * np.exp(-r * t) * norm_cdf(w * d2))
+    return price, s * norm_pdf(d1) * sqrt_t
+
+
+def _brent(objective, lower: np.ndarray, upper: np.ndarray, tol: float, max_iter: int = 100) -> np.ndarray:
+    """
+    Brent's method run element-wise over arrays of bracketed roots.
+
+    Follows the classic Brent-Dekker step (inverse quadratic or secant when
+    it makes enough progress, bisection otherwise), with each element's state
+    held in arrays so the whole batch advances together.
+    """
+    x_pre, x_cur = lower.copy(), upper.copy()
+    f_pre, f_cur = objective(x_pre), objective(x_cur)
+    x_blk = np.zeros_like(x_cur)
+    f_blk = np.zeros_like(x_cur)
+    s_pre = np.zeros_like(x_cur)
+    s_cur = np.zeros_like(x_cur)
+    done = np.zeros(len(x_cur), dtype=bool)
+
+    for _ in range(max_iter):
+        straddle = f_pre * f_cur < 0
+        x_blk = np.where(straddle, x_pre, x_blk)
+        f_blk = np.where(straddle, f_pre, f_blk)
+        s_pre = np.where(straddle, x_cur - x_pre, s_pre)
+        s_cur = np.where(straddle, x_cur - x_pre, s_cur)
+
+        swap = np.abs(f_blk) < np.abs(f_cur)
+        x_pre = np.where(swap, x_cur, x_pre)
+        f_pre = np.where(swap, f_cur, f_pre)
+        x_cur, x_blk = np.where(swap, x_blk, x_cur), np.where(swap, x_pre, x_blk)
+        f_cur, f_blk = np.where(swap, f_blk, f_cur), np.where(swap, f_pre, f_blk)
+
+        delta = (tol + 4 * np.finfo(float).eps * np.abs(x_cur)) / 2
+        s_bis = (x_blk - x_cur) / 2
+        done |= (f_cur == 0) | (np.abs(s_bis) < delta)
+        if done.all():
+            break
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            secant = -f_cur * (x_cur - x_pre) / (f_cur - f_pre)
+            d_pre = (f_pre - f_cur) / (x_pre - x_cur)
+            d_blk = (f_blk - f_cur) / (x_blk - x_cur)
+            quadratic = -f_cur * (f_blk * d_blk - f_pre * d_pre) / (d_blk * d_pre * (f_blk - f_pre))
+        s_try = np.where(x_pre == x_blk, secant, quadratic)
+
+        interpolate = (np.abs(s_pre) > delta) & (np.abs(f_cur) < np.abs(f_pre))
+        accept = interpolate & np.isfinite(s_try) & (
+            2 * np.abs(s_try) < np.minimum(np.abs(s_pre), 3 * np.abs(s_bis) - delta)
+        )
+        s_pre = np.where(accept, s_cur, s_bis)
+        s_cur = np.where(accept, s_try, s_bis)
+
+        active = ~done
+        x_pre = np.where(active, x_cur, x_pre)
+        f_pre = np.where(active, f_cur, f_pre)
+        step = np.where(np.abs(s_cur) > delta, s_cur, np.where(s_bis > 0, delta, -delta))
+        x_cur = np.where(active, x_cur + step, x_cur)
+        f_cur = np.where(active, objective(x_cur), f_cur)
+
+    return x_cur
+
+
+def implied_volatility(
+    prices: ArrayLike,
+    spot: ArrayLike,
+    strikes: ArrayLike,
+    expiries: ArrayLike,
+    rates: ArrayLike = 0.05,
+    option_types: ArrayLike = CALL,
+    tol: float = 1e-6,
+    max_newton: int = 8
+) -> np.ndarray:
+    """
+    Black-Scholes implied volatility for a batch of option prices.
+
+    Newton steps run on every element at once; elements where Newton stalls
+    (tiny vega, overshoot outside the bracket, no convergence) are finished
+    with a vectorized Brent search on [IV_LOWER, IV_UPPER]. ``tol`` is in
+    volatility units. Prices outside the no-arbitrage bounds give NaN, as do
+    deep ITM/OTM quotes whose vega is too small to recover sigma from (see
+    MIN_VEGA). ``expiries`` are in years.
+    """
+    p, s, k, t, r, w = np.broadcast_arrays(
+        np.asarray(prices, dtype=np.float64),
+        np.asarray(spot, dtype=np.float64),
+        np.asarray(strikes, dtype=np.float64),
+        np.asarray(expiries, dtype=np.float64),
+        np.asarray(rates, dtype=np.float64),
+        option_type_codes(option_types).astype(np.float64),
+    )
+    shape = p.shape
+    p, s, k, t, r, w = (a.ravel() for a in (p, s, k, t, r, w))
+    out = np.full(p.shape, np.nan)
+
+    with np.errstate(invalid='ignore'):
+        disc_k = k * np.exp(-r * np.where(t > 0, t, 0.0))
+        lower_bound = np.maximum(w * (s - disc_k), 0.0)
+        upper_bound = np.where(w > 0, s, disc_k)
+        valid = (
+            np.isfinite(p) & np.isfinite(s) & np.isfinite(k) & (t > 0) & (s > 0) & (k > 0)
+            & (p > lower_bound) & (p < upper_bound)
+        )
+    idx = np.flatnonzero(valid)
+    if not len(idx):
+        return out.reshape(shape)
+
+    p, s, k, t, r, w = p[idx], s[idx], k[idx], t[idx], r[idx], w[idx]
+
+    # Brenner-Subrahmanyam start, measured on time value so deep ITM guesses stay sane
+    time_value = p - np.maximum(w * (s - k * np.exp(-r * t)), 0.0)
+    sigma = np.clip(np.sqrt(2 * math.pi / t) * time_value / s, 0.05, 2.0)
+
+    converged = np.zeros(len(idx), dtype=bool)
+    stalled = np.zeros(len(idx), dtype=bool)
+    for _ in range(max_newton):
+        live = np.flatnonzero(~converged & ~stalled)
+        if not len(live):
+            break
+        price, vega = _price_and_vega(s[live], k[live], t[live], sigma[live], r[live], w[live])
+        diff = price - p[live]
+        # Converged once the next Newton step would move sigma by less than tol;
+        # a price tolerance alone accepts any sigma where vega is near zero
+        ok = np.abs(diff) < tol * vega
+        converged[live[ok]] = True
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            nxt = sigma[live] - diff / vega
+        bad = ~ok & ((vega < 1e-8) | ~np.isfinite(nxt) | (nxt <= IV_LOWER) | (nxt >= IV_UPPER))
+        stalled[live[bad]] = True
+        step = ~ok & ~bad
+        sigma[live[step]] = nxt[step]
+
+    # Newton's last step may not have been checked
+    rest = np.flatnonzero(~converged & ~stalled)
+    if len(rest):
+        price, vega = _price_and_vega(s[rest], k[rest], t[rest], sigma[rest], r[rest], w[rest])
+        converged[rest[np.abs(price - p[rest]) < tol * vega]] = True
+
+    fallback = np.flatnonzero(~converged)
+    if len(fallback):
+        fs, fk, ft, fr, fw, fp = s[fallback], k[fallback], t[fallback], r[fallback], w[fallback], p[fallback]
+
+        def objective(x):
+            return black_scholes_price(fs, fk, ft, x, fr, fw) - fp
+
+        lo = np.full(len(fallback), IV_LOWER)
+        hi = np.full(len(fallback), IV_UPPER)
+        bracketed = (objective(lo) < 0) & (objective(hi) > 0)
+        root = _brent(objective, lo, hi, tol=1e-8)
+        sigma[fallback] = np.where(bracketed, root, np.nan)
+
+    _, vega = _price_and_vega(s, k, t, sigma, r, w)
+    out[idx] = np.where(vega > MIN_VEGA * s, sigma, np.nan)
+    return out.reshape(shape)
+
+
+def svi_total_variance(params: Tuple[float, ...], k: ArrayLike) -> np.ndarray:
+    """Raw SVI: w(k) = a + b (rho (k - m) + sqrt((k - m)^2 + sigma^2))"""
+    a, b, rho, m, sigma = params
+    x = np.asarray(k, dtype=np.float64) - m
+    return a + b * (rho * x + np.sqrt(x * x + sigma * sigma))
+
+
+def fit_svi(k: np.ndarray, w: np.ndarray, weights: Optional[np.ndarray] = None) -> Tuple[float, ...]:
+    """
+    Fit raw SVI parameters to total variances by the quasi-explicit method.
+
+    For fixed (m, sigma) the remaining parameters are a linear least-squares
+    problem, so a grid over (m, sigma) is solved in one batched call and the
+    grid is refined around the best point twice.
+    """
+    k = np.asarray(k, dtype=np.float64)
+    w = np.asarray(w, dtype=np.float64)
+    weights = np.ones_like(w) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    span = max(float(k.max() - k.min()), 0.05)
+    m_lo, m_hi = float(k.min()) - 0.25 * span, float(k.max()) + 0.25 * span
+    s_lo, s_hi = 0.005, max(span, 0.1)
+    best = None
+
+    for _ in range(3):
+        m_grid, s_grid = np.meshgrid(np.linspace(m_lo, m_hi, 15), np.geomspace(s_lo, s_hi, 15))
+        m_grid, s_grid = m_grid.ravel(), s_grid.ravel()
+
+        y = (k[None, :] - m_grid[:, None]) / s_grid[:, None]
+        root = np.sqrt(y * y + 1.0)
+        design = np.stack((np.ones_like(y), y, root), axis=2)          # (grid, points, 3)
+        weighted = design * weights[None, :, None]
+        gram = np.einsum('gpi,gpj->gij', weighted, design) + 1e-12 * np.eye(3)
+        rhs = np.einsum('gpi,p->gi', weighted, w)
+        coef = np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+
+        # Enforce c >= 0 and |d| <= c, then refit the level a
+        c = np.maximum(coef[:, 2], 0.0)
+        d = np.clip(coef[:, 1], -c, c)
+        a = ((w[None, :] - d[:, None] * y - c[:, None] * root) * weights).sum(axis=1) / weights.sum()
+        fitted = a[:, None] + d[:, None] * y + c[:, None] * root
+        sse = ((fitted - w[None, :]) ** 2 * weights[None, :]).sum(axis=1)
+        sse = np.where(np.isfinite(sse), sse, np.inf)
+
+        i = int(np.argmin(sse))
+        best = (a[i], d[i], c[i], m_grid[i], s_grid[i])
+        m_step = (m_hi - m_lo) / 14
+        m_lo, m_hi = m_grid[i] - m_step, m_grid[i] + m_step
+        s_lo, s_hi = s_grid[i] / 1.6, s_grid[i] * 1.6
+
+    a, d, c, m, sigma = best
+    b = c / sigma
+    rho = d / c if c > 0 else 0.0
+    return float(a), float(b), float(rho), float(m), float(sigma)
+
+
+class SmileSlice:
+    """Fitted total-variance smile for one expiry, in log-moneyness k = ln(K / F)"""
+
+    __slots__ = ('expiry', 'years', 'forward', 'params', 'nodes', 'points')
+
+    def __init__(
+        self,
+        expiry,
+        years: float,
+        forward: float,
+        k: np.ndarray,
+        w: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+        min_svi_points: int = 5
+    ):
+        self.expiry = expiry
+        self.years = years
+        self.forward = forward
+        self.points = len(k)
+        order = np.argsort(k)
+        self.nodes = (k[order], w[order])
+        self.params = fit_svi(k, w, weights) if len(k) >= min_svi_points else None
+
+    def total_variance(self, k: np.ndarray) -> np.ndarray:
+        if self.params is not None:
+            w = svi_total_variance(self.params, k)
+        else:
+            w = np.interp(k, *self.nodes)
+        return np.maximum(w, 1e-8)
+
+
+class VolSurface:
+    """
+    Implied volatility by strike and expiry for one underlying.
+
+    Built from a chain snapshot: IVs are solved from bid/ask mids of the
+    out-of-the-money side at each strike (listed IVs fill gaps), one
+    vega-weighted SVI smile is fitted per expiry, and lookups interpolate total variance
+    linearly in time at fixed log-moneyness.
+    """
+
+    def __init__(self, underlying: str, spot: float, rate: float, slices: List[SmileSlice], cache_size: int = 512):
+        self.underlying = underlying
+        self.spot = spot
+        self.rate = rate
+        self.slices = sorted(slices, key=lambda s: s.years)
+        self._years = np.array([s.years for s in self.slices])
+        self._lookups: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lookups_lock = threading.Lock()
+        self.cache_size = cache_size
+
+    @classmethod
+    def from_chain(cls, chain: Any, spot: float, rate: float = 0.05, min_points: int = 3) -> Optional['VolSurface']:
+        """Fit a surface to every expiry of an OptionChain; None if no expiry has enough quotes"""
+        if chain is None or not len(chain):
+            return None
+
+        cols = chain.columns
+        years = np.maximum(chain.dte.astype(np.float64), 0.0) / DAYS_PER_YEAR
+        forward = spot * np.exp(rate * years)
+        bid, ask = cols['bid'], cols['ask']
+        mid = (bid + ask) / 2.0
+        # One-sided or mostly-spread quotes say little about volatility
+        mid = np.where((bid > 0) & (ask >= bid) & (ask - bid <= mid), mid, np.nan)
+
+        solved = implied_volatility(mid, spot, cols['strike'], years, rate, cols['type'])
+        listed = np.where(np.isfinite(cols['iv']) & (cols['iv'] > 0), cols['iv'], np.nan)
+        iv = np.where(np.isfinite(solved), solved, listed)
+
+        # Out-of-the-money side only: puts below the forward, calls at or above
+        otm = np.where(cols['strike'] < forward, cols['type'] == PUT, cols['type'] == CALL)
+        use = otm & np.isfinite(iv) & (years > 0)
+
+        # Vega weights keep far-wing quotes, whose mids are mostly tick noise, from steering the fit
+        _, vega = _price_and_vega(
+            spot, cols['strike'], np.maximum(years, 1e-9), np.where(use, iv, 0.2), rate, cols['type']
+        )
+
+        slices = []
+        for expiry in chain.expirations:
+            rows = np.flatnonzero(use & (cols['expiry'] == expiry))
+            if len(rows) < min_points:
+                continue
+            t = float(years[rows[0]])
+            k = np.log(cols['strike'][rows] / forward[rows[0]])
+            weights = vega[rows] / max(float(vega[rows].max()), 1e-12)
+            slices.append(SmileSlice(expiry, t, float(forward[rows[0]]), k, iv[rows] ** 2 * t, weights))
+
+        if not slices:
+            return None
+        return cls(chain.underlying, spot, rate, slices)
+
+    def _iv_at(self, strikes: np.ndarray, years: float) -> np.ndarray:
+        years = max(years, 1.0 / DAYS_PER_YEAR)
+        forward = self.spot * math.exp(self.rate * years)
+        k = np.log(np.maximum(strikes, 1e-9) / forward)
+
+        i = int(np.searchsorted(self._years, years))
+        if i == 0 or i == len(self.slices):
+            # Outside the fitted expiries keep the nearest smile's IV
+            nearest = self.slices[0 if i == 0 else -1]
+            return np.sqrt(nearest.total_variance(k) / nearest.years)
+
+        before, after = self.slices[i - 1], self.slices[i]
+        frac = (years - before.years) / (after.years - before.years)
+        w = (1 - frac) * before.total_variance(k) + frac * after.total_variance(k)
+        return np.sqrt(w / years)
+
+    def iv(self, strikes: ArrayLike, days_to_expiration: float) -> np.ndarray:
+        """Interpolated IVs for strikes at one horizon; repeated lookups are served from a cache"""
+        strikes = np.atleast_1d(np.asarray(strikes, dtype=np.float64))
+        key = (round(float(days_to_expiration), 6), strikes.tobytes())
+        # Scans on executor threads share a cached surface
+        with self._lookups_lock:
+            cached = self._lookups.get(key)
+            if cached is not None:
+                self._lookups.move_to_end(key)
+                return cached.copy()
+
+        result = self._iv_at(strikes, days_to_expiration / DAYS_PER_YEAR)
+        with self._lookups_lock:
+            self._lookups[key] = result
+            while len(self._lookups) > self.cache_size:
+                self._lookups.popitem(last=False)
+        return result.copy()
+
+    def atm_iv(self, days_to_expiration: float) -> float:
+        """IV at the forward for a horizon"""
+        years = days_to_expiration / DAYS_PER_YEAR
+        return float(self.iv([self.spot * math.exp(self.rate * years)], days_to_expiration)[0])
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Per-expiry fit summary"""
+        return [
+            {
+                'expiry': str(s.expiry),
+                'years': s.years,
+                'forward': s.forward,
+                'points': s.points,
+                'model': 'svi' if s.params is not None else 'linear',
+                'params': list(s.params) if s.params is not None else None,
+                'atm_iv': float(np.sqrt(s.total_variance(np.zeros(1))[0] / s.years)),
+            }
+            for s in self.slices
+        ]
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+
+API = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tests import the API modules the way index.py does, and the benchmarks' mock Polygon server
+for path in (API, os.path.join(os.path.dirname(API), 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def make_snapshot():
+    """Builds the MarketSnapshot PolygonClient would make from the mock server's data, without the network"""
+    from data.chain import OptionChain
+    from data.polygon_client import PolygonClient
+    from data.snapshot import MarketSnapshot
+    from mock_polygon import make_contracts, spot_for
+
+    def make(ticker='SPY', min_dte=30, max_dte=45, timestamp='test'):
+        records = [PolygonClient._parse_snapshot_contract(c) for c in make_contracts(ticker)]
+        chain = OptionChain.from_records(ticker, records).slice_dte(min_dte, max_dte)
+        spot = spot_for(ticker)
+        quote = {
+            'ticker': ticker, 'price': spot, 'high': spot * 1.01, 'low': spot * 0.99,
+            'open': spot * 0.995, 'volume': 1e6, 'timestamp': timestamp,
+        }
+        return MarketSnapshot.from_quote(quote, chain)
+
+    return make
+
+
+@pytest.fixture(scope='session')
+def index():
+    """The API module, configured for tests: no disk cache, no prewarm, no demo data"""
+    # Settings are read at import, so they must be in place before the first import
+    for name, value in (('MARKET_DATA_CACHE_DIR', ''), ('POLYGON_PREWARM', '0'), ('DEMO_DATA_FALLBACK', '0')):
+        os.environ.setdefault(name, value)
+    import index
+
+    index.init_engine()
+    return index
+
+
+@pytest.fixture
+def call_api(index):
+    """Runs `async def body(client)` against the app, with Polygon served by the mock server"""
+    import asyncio
+
+    import httpx
+    from mock_polygon import MockPolygon
+
+    def run(body):
+        async def main():
+            async with MockPolygon() as mock:
+                index.polygon_client.base_url = mock.base_url
+                await index.polygon_client.start()
+                transport = httpx.ASGITransport(app=index.app)
+                try:
+                    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                        return await body(client)
+                finally:
+                    await index.polygon_client.close()
+
+        return asyncio.run(main())
+
+    yield run
+    index.response_cache.clear()
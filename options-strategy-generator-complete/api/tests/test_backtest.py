@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+
+from backtest import BacktestConfig, BarMatrix, run_backtest, simulate_template
+from backtest.engine import EXIT_EXPIRY, EXIT_STOP, EXIT_TARGET, TRADING_DAYS, realized_volatility
+from strategies.registry import Leg, StrategyDefinition
+
+nan = np.nan
+
+# Business days from Monday 2026-01-05; the Wednesday entry (column 2) plus
+# 10 DTE expires on Saturday the 17th, so trades settle on Friday's close
+DATES = np.busday_offset('2026-01-05', np.arange(11), roll='forward')
+ENTRY, EXIT = 2, 9
+
+CLOSES = {
+    # Up to 106 on the second day held: the 50% profit target
+    'TARGET': [99, 101, 100, 102, 106, 104, 104, 104, 104, 104, 104],
+    # Down to 94 on the third day held: the 50% stop
+    'STOP': [101, 99, 100, 98, 97, 94, 90, 90, 90, 90, 90],
+    # Stays inside both bands and settles at 103 on Friday; Monday's 120 is after expiry
+    'EXPIRY': [100, 100.5, 100, 101, 99, 102, 98, 103, 101, 103, 120],
+    # A missing bar inside the volatility lookback: no entry
+    'GAP': [100, nan, 100, 101, 102, 103, 104, 105, 106, 107, 108],
+}
+
+
+def bars(closes=CLOSES):
+    close = np.array(list(closes.values()), dtype=np.float64)
+    return BarMatrix(
+        tickers=list(closes), dates=DATES,
+        open=close, high=close, low=close, close=close, volume=np.ones_like(close)
+    )
+
+
+# Deep in the money by $10, so with no rates and (almost) no volatility
+# the call is worth exactly spot - 90 every day and costs $10.00 at entry
+ITM_CALL = StrategyDefinition(
+    'Test ITM Call', 'directional', 'beginner', [Leg('call', -10.0, 1)],
+    capital_rule=lambda metrics, spot: -metrics['max_loss'], description=''
+)
+
+
+def config(**kwargs):
+    settings = dict(
+        windows=((10, 10),), entry_every=100, vol_lookback=2, iv_premium=0.0, min_iv=1e-4,
+        rate=0.0, profit_target=0.5, stop_loss=0.5, workers=1,
+    )
+    settings.update(kwargs)
+    return BacktestConfig(**settings)
+
+
+def by_ticker(result, matrix):
+    return {matrix.tickers[row]: i for i, row in enumerate(result.ticker_index)}
+
+
+def test_realized_volatility_matches_sample_std():
+    close = np.array([[100.0, 110.0, 99.0, 101.0, 103.0, 100.0]])
+    vol = realized_volatility(close, 3)
+    returns = np.diff(np.log(close[0]))
+
+    assert np.isnan(vol[0, :3]).all()
+    for end in range(3, 6):
+        expected = np.std(returns[end - 3:end], ddof=1) * np.sqrt(TRADING_DAYS)
+        assert vol[0, end] == pytest.approx(expected)
+
+
+def test_realized_volatility_is_nan_for_windows_with_gaps():
+    close = np.array([
+        [100.0, 101.0, 102.0, nan, 104.0, 105.0, 106.0, 107.0],
+        [100.0, 101.0, 100.0, 101.0, 100.0, 101.0, 100.0, 101.0],
+    ])
+    vol = realized_volatility(close, 2)
+    # Returns into and out of the missing bar are missing, so windows ending at 3..5 have gaps
+    assert np.isfinite(vol[0, 2])
+    assert np.isnan(vol[0, 3:6]).all()
+    assert np.isfinite(vol[0, 6:]).all()
+    assert np.isfinite(vol[1, 2:]).all()
+    # Too short a history is all NaN
+    assert np.isnan(realized_volatility(close[:, :2], 2)).all()
+
+
+def test_replay_exits_on_target_stop_and_expiry():
+    matrix = bars()
+    result = simulate_template(ITM_CALL, matrix, (10, 10), config())
+    rows = by_ticker(result, matrix)
+
+    assert sorted(rows) == ['EXPIRY', 'STOP', 'TARGET']
+    assert (result.entry_date == DATES[ENTRY]).all()
+
+    target, stop, expiry = rows['TARGET'], rows['STOP'], rows['EXPIRY']
+    assert result.exit_reason[target] == EXIT_TARGET
+    assert result.holding_days[target] == 2
+    assert result.pnl[target] == pytest.approx(600.0)
+
+    assert result.exit_reason[stop] == EXIT_STOP
+    assert result.holding_days[stop] == 3
+    assert result.pnl[stop] == pytest.approx(-600.0)
+
+    # Settled at intrinsic on the last bar before the Saturday expiry
+    assert result.exit_reason[expiry] == EXIT_EXPIRY
+    assert result.holding_days[expiry] == EXIT - ENTRY
+    assert result.pnl[expiry] == pytest.approx(300.0)
+
+    # Capital from the template's rule: the most the call can lose
+    np.testing.assert_allclose(result.capital, 1000.0)
+
+
+def test_holding_to_expiry_without_exit_rules():
+    matrix = bars()
+    result = simulate_template(ITM_CALL, matrix, (10, 10), config(profit_target=None, stop_loss=None))
+    rows = by_ticker(result, matrix)
+
+    assert (result.exit_reason == EXIT_EXPIRY).all()
+    assert (result.holding_days == EXIT - ENTRY).all()
+    assert result.pnl[rows['TARGET']] == pytest.approx(400.0)
+    assert result.pnl[rows['STOP']] == pytest.approx(-1000.0)     # Expires worthless at 90
+    assert result.pnl[rows['EXPIRY']] == pytest.approx(300.0)
+
+
+def test_results_do_not_depend_on_chunking():
+    matrix = bars()
+    whole = simulate_template(ITM_CALL, matrix, (10, 10), config())
+    chunked = simulate_template(ITM_CALL, matrix, (10, 10), config(chunk_entries=1))
+    for name in ('pnl', 'capital', 'holding_days', 'exit_reason', 'ticker_index'):
+        np.testing.assert_array_equal(getattr(chunked, name), getattr(whole, name))
+
+
+def test_trades_must_complete_inside_the_data():
+    short = {ticker: closes[:EXIT + 1] for ticker, closes in CLOSES.items()}
+    matrix = bars(short)
+    matrix.dates = DATES[:EXIT + 1]
+    # The last bar is Friday, before the Saturday expiry
+    assert len(simulate_template(ITM_CALL, matrix, (10, 10), config())) == 0
+
+
+def test_run_backtest_summary():
+    report = run_backtest(bars(), [ITM_CALL], config(tickers_per_task=2))
+    summary = report.summary()
+    assert summary['tickers'] == 4
+    assert summary['trades'] == 3
+
+    result = summary['results'][0]
+    assert result['template'] == 'Test ITM Call'
+    assert result['target_exits'] == 1
+    assert result['stop_exits'] == 1
+    assert result['total'] == pytest.approx(300.0)
+    assert result['win_rate'] == pytest.approx(2 / 3)
+    assert result['worst'] == pytest.approx(-600.0)
+    assert result['mean_return_on_capital'] == pytest.approx(0.1)
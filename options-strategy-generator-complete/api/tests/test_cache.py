@@ -0,0 +1,207 @@
+import asyncio
+import types
+
+import pytest
+
+from data import cache
+from data.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Swap the module's time rather than time.monotonic, which the event loop reads too
+    clock = Clock()
+    monkeypatch.setattr(cache, 'time', types.SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def counting_loader(value='v', started=None, release=None):
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        if started is not None:
+            started.set()
+        if release is not None:
+            await release.wait()
+        else:
+            await asyncio.sleep(0.01)
+        return value
+
+    return loader, calls
+
+
+def test_concurrent_identical_loads_call_loader_once():
+    async def run():
+        c = TTLCache()
+        loader, calls = counting_loader()
+        results = await asyncio.gather(*(c.get_or_load('k', loader) for _ in range(5)))
+        return c, results, calls
+
+    c, results, calls = asyncio.run(run())
+    assert results == ['v'] * 5
+    assert len(calls) == 1
+    assert c.coalesced == 4
+    assert c.misses == 1
+    assert c.stats()['inflight'] == 0
+    assert c.get('k') == 'v'
+
+
+def test_none_result_is_shared_but_not_cached():
+    async def run():
+        c = TTLCache()
+        loader, calls = counting_loader(value=None)
+        results = await asyncio.gather(c.get_or_load('k', loader), c.get_or_load('k', loader))
+        await c.get_or_load('k', loader)
+        return c, results, calls
+
+    c, results, calls = asyncio.run(run())
+    assert results == [None, None]
+    assert len(calls) == 2
+    assert 'k' not in c
+
+
+def test_loader_error_reaches_every_waiter_and_is_not_cached():
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('upstream down')
+
+    async def run():
+        c = TTLCache()
+        results = await asyncio.gather(
+            c.get_or_load('k', failing), c.get_or_load('k', failing), return_exceptions=True
+        )
+        return c, results
+
+    c, results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert 'k' not in c
+
+
+def test_entries_expire_after_ttl(clock):
+    c = TTLCache(ttl=10)
+    c.set('k', 'v')
+    clock.now += 9.9
+    assert c.get('k') == 'v'
+    clock.now += 0.2
+    assert c.get('k') is None
+    assert 'k' not in c
+    assert c.expirations == 1
+
+
+def test_per_entry_ttl_overrides_default(clock):
+    c = TTLCache(ttl=10)
+    c.set('short', 'v', ttl=1)
+    c.set('long', 'v')
+    clock.now += 2
+    assert c.get('short') is None
+    assert c.get('long') == 'v'
+
+
+def test_stale_ttl_keeps_expired_entries_for_get_stale(clock):
+    c = TTLCache(ttl=10, stale_ttl=5)
+    c.set('k', 'v')
+    clock.now += 12
+
+    # Expired for get() but still served by get_stale()
+    assert c.get('k') is None
+    assert c.get_stale('k') == 'v'
+    assert 'k' in c
+
+    clock.now += 4
+    assert c.get('k') is None
+    assert 'k' not in c
+    assert c.get_stale('k') is None
+    assert c.expirations == 1
+
+
+def test_get_or_load_reloads_an_expired_entry(clock):
+    async def run():
+        c = TTLCache(ttl=10, stale_ttl=60)
+        loader, calls = counting_loader()
+        await c.get_or_load('k', loader)
+        clock.now += 11
+        await c.get_or_load('k', loader)
+        return calls
+
+    assert len(asyncio.run(run())) == 2
+
+
+def test_lru_evicts_least_recently_used():
+    c = TTLCache(max_size=3)
+    for key in 'abc':
+        c.set(key, key)
+
+    # Reading 'a' makes 'b' the least recently used
+    assert c.get('a') == 'a'
+    c.set('d', 'd')
+    assert 'b' not in c
+    assert [k for k in 'acd' if k in c] == ['a', 'c', 'd']
+
+    # Overwriting refreshes recency too
+    c.set('c', 'c2')
+    c.set('e', 'e')
+    assert 'a' not in c
+    assert c.get('c') == 'c2'
+    assert c.evictions == 2
+    assert len(c) == 3
+
+
+def test_cancelled_loader_hands_off_to_waiter():
+    async def run():
+        c = TTLCache()
+        started = asyncio.Event()
+        release = asyncio.Event()
+        first_loader, first_calls = counting_loader('first', started, release)
+        second_loader, second_calls = counting_loader('second')
+
+        first = asyncio.ensure_future(c.get_or_load('k', first_loader))
+        await started.wait()
+        second = asyncio.ensure_future(c.get_or_load('k', second_loader))
+        await asyncio.sleep(0)
+        assert c.coalesced == 1
+
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        value = await second
+        return c, value, first_calls, second_calls
+
+    c, value, first_calls, second_calls = asyncio.run(run())
+    # The waiter ran its own loader rather than inheriting the cancellation
+    assert value == 'second'
+    assert len(first_calls) == 1
+    assert len(second_calls) == 1
+    assert c.get('k') == 'second'
+    assert c.stats()['inflight'] == 0
+
+
+def test_cancelled_waiter_leaves_loader_running():
+    async def run():
+        c = TTLCache()
+        started = asyncio.Event()
+        release = asyncio.Event()
+        loader, calls = counting_loader('v', started, release)
+
+        first = asyncio.ensure_future(c.get_or_load('k', loader))
+        await started.wait()
+        waiter = asyncio.ensure_future(c.get_or_load('k', loader))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        release.set()
+        return await first, calls
+
+    value, calls = asyncio.run(run())
+    assert value == 'v'
+    assert len(calls) == 1
@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from data.chain import CALL, PUT, OptionChain
+
+AS_OF = date(2026, 1, 5)
+
+
+def make_chain(dtes=(7, 14, 30), strikes=(90.0, 95.0, 100.0, 105.0, 110.0)):
+    records = [
+        {
+            'symbol': f'{kind}{dte}-{strike}',
+            'strike': strike,
+            'expiry': (AS_OF + timedelta(days=dte)).isoformat(),
+            'type': kind,
+            'bid': 1.0,
+            'ask': 1.2,
+            'iv': 0.2,
+            'open_interest': 10,
+        }
+        # Shuffled on purpose; the chain sorts its rows
+        for strike in reversed(strikes)
+        for kind in ('put', 'call')
+        for dte in dtes
+    ]
+    return OptionChain.from_records('TEST', records, as_of=AS_OF)
+
+
+def expiry(dte):
+    return np.datetime64(AS_OF + timedelta(days=dte), 'D')
+
+
+def test_slice_dte_includes_both_ends():
+    chain = make_chain()
+    assert sorted(set(chain.slice_dte(7, 14).dte)) == [7, 14]
+    assert sorted(set(chain.slice_dte(0, 365).dte)) == [7, 14, 30]
+    assert sorted(set(chain.slice_dte(30, 30).dte)) == [30]
+
+
+def test_slice_dte_between_expiries_is_empty():
+    chain = make_chain()
+    assert len(chain.slice_dte(8, 13)) == 0
+    assert len(chain.slice_dte(31, 60)) == 0
+    assert len(chain.slice_dte(0, 6)) == 0
+
+
+def test_slice_dte_keeps_every_row_of_an_expiry():
+    chain = make_chain()
+    window = chain.slice_dte(14, 14)
+    assert len(window) == 10
+    assert set(window.symbols) == {f'{kind}14-{s}' for kind in ('put', 'call') for s in (90.0, 95.0, 100.0, 105.0, 110.0)}
+
+
+def test_strike_range_includes_both_ends():
+    chain = make_chain()
+    rows = chain.strike_range(expiry(14), CALL, 95.0, 105.0)
+    assert rows.columns['strike'].tolist() == [95.0, 100.0, 105.0]
+    assert set(rows.columns['type']) == {CALL}
+    assert set(rows.dte) == {14}
+
+
+def test_strike_range_between_listed_strikes():
+    chain = make_chain()
+    assert chain.strike_range(expiry(7), PUT, 96.0, 104.0).columns['strike'].tolist() == [100.0]
+    assert len(chain.strike_range(expiry(7), PUT, 96.0, 99.0)) == 0
+    assert chain.strike_range(expiry(7), PUT, 0.0, 1e9).columns['strike'].tolist() == [90.0, 95.0, 100.0, 105.0, 110.0]
+
+
+def test_strike_range_outside_chain_is_empty():
+    chain = make_chain()
+    assert len(chain.strike_range(expiry(7), CALL, 111.0, 200.0)) == 0
+    assert len(chain.strike_range(expiry(7), CALL, 50.0, 89.9)) == 0
+    # An expiry that is not listed
+    assert len(chain.strike_range(expiry(8), CALL, 0.0, 1e9)) == 0
+
+
+def test_slices_of_empty_chain():
+    chain = OptionChain.from_records('TEST', [], as_of=AS_OF)
+    assert len(chain.slice_dte(0, 365)) == 0
+    assert len(chain.strike_range(expiry(7), CALL, 0.0, 1e9)) == 0
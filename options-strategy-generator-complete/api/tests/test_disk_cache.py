@@ -0,0 +1,164 @@
+import asyncio
+import os
+import types
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from data import disk_cache
+from data.chain import OptionChain
+from data.disk_cache import DiskCache
+from data.polygon_client import PolygonClient
+
+AS_OF = date(2026, 1, 5)
+
+
+def make_chain(ticker='TEST', dtes=(7, 14, 30), strikes=(90.0, 95.0, 100.0, 105.0, 110.0), bid=1.0):
+    records = [
+        {
+            'symbol': f'{ticker}{kind}{dte}-{strike}',
+            'strike': strike,
+            'expiry': (AS_OF + timedelta(days=dte)).isoformat(),
+            'type': kind,
+            'bid': bid,
+            'ask': bid + 0.2,
+            'iv': 0.2,
+            'open_interest': 10,
+        }
+        for strike in strikes
+        for kind in ('put', 'call')
+        for dte in dtes
+    ]
+    return OptionChain.from_records(ticker, records, as_of=AS_OF)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        self.now += 1.0
+        return self.now
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # Strictly increasing access times, so LRU order never depends on clock resolution
+    monkeypatch.setattr(disk_cache, 'time', types.SimpleNamespace(time=Clock()))
+    cache = DiskCache(str(tmp_path))
+    yield cache
+    cache.close()
+
+
+def chain_dirs(cache):
+    return sorted(os.listdir(cache.chain_dir))
+
+
+def test_chain_round_trip(cache):
+    chain = make_chain()
+    cache.put_chain('TEST', 7, 30, chain)
+    loaded = cache.get_chain('TEST', 7, 30)
+
+    assert loaded is not None
+    assert loaded.as_of == chain.as_of
+    assert loaded.fetched_at == chain.fetched_at
+    for name, column in chain.columns.items():
+        np.testing.assert_array_equal(loaded.columns[name], column)
+        # Read-only views of the mapped files, not copies
+        assert not loaded.columns[name].flags.writeable
+    assert list(loaded.symbols) == list(chain.symbols)
+    assert cache.hits == 1
+
+
+def test_get_chain_slices_a_wider_stored_window(cache):
+    cache.put_chain('TEST', 7, 30, make_chain())
+
+    loaded = cache.get_chain('TEST', 10, 20)
+    assert sorted(set(loaded.dte)) == [14]
+    assert len(loaded) == 10
+
+    # A window the stored one does not cover is a miss
+    assert cache.get_chain('TEST', 7, 45) is None
+    assert cache.get_chain('TEST', 7, 30, as_of='2026-01-06') is None
+    assert cache.misses == 2
+
+
+def test_put_chain_replaces_existing_copy(cache):
+    cache.put_chain('TEST', 7, 30, make_chain(bid=1.0))
+    held = cache.get_chain('TEST', 7, 30)
+    cache.put_chain('TEST', 7, 30, make_chain(bid=2.0))
+
+    assert np.all(cache.get_chain('TEST', 7, 30).columns['bid'] == 2.0)
+    # Arrays mapped from the replaced copy stay readable
+    assert np.all(held.columns['bid'] == 1.0)
+    # No staging or retired directories are left behind
+    assert len(chain_dirs(cache)) == 1
+
+
+def test_failed_swap_keeps_previous_copy(cache, monkeypatch):
+    cache.put_chain('TEST', 7, 30, make_chain(bid=1.0))
+
+    def fail(src, dst):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(disk_cache.os, 'replace', fail)
+    cache.put_chain('TEST', 7, 30, make_chain(bid=2.0))
+    monkeypatch.undo()
+
+    assert np.all(cache.get_chain('TEST', 7, 30).columns['bid'] == 1.0)
+    assert len(chain_dirs(cache)) == 1
+
+
+def test_evicts_least_recently_read_past_max_bytes(cache):
+    cache.put_chain('AAA', 7, 30, make_chain('AAA'))
+    one_chain = cache.size()
+    cache.max_bytes = int(one_chain * 2.5)
+
+    cache.put_chain('BBB', 7, 30, make_chain('BBB'))
+    # Reading AAA makes BBB the least recently used
+    assert cache.get_chain('AAA', 7, 30) is not None
+    cache.put_chain('CCC', 7, 30, make_chain('CCC'))
+
+    assert cache.evictions == 1
+    assert cache.get_chain('BBB', 7, 30) is None
+    assert cache.get_chain('AAA', 7, 30) is not None
+    assert cache.get_chain('CCC', 7, 30) is not None
+    assert cache.size() <= cache.max_bytes
+    assert len(chain_dirs(cache)) == 2
+
+
+def test_quote_round_trip_and_max_age(cache):
+    cache.put_quote('TEST', {'ticker': 'TEST', 'price': 100.0})
+    assert cache.get_quote('TEST') == {'ticker': 'TEST', 'price': 100.0}
+    # Every clock read advances one second
+    assert cache.get_quote('TEST', max_age=0.5) is None
+    assert cache.get_quote('OTHER') is None
+
+
+def test_offline_replay_serves_recorded_data_without_requests(cache):
+    cache.put_quote('TEST', {
+        'ticker': 'TEST', 'price': 100.0, 'high': 101.0, 'low': 99.0, 'open': 100.0,
+        'volume': 1e6, 'timestamp': '2026-01-05T16:00:00',
+    })
+    cache.put_chain('TEST', 7, 30, make_chain())
+    # Nothing listens here; any request would fail
+    client = PolygonClient(
+        'key', disk_cache=cache, offline=True, demo_fallback=False, base_url='http://127.0.0.1:9'
+    )
+
+    async def run():
+        try:
+            return await client.get_snapshot('TEST', 7, 14), await client.get_stock_price('MISSING')
+        finally:
+            await client.close()
+
+    snapshot, missing = asyncio.run(run())
+    assert snapshot is not None
+    assert snapshot.price == 100.0
+    assert not snapshot.stale
+    # Recorded on an earlier day, still replayed
+    assert sorted(set(snapshot.chain.dte)) == [7, 14]
+    # Nothing recorded is a miss, not a request
+    assert missing is None
+    assert client.transport.requests == 0
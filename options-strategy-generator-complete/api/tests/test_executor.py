@@ -0,0 +1,184 @@
+import asyncio
+import copy
+import threading
+
+import numpy as np
+import pytest
+
+from strategies import registry
+from strategies.executor import EXECUTIONS, PackedSnapshot, PackedStrategies, ScanCancelled, ScanExecutor
+from strategies.options_engine import OptionsStrategyEngine
+
+PARAMS = {'risk_profile': 'moderate', 'min_dte': 30, 'max_dte': 45, 'max_strategies': 8}
+
+
+def evaluate(executor, engine, snapshot, **params):
+    async def run():
+        try:
+            return await executor.evaluate(engine, snapshot, snapshot.ticker, **{**PARAMS, **params})
+        finally:
+            executor.shutdown()
+
+    return asyncio.run(run())
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    from data.chain import OptionChain
+    from data.polygon_client import PolygonClient
+    from data.snapshot import MarketSnapshot
+    from mock_polygon import make_contracts, spot_for
+
+    records = [PolygonClient._parse_snapshot_contract(c) for c in make_contracts('SPY')]
+    spot = spot_for('SPY')
+    quote = {
+        'ticker': 'SPY', 'price': spot, 'high': spot * 1.01, 'low': spot * 0.99,
+        'open': spot * 0.995, 'volume': 1e6, 'timestamp': 'test',
+    }
+    return MarketSnapshot.from_quote(quote, OptionChain.from_records('SPY', records).slice_dte(30, 45))
+
+
+@pytest.fixture(scope='module')
+def inline_result(snapshot):
+    return evaluate(ScanExecutor('inline'), OptionsStrategyEngine(None), snapshot)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ScanExecutor('gpu')
+
+
+def test_thread_mode_matches_inline(snapshot, inline_result):
+    strategies, count = inline_result
+    assert strategies
+    assert evaluate(ScanExecutor('thread', 2), OptionsStrategyEngine(None), snapshot) == (strategies, count)
+
+
+def completed(mode):
+    return EXECUTIONS.labels(mode, 'completed').value
+
+
+def test_process_mode_matches_inline(snapshot, inline_result):
+    before = completed('process')
+    assert evaluate(ScanExecutor('process', 1), OptionsStrategyEngine(None), snapshot) == inline_result
+    assert completed('process') == before + 1
+
+
+def test_process_mode_falls_back_to_threads_after_registry_change(snapshot):
+    executor = ScanExecutor('process', 1)
+    executor.start()
+    engine = OptionsStrategyEngine(None)
+    submitted = []
+    evaluate_on_thread = engine.evaluate
+
+    def on_thread(*args, **kwargs):
+        submitted.append(threading.current_thread().name)
+        return evaluate_on_thread(*args, **kwargs)
+
+    engine.evaluate = on_thread
+    existing = registry.all_strategies()[0]
+    extra = copy.copy(existing)
+    extra.name = f'{existing.name}_copy'
+    registry.register_strategy(extra)
+    before = completed('thread')
+    try:
+        assert executor.stats()['process_fallback']
+        result = evaluate(executor, engine, snapshot)
+        expected = evaluate(ScanExecutor('inline'), OptionsStrategyEngine(None), snapshot)
+    finally:
+        registry.unregister_strategy(extra.name)
+
+    # Worker processes would not know the runtime registration; a scan thread does
+    assert submitted and submitted[0].startswith('scan')
+    assert completed('thread') == before + 1
+    assert result == expected
+
+
+def test_packed_snapshot_round_trip(snapshot):
+    restored = PackedSnapshot.pack(snapshot).unpack()
+    assert restored.as_quote() == snapshot.as_quote()
+    assert restored.version == snapshot.version
+    assert restored.chain.as_of == snapshot.chain.as_of
+    for name, column in snapshot.chain.columns.items():
+        np.testing.assert_array_equal(restored.chain.columns[name], column)
+    assert list(restored.chain.symbols) == list(snapshot.chain.symbols)
+
+
+def test_packed_snapshot_without_chain(snapshot):
+    quote_only = PackedSnapshot.pack(snapshot.__class__.from_quote(snapshot.as_quote())).unpack()
+    assert quote_only.chain is None
+    assert quote_only.price == snapshot.price
+
+
+def test_packed_strategies_round_trip(inline_result):
+    strategies, _ = inline_result
+    packed = PackedStrategies.pack(strategies)
+    assert packed.values.shape[0] == len(strategies)
+    assert packed.unpack('SPY') == strategies
+
+
+def test_packed_strategies_handles_stock_legs_and_missing_values():
+    strategy = {
+        'id': 'covered_call_1', 'name': 'Covered Call', 'type': 'income', 'complexity': 'beginner',
+        'confidence_score': 70.0, 'ticker': 'SPY', 'current_price': 100.0, 'max_profit': 600.0,
+        'max_loss': -9400.0, 'unlimited_profit': False, 'unlimited_loss': False,
+        'capital_required': 9400.0, 'probability_of_profit': 0.7, 'net_premium': -9400.0,
+        'expiration_days': 30.0, 'expiration_date': '2026-02-04',
+        'greeks': {'delta': 0.6, 'gamma': -0.01, 'theta': 0.02, 'vega': -0.1, 'rho': 0.0},
+        'strikes': [105.0],
+        'legs': [
+            {'type': 'call', 'strike': 105.0, 'quantity': -1, 'premium': 6.0, 'iv': 0.2,
+             'symbol': None, 'spread': None, 'open_interest': 250.0},
+            {'type': 'stock', 'strike': 100.0, 'quantity': 100, 'premium': 100.0},
+        ],
+        'expected_value': 12.0, 'cvar': -800.0, 'iv_rank': 40.0,
+    }
+    assert PackedStrategies.pack([strategy]).unpack('SPY') == [strategy]
+    assert PackedStrategies.pack([]).unpack('SPY') == []
+
+
+class BlockingEngine:
+    """Evaluates until cancelled, polling the flag like the engine's stage boundaries"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.stopped = threading.Event()
+        self.calls = 0
+
+    def evaluate(self, snapshot, ticker, cancelled=None, **params):
+        self.calls += 1
+        self.started.set()
+        try:
+            while True:
+                if cancelled():
+                    raise ScanCancelled()
+                threading.Event().wait(0.005)
+        finally:
+            self.stopped.set()
+
+
+def test_cancelling_stops_running_and_queued_evaluations(snapshot):
+    engine = BlockingEngine()
+    executor = ScanExecutor('thread', 1)
+
+    async def run():
+        running = asyncio.ensure_future(executor.evaluate(engine, snapshot, 'SPY'))
+        await asyncio.get_running_loop().run_in_executor(None, engine.started.wait, 5)
+        # The single worker is busy, so this one waits in the queue
+        queued = asyncio.ensure_future(executor.evaluate(engine, snapshot, 'SPY'))
+        await asyncio.sleep(0)
+        assert executor.inflight == 2
+
+        queued.cancel()
+        running.cancel()
+        for task in (queued, running):
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        return await asyncio.get_running_loop().run_in_executor(None, engine.stopped.wait, 5)
+
+    try:
+        assert asyncio.run(run())
+    finally:
+        executor.shutdown()
+    assert engine.calls == 1
+    assert executor.inflight == 0
@@ -0,0 +1,155 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from export import COLUMNS, FORMATS, select_columns
+
+SCAN = {'ticker': 'SPY', 'min_dte': 30, 'max_dte': 45, 'max_strategies': 5}
+
+
+def csv_rows(content):
+    return list(csv.DictReader(io.StringIO(content.decode())))
+
+
+def ndjson_rows(content):
+    return [json.loads(line) for line in content.decode().splitlines()]
+
+
+def test_select_columns():
+    assert select_columns(None) == list(COLUMNS)
+    assert select_columns(['ticker', 'id', 'ticker']) == ['ticker', 'id']
+    with pytest.raises(ValueError, match='bogus'):
+        select_columns(['ticker', 'bogus'])
+
+
+def test_parquet_is_offered_only_with_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        assert 'parquet' not in FORMATS
+    else:
+        assert 'parquet' in FORMATS
+
+
+def test_export_cached_scan_as_csv_and_ndjson(call_api):
+    async def body(client):
+        scan = await client.get('/api/scan', params=SCAN)
+        scan_id = scan.headers['etag']
+        as_csv = await client.post('/api/export', json={'scan_id': scan_id})
+        as_ndjson = await client.post('/api/export', json={
+            'scan_id': scan_id, 'format': 'ndjson', 'columns': ['id', 'rank', 'legs'],
+        })
+        return scan.json(), as_csv, as_ndjson
+
+    scan, as_csv, as_ndjson = call_api(body)
+    strategies = scan['strategies']
+    assert strategies
+
+    assert as_csv.status_code == 200
+    assert as_csv.headers['content-type'].startswith('text/csv')
+    assert as_csv.headers['content-disposition'].endswith('.csv')
+    rows = csv_rows(as_csv.content)
+    assert list(rows[0]) == list(COLUMNS)
+    assert [r['id'] for r in rows] == [s['id'] for s in strategies]
+    assert [r['rank'] for r in rows] == [str(i) for i in range(1, len(strategies) + 1)]
+    # Nested legs are written as JSON text
+    assert json.loads(rows[0]['legs']) == strategies[0]['legs']
+    assert all(r['error'] == '' for r in rows)
+
+    assert as_ndjson.headers['content-type'].startswith('application/x-ndjson')
+    rows = ndjson_rows(as_ndjson.content)
+    assert [list(r) for r in rows] == [['id', 'rank', 'legs']] * len(strategies)
+    assert rows[0] == {'id': strategies[0]['id'], 'rank': 1, 'legs': strategies[0]['legs']}
+
+
+def test_export_gzip(call_api):
+    async def body(client):
+        scan_id = (await client.get('/api/scan', params=SCAN)).headers['etag']
+        plain = await client.post('/api/export', json={'scan_id': scan_id, 'format': 'ndjson'})
+        zipped = await client.post('/api/export', json={
+            'scan_id': scan_id, 'format': 'ndjson', 'compression': 'gzip',
+        })
+        zipped_csv = await client.post('/api/export', json={'scan_id': scan_id, 'compression': 'gzip'})
+        plain_csv = await client.post('/api/export', json={'scan_id': scan_id})
+        return plain, zipped, plain_csv, zipped_csv
+
+    plain, zipped, plain_csv, zipped_csv = call_api(body)
+    for raw, compressed in ((plain, zipped), (plain_csv, zipped_csv)):
+        assert compressed.headers['content-type'] == 'application/gzip'
+        assert compressed.headers['content-disposition'].endswith('.gz')
+        # The transport must not have decoded it: the body is the gzip stream itself
+        assert compressed.content[:2] == b'\x1f\x8b'
+        assert gzip.decompress(compressed.content) == raw.content
+
+
+def test_export_tickers_writes_a_row_for_tickers_without_strategies(call_api, index, monkeypatch):
+    scan_strategies = index.strategy_engine.scan_strategies
+
+    async def nothing_for_nope(ticker, **kwargs):
+        return [] if ticker == 'NOPE' else await scan_strategies(ticker=ticker, **kwargs)
+
+    monkeypatch.setattr(index.strategy_engine, 'scan_strategies', nothing_for_nope)
+
+    async def body(client):
+        return await client.post('/api/export', json={
+            'tickers': ['spy', 'NOPE', 'SPY'], 'columns': ['ticker', 'id', 'rank', 'currentPrice', 'error'],
+            'max_strategies': 3,
+        })
+
+    response = call_api(body)
+    assert response.status_code == 200
+    rows = csv_rows(response.content)
+    assert list(rows[0]) == ['ticker', 'id', 'rank', 'currentPrice', 'error']
+
+    # Tickers are deduplicated and upper-cased
+    spy = [r for r in rows if r['ticker'] == 'SPY']
+    assert [r['rank'] for r in spy] == ['1', '2', '3']
+    assert all(r['id'] and not r['error'] for r in spy)
+
+    missing = [r for r in rows if r['ticker'] == 'NOPE']
+    assert len(missing) == 1
+    assert missing[0]['id'] == '' and missing[0]['rank'] == ''
+    assert float(missing[0]['currentPrice']) > 0
+    assert missing[0]['error'] == 'No viable strategies found'
+    assert len(rows) == 4
+
+
+def test_export_unknown_scan_id_is_404(call_api):
+    async def body(client):
+        return await client.post('/api/export', json={'scan_id': 'W/"0000"'})
+
+    response = call_api(body)
+    assert response.status_code == 404
+    assert 'Scan not found' in response.json()['error']
+
+
+@pytest.mark.parametrize('payload', [
+    {'scan_id': 'W/"0000"', 'columns': ['bogus']},
+    {'tickers': ['SPY'], 'columns': ['ticker', 'bogus']},
+    {'tickers': ['SPY'], 'format': 'xlsx'},
+    {'tickers': ['SPY'], 'compression': 'brotli'},
+    {'tickers': ['SPY'], 'scan_id': 'W/"0000"'},
+    {},
+    {'tickers': [' ']},
+])
+def test_export_rejects_bad_requests(call_api, payload):
+    async def body(client):
+        return await client.post('/api/export', json=payload)
+
+    response = call_api(body)
+    assert response.status_code == 400
+    assert response.json()['detail']
+
+
+def test_parquet_without_pyarrow_is_rejected(call_api, monkeypatch, index):
+    monkeypatch.setattr(index, 'FORMATS', {k: v for k, v in FORMATS.items() if k != 'parquet'})
+
+    async def body(client):
+        return await client.post('/api/export', json={'tickers': ['SPY'], 'format': 'parquet'})
+
+    response = call_api(body)
+    assert response.status_code == 400
+    assert 'csv, ndjson' in response.json()['detail']
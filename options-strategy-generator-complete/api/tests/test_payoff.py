@@ -0,0 +1,105 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from strategies import payoff
+from strategies.payoff import breakevens, date_offsets, payoff_grid, price_grid, strategy_payoff
+from strategies.portfolio import Position
+
+
+def bull_call_spread(days=30):
+    """Long the 100 call, short the 110 call, for a $4.00 debit"""
+    return {
+        'id': 'bull-call', 'ticker': 'TEST', 'current_price': 100.0, 'net_premium': 400.0,
+        'capital_required': 400.0, 'expiration_date': (date.today() + timedelta(days=days)).isoformat(),
+        'legs': [
+            {'type': 'call', 'strike': 100.0, 'quantity': 1, 'iv': 0.25},
+            {'type': 'call', 'strike': 110.0, 'quantity': -1, 'iv': 0.22},
+        ],
+    }
+
+
+def expected_expiration_pnl(prices):
+    """Hand-computed payoff of the spread at expiration, in dollars"""
+    return (np.clip(prices - 100.0, 0.0, 10.0) - 4.0) * 100.0
+
+
+def test_breakevens_interpolate_zero_crossings():
+    prices = np.array([90.0, 95.0, 100.0, 105.0, 110.0])
+    # Crosses between 95 and 100 and touches zero exactly at 110
+    pnl = np.array([-100.0, -50.0, 50.0, 20.0, 0.0])
+    np.testing.assert_allclose(breakevens(prices, pnl), [97.5, 110.0])
+    assert len(breakevens(prices, np.full(5, 10.0))) == 0
+
+
+def test_price_grid_includes_spot_and_strikes():
+    grid = price_grid(100.0, [93.3, 110.0, 500.0], price_range=0.25, points=11)
+    assert np.all(np.diff(grid) > 0)
+    assert {100.0, 93.3, 110.0} <= set(grid.tolist())
+    # Strikes outside the range are left out
+    assert grid.max() == 125.0
+    assert 500.0 not in grid
+
+
+def test_date_offsets():
+    np.testing.assert_array_equal(date_offsets(5), [0, 1, 2, 3, 4])
+    np.testing.assert_array_equal(date_offsets(30, steps=4), [0, 10, 19, 29])
+    assert len(date_offsets(0)) == 0
+
+
+def test_payoff_grid_broadcast_shape():
+    position = Position.from_strategy(bull_call_spread())
+    prices = np.linspace(80.0, 120.0, 41)
+    offsets = date_offsets(30, steps=6)
+    grid = payoff_grid(position, 100.0, prices, offsets)
+    # One row per date plus the expiration row
+    assert grid.shape == (len(offsets) + 1, len(prices))
+    assert np.all(np.isfinite(grid))
+    # Before expiration the spread stays between its floor and its cap
+    assert np.all(grid[:-1] >= -400.0) and np.all(grid[:-1] <= 600.0)
+
+
+def test_payoff_grid_matches_hand_computed_spread():
+    position = Position.from_strategy(bull_call_spread(), quantity=2)
+    prices = np.array([90.0, 100.0, 104.0, 107.5, 110.0, 130.0])
+    grid = payoff_grid(position, 100.0, prices, np.empty(0))
+    assert grid.shape == (1, len(prices))
+    np.testing.assert_allclose(grid[-1], 2 * expected_expiration_pnl(prices), atol=1e-9)
+
+
+def test_payoff_grid_rejects_oversized_grids(monkeypatch):
+    position = Position.from_strategy(bull_call_spread())
+    prices = np.linspace(80.0, 120.0, 100)
+    offsets = np.arange(10.0)
+    # 2 legs x 11 dates x 100 prices
+    monkeypatch.setattr(payoff, 'MAX_CELLS', 2 * 11 * 100 - 1)
+    with pytest.raises(ValueError):
+        payoff_grid(position, 100.0, prices, offsets)
+    monkeypatch.setattr(payoff, 'MAX_CELLS', 2 * 11 * 100)
+    assert payoff_grid(position, 100.0, prices, offsets).shape == (11, 100)
+
+
+def test_strategy_payoff_of_bull_call_spread():
+    result = strategy_payoff(bull_call_spread(), 100.0, points=81, dates=5)
+
+    np.testing.assert_allclose(result['breakevens'], [104.0])
+    assert result['max_profit'] == pytest.approx(600.0)
+    assert result['max_loss'] == pytest.approx(-400.0)
+    np.testing.assert_allclose(
+        result['expiration_pnl'], np.round(expected_expiration_pnl(result['prices']), 2), atol=0.01
+    )
+    assert len(result['dates']) == 5
+    assert result['pnl'].shape == (5, len(result['prices']))
+    assert {100.0, 110.0} <= set(result['prices'].tolist())
+
+
+def test_strategy_payoff_downsampling_keeps_strikes():
+    full = strategy_payoff(bull_call_spread(), 100.0, points=400, dates=3)
+    thin = strategy_payoff(bull_call_spread(), 100.0, points=400, dates=3, width=50)
+    assert len(thin['prices']) < len(full['prices'])
+    assert {100.0, 110.0} <= set(thin['prices'].tolist())
+    assert thin['pnl'].shape == (3, len(thin['prices']))
+    # Thinning only drops points; extremes and breakevens come from the full grid
+    np.testing.assert_array_equal(thin['breakevens'], full['breakevens'])
+    assert thin['max_profit'] == full['max_profit']
@@ -0,0 +1,94 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from data import polygon_client
+from data.polygon_client import PolygonClient
+from mock_polygon import MockPolygon, make_contracts
+
+
+def fetch_chain(ticker, min_dte, max_dte, page_size=250):
+    """(chain, requests the mock served) for one chain fetch"""
+    async def run():
+        async with MockPolygon(page_size=page_size) as mock:
+            client = PolygonClient('test', demo_fallback=False, base_url=mock.base_url)
+            try:
+                chain = await client.get_options_chain(ticker, min_dte, max_dte)
+            finally:
+                await client.close()
+            return chain, mock.requests
+    return asyncio.run(run())
+
+
+def contracts_within(ticker, min_dte, max_dte):
+    today = date.today()
+    lo = (today + timedelta(days=min_dte)).isoformat()
+    hi = (today + timedelta(days=max_dte)).isoformat()
+    return [c for c in make_contracts(ticker) if lo <= c['details']['expiration_date'] <= hi]
+
+
+def test_chain_follows_every_page():
+    expected = contracts_within('SPY', 0, 45)
+    chain, requests = fetch_chain('SPY', 0, 45, page_size=50)
+    assert len(chain) == len(expected)
+    assert requests == -(-len(expected) // 50)
+    assert set(chain.symbols) == {c['details']['ticker'] for c in expected}
+
+
+def test_single_page_chain():
+    expected = contracts_within('QQQ', 0, 10)
+    chain, requests = fetch_chain('QQQ', 0, 10)
+    assert len(chain) == len(expected)
+    assert requests == 1
+
+
+def test_chain_stops_at_page_cap(monkeypatch):
+    monkeypatch.setattr(polygon_client, 'CHAIN_MAX_PAGES', 3)
+    chain, requests = fetch_chain('SPY', 0, 90, page_size=20)
+    assert requests == 3
+    assert len(chain) == 60
+
+
+def test_empty_window_falls_back_to_contracts():
+    # No expiries in the window: the snapshot is empty, then the contracts endpoint is tried
+    chain, requests = fetch_chain('SPY', 200, 300)
+    assert chain is None
+    assert requests == 2
+
+
+def test_parse_snapshot_contract():
+    result = make_contracts('AAPL', strikes=1, expiries=(30,))[0]
+    row = PolygonClient._parse_snapshot_contract(result)
+    assert row == {
+        'symbol': result['details']['ticker'],
+        'strike': result['details']['strike_price'],
+        'expiry': result['details']['expiration_date'],
+        'type': 'call',
+        'bid': result['last_quote']['bid'],
+        'ask': result['last_quote']['ask'],
+        'iv': result['implied_volatility'],
+        'open_interest': result['open_interest'],
+    }
+
+
+def test_parse_snapshot_contract_without_quote():
+    result = make_contracts('AAPL', strikes=1, expiries=(30,))[1]
+    del result['last_quote'], result['implied_volatility'], result['open_interest']
+    row = PolygonClient._parse_snapshot_contract(result)
+    assert row['type'] == 'put'
+    assert row['bid'] is None and row['ask'] is None
+    assert row['iv'] is None and row['open_interest'] is None
+
+
+def test_parse_snapshot_contract_needs_details():
+    with pytest.raises(KeyError):
+        PolygonClient._parse_snapshot_contract({'last_quote': {'bid': 1.0, 'ask': 1.1}})
+
+
+def test_parsed_contracts_build_a_chain():
+    chain, _ = fetch_chain('MSFT', 0, 45)
+    today = date.today()
+    assert chain.as_of == today
+    assert (chain.mid > 0).all()
+    assert set(chain.dte) == {7, 14, 21, 30, 37, 44}
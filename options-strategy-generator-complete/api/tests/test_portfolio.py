@@ -0,0 +1,142 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from strategies.portfolio import GREEKS, PortfolioRiskEngine, Position, RiskConfig
+from strategies.pricing import CALL, PUT, black_scholes
+
+AS_OF = date(2026, 1, 5)
+EXPIRY = '2026-02-04'           # 30 days out
+SPOTS = {'SPY': 500.0, 'QQQ': 400.0}
+
+
+def strategy(id, ticker, legs, net_premium, capital, price):
+    return {
+        'id': id, 'ticker': ticker, 'legs': legs, 'net_premium': net_premium,
+        'capital_required': capital, 'current_price': price, 'expiration_date': EXPIRY,
+    }
+
+
+def book():
+    return [
+        Position.from_strategy(strategy('spy-call', 'SPY', [
+            {'type': 'call', 'strike': 510.0, 'quantity': 1, 'iv': 0.18},
+        ], 650.0, 650.0, 500.0), quantity=2),
+        Position.from_strategy(strategy('spy-put-spread', 'SPY', [
+            {'type': 'put', 'strike': 480.0, 'quantity': -1, 'iv': 0.22},
+            {'type': 'put', 'strike': 470.0, 'quantity': 1, 'iv': 0.24},
+        ], -300.0, 700.0, 500.0)),
+        Position.from_strategy(strategy('qqq-covered-call', 'QQQ', [
+            {'type': 'stock', 'strike': 395.0, 'quantity': 1},
+            {'type': 'call', 'strike': 420.0, 'quantity': -1, 'iv': 0.25},
+        ], 39000.0, 39000.0, 395.0)),
+    ]
+
+
+def hand_priced(position, spot, rate=0.05):
+    """Greeks and value of one position straight from Black-Scholes, leg by leg"""
+    years = 30 / 365.0
+    scale = 100.0 * position.quantity
+    greeks = dict.fromkeys(GREEKS, 0.0)
+    value = position.stock_quantity * (spot - position.entry_price)
+    greeks['delta'] += position.stock_quantity * scale
+    for code, strike, quantity, iv in position.legs:
+        priced = black_scholes(spot, np.array([strike]), years, np.array([iv]), rate, np.array([float(code)]))
+        value += float(priced['price'][0]) * quantity
+        for name in GREEKS:
+            greeks[name] += float(priced[name][0]) * quantity * scale
+    return greeks, value * scale
+
+
+def test_from_strategy_reads_legs():
+    spy_call, spread, covered = book()
+    assert spy_call.legs == ((CALL, 510.0, 1.0, 0.18),)
+    assert spy_call.quantity == 2
+    assert [leg[0] for leg in spread.legs] == [PUT, PUT]
+    assert covered.stock_quantity == 1
+    assert covered.entry_price == 395.0
+    with pytest.raises(ValueError):
+        Position.from_strategy({'id': 'empty', 'ticker': 'SPY', 'legs': []})
+
+
+def test_totals_are_sums_of_positions():
+    positions = book()
+    result = PortfolioRiskEngine().evaluate(positions, SPOTS, as_of=AS_OF)
+
+    singles = [PortfolioRiskEngine().evaluate([p], SPOTS, as_of=AS_OF) for p in positions]
+    for name in GREEKS:
+        assert result['greeks'][name] == pytest.approx(sum(s['greeks'][name] for s in singles))
+    assert result['value'] == pytest.approx(sum(s['value'] for s in singles))
+    assert result['pnl'] == pytest.approx(sum(s['pnl'] for s in singles))
+    assert result['margin']['strategy'] == pytest.approx(650.0 * 2 + 700.0 + 39000.0)
+    np.testing.assert_allclose(
+        result['scenarios']['pnl'], sum(np.array(s['scenarios']['pnl']) for s in singles)
+    )
+    assert result['greeks']['dollar_delta'] == pytest.approx(
+        sum(s['greeks']['delta'] * SPOTS[p.ticker] for s, p in zip(singles, positions))
+    )
+
+
+def test_position_values_match_black_scholes():
+    positions = book()
+    result = PortfolioRiskEngine().evaluate(positions, SPOTS, as_of=AS_OF)
+
+    for position, detail in zip(positions, result['positions']):
+        greeks, value = hand_priced(position, SPOTS[position.ticker])
+        assert detail['id'] == position.id
+        for name in GREEKS:
+            assert detail['greeks'][name] == pytest.approx(greeks[name], abs=1e-9)
+        assert detail['value'] == pytest.approx(value)
+        assert detail['pnl'] == pytest.approx(value - position.net_premium * position.quantity)
+
+    # The unshocked scenario is no change
+    spot_zero = result['scenarios']['spot_shocks'].index(0.0)
+    vol_zero = result['scenarios']['vol_shocks'].index(0.0)
+    assert result['scenarios']['pnl'][spot_zero][vol_zero] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_spot_change_recomputes_only_that_underlying():
+    engine = PortfolioRiskEngine()
+    positions = book()
+    first = engine.evaluate(positions, SPOTS, as_of=AS_OF)
+    assert (first['recomputed'], first['reused']) == (3, 0)
+
+    again = engine.evaluate(positions, SPOTS, as_of=AS_OF)
+    assert (again['recomputed'], again['reused']) == (0, 3)
+    assert again['greeks'] == first['greeks']
+
+    moved = engine.evaluate(positions, {**SPOTS, 'QQQ': 410.0}, as_of=AS_OF)
+    assert (moved['recomputed'], moved['reused']) == (1, 2)
+    assert moved['positions'][:2] == first['positions'][:2]
+    assert moved['positions'][2]['value'] != first['positions'][2]['value']
+    greeks, value = hand_priced(positions[2], 410.0)
+    assert moved['positions'][2]['value'] == pytest.approx(value)
+    assert moved['by_underlying']['SPY']['greeks'] == first['by_underlying']['SPY']['greeks']
+
+    # Editing one position reprices just that one
+    edited = positions[:2] + [Position.from_strategy(strategy('qqq-covered-call', 'QQQ', [
+        {'type': 'stock', 'strike': 395.0, 'quantity': 1},
+        {'type': 'call', 'strike': 425.0, 'quantity': -1, 'iv': 0.25},
+    ], 39000.0, 39000.0, 395.0))]
+    assert engine.evaluate(edited, SPOTS, as_of=AS_OF)['recomputed'] == 1
+    assert engine.stats() == {'cached': 5, 'computed': 5, 'reused': 7}
+
+
+def test_contribution_cache_is_bounded_lru():
+    engine = PortfolioRiskEngine(RiskConfig(cache_size=3))
+    positions = book()
+    engine.evaluate(positions, SPOTS, as_of=AS_OF)
+    # Touch the first position so the second is least recently used
+    engine.evaluate(positions[:1], SPOTS, as_of=AS_OF)
+    engine.evaluate(positions[2:], {'QQQ': 410.0}, as_of=AS_OF)
+    assert engine.stats()['cached'] == 3
+
+    result = engine.evaluate(positions[:2], SPOTS, as_of=AS_OF)
+    assert (result['recomputed'], result['reused']) == (1, 1)
+    assert result['positions'][1]['id'] == 'spy-put-spread'
+
+
+def test_missing_spot_is_rejected():
+    with pytest.raises(ValueError):
+        PortfolioRiskEngine().evaluate(book(), {'SPY': 500.0}, as_of=AS_OF)
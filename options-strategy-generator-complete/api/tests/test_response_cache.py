@@ -0,0 +1,103 @@
+import asyncio
+
+from data.response_cache import ResponseCache, etag_for, etag_matches
+
+SCAN = {'ticker': 'SPY', 'min_dte': 30, 'max_dte': 45, 'max_strategies': 5}
+
+
+def test_etag_is_weak_and_derived_from_the_key():
+    etag = etag_for(('scan', 'SPY', 'v1'))
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert etag == etag_for(('scan', 'SPY', 'v1'))
+    assert etag != etag_for(('scan', 'SPY', 'v2'))
+
+
+def test_etag_matches_uses_weak_comparison():
+    etag = etag_for('key')
+    strong = etag[2:]
+    assert etag_matches(etag, etag)
+    assert etag_matches(strong, etag)
+    assert etag_matches(etag, strong)
+    assert not etag_matches(etag_for('other'), etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('', etag)
+
+
+def test_etag_matches_wildcard_and_lists():
+    etag = etag_for('key')
+    assert etag_matches('*', etag)
+    assert etag_matches(' * ', etag)
+    assert etag_matches(f'{etag_for("a")}, {etag}', etag)
+    assert etag_matches(f'{etag_for("a")},{etag[2:]} ,{etag_for("b")}', etag)
+    assert not etag_matches(f'{etag_for("a")}, {etag_for("b")}', etag)
+    # An unquoted opaque tag is not the same entity tag
+    assert not etag_matches(etag[3:-1], etag)
+
+
+def test_get_by_etag_finds_rendered_response():
+    cache = ResponseCache()
+    renders = []
+
+    async def render():
+        renders.append(1)
+        return b'{"ok":true}'
+
+    async def run():
+        first = await cache.get_or_render(('scan', 'SPY'), render)
+        again = await cache.get_or_render(('scan', 'SPY'), render)
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert again is first
+    assert len(renders) == 1
+    assert first.etag == etag_for(('scan', 'SPY'))
+
+    # Clients may send the scan id with or without the W/ prefix and quotes
+    for scan_id in (first.etag, first.etag[2:], first.etag[3:-1]):
+        assert cache.get_by_etag(scan_id) is first
+    assert cache.get_by_etag(etag_for('unknown')) is None
+
+    cache.invalidate(('scan', 'SPY'))
+    assert cache.get_by_etag(first.etag) is None
+
+
+def test_none_bodies_are_not_cached_or_addressable():
+    cache = ResponseCache()
+
+    async def render():
+        return None
+
+    assert asyncio.run(cache.get_or_render('key', render)) is None
+    assert cache.get_by_etag(etag_for('key')) is None
+
+
+def test_get_scan_honours_if_none_match(call_api, index):
+    async def body(client):
+        first = await client.get('/api/scan', params=SCAN)
+        etag = first.headers['etag']
+        not_modified = await client.get('/api/scan', params=SCAN, headers={'If-None-Match': etag})
+        listed = await client.get('/api/scan', params=SCAN, headers={'If-None-Match': f'W/"other", {etag}'})
+        wildcard = await client.get('/api/scan', params=SCAN, headers={'If-None-Match': '*'})
+        changed = await client.get('/api/scan', params={**SCAN, 'max_strategies': 4}, headers={'If-None-Match': etag})
+        # POST scans always return a body
+        posted = await client.post('/api/scan', json=SCAN, headers={'If-None-Match': etag})
+        return first, not_modified, listed, wildcard, changed, posted
+
+    before = index.response_cache.not_modified
+    first, not_modified, listed, wildcard, changed, posted = call_api(body)
+
+    assert first.status_code == 200
+    assert first.json()['success']
+    assert first.headers['etag'].startswith('W/"')
+    for response in (not_modified, listed, wildcard):
+        assert response.status_code == 304
+        assert response.content == b''
+        assert response.headers['etag'] == first.headers['etag']
+    assert index.response_cache.not_modified == before + 3
+
+    assert changed.status_code == 200
+    assert changed.headers['etag'] != first.headers['etag']
+    assert posted.status_code == 200
+    assert posted.json()['strategies'] == first.json()['strategies']
+    # The first response's ETag is its scan id
+    assert index.response_cache.get_by_etag(first.headers['etag']).body == first.content
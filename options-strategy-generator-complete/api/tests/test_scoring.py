@@ -0,0 +1,126 @@
+import asyncio
+import copy
+import dataclasses
+
+import numpy as np
+import pytest
+
+from strategies import registry
+from strategies.options_engine import OptionsStrategyEngine
+from strategies.scoring import build_components, profile_weights, score
+
+
+def candidates():
+    legs = [
+        {'type': 'put', 'strike': 95.0, 'quantity': -1, 'open_interest': 1200, 'spread': 0.04},
+        {'type': 'put', 'strike': 90.0, 'quantity': 1, 'open_interest': 800, 'spread': 0.06},
+    ]
+    return [
+        {'probability_of_profit': 0.72, 'max_profit': 120.0, 'max_loss': -380.0, 'net_premium': -120.0,
+         'legs': legs, 'expected_value': 8.0, 'cvar': -360.0},
+        {'probability_of_profit': 0.38, 'max_profit': 1500.0, 'max_loss': -300.0, 'net_premium': 300.0,
+         'legs': [{'type': 'call', 'strike': 100.0, 'quantity': 1, 'open_interest': 5000, 'spread': 0.02}],
+         'expected_value': 40.0, 'cvar': -300.0},
+        {'probability_of_profit': 0.55, 'max_profit': 200.0, 'max_loss': -9000.0, 'net_premium': -9800.0,
+         'legs': [{'type': 'stock', 'strike': None, 'quantity': 100}], 'expected_value': -5.0, 'cvar': -1500.0},
+    ]
+
+
+def test_scores_are_deterministic():
+    first = score(build_components(candidates(), 0.6), 1.1)
+    second = score(build_components(copy.deepcopy(candidates()), 0.6), 1.1)
+    np.testing.assert_array_equal(first, second)
+    assert ((first >= 25) & (first <= 95)).all()
+
+
+def test_risk_profile_tilts_the_weights():
+    for multiplier in (0.85, 1.0, 1.1):
+        assert sum(profile_weights(multiplier).values()) == pytest.approx(1.0)
+    components = build_components(candidates(), 0.5)
+    cautious, bold = score(components, 0.85), score(components, 1.1)
+    # The high-POP credit spread gains relative to the long call when cautious
+    assert cautious[0] - cautious[1] > bold[0] - bold[1]
+
+
+def scan(engine, snapshot, **params):
+    return asyncio.run(engine.scan_strategies(snapshot.ticker, snapshot=snapshot, **params))
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = OptionsStrategyEngine(None)
+    engine.evaluations = 0
+    evaluate = engine.evaluate
+
+    def counted(*args, **kwargs):
+        engine.evaluations += 1
+        return evaluate(*args, **kwargs)
+
+    monkeypatch.setattr(engine, 'evaluate', counted)
+    return engine
+
+
+def test_scans_are_deterministic(make_snapshot):
+    snapshot = make_snapshot()
+    first = scan(OptionsStrategyEngine(None), snapshot)
+    second = scan(OptionsStrategyEngine(None), snapshot)
+    assert first
+    assert first == second
+
+
+def test_scan_is_memoized_per_snapshot_version(engine, make_snapshot):
+    snapshot = make_snapshot()
+    first = scan(engine, snapshot)
+    # Same data in a new snapshot object
+    again = scan(engine, dataclasses.replace(snapshot, stale=True))
+    assert engine.evaluations == 1
+    assert again == first
+    # Callers get copies, so mutating a result does not touch the cache
+    again[0]['confidence_score'] = -1
+    assert scan(engine, snapshot)[0]['confidence_score'] == first[0]['confidence_score']
+    assert engine.evaluations == 1
+
+    # Other parameters are another entry
+    scan(engine, snapshot, risk_profile='conservative')
+    assert engine.evaluations == 2
+
+    # New market data is a new version
+    scan(engine, dataclasses.replace(snapshot, timestamp='later'))
+    assert engine.evaluations == 3
+
+
+def test_registry_change_invalidates_scans(engine, make_snapshot):
+    snapshot = make_snapshot()
+    scan(engine, snapshot)
+    scan(engine, snapshot)
+    assert engine.evaluations == 1
+
+    existing = registry.all_strategies()[0]
+    extra = copy.copy(existing)
+    extra.name = f'{existing.name}_copy'
+    before = registry.registry_version()
+    registry.register_strategy(extra)
+    try:
+        assert registry.registry_version() != before
+        scan(engine, snapshot)
+        assert engine.evaluations == 2
+    finally:
+        registry.unregister_strategy(extra.name)
+    scan(engine, snapshot)
+    assert engine.evaluations == 3
+
+
+def test_scans_without_a_version_are_not_cached(engine, make_snapshot):
+    class Unversioned:
+        def __init__(self, snapshot):
+            self._snapshot = snapshot
+
+        def __getattr__(self, name):
+            if name == 'version':
+                raise AttributeError(name)
+            return getattr(self._snapshot, name)
+
+    snapshot = Unversioned(make_snapshot())
+    scan(engine, snapshot)
+    scan(engine, snapshot)
+    assert engine.evaluations == 2
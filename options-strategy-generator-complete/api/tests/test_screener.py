@@ -0,0 +1,222 @@
+import asyncio
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from strategies.screener import REQUESTS_PER_SCAN, ScreenerIndex, WatchlistScheduler
+
+
+def row(ticker, id, confidence, type='income', complexity='beginner', capital=500.0, pop=0.6):
+    return {
+        'ticker': ticker, 'id': id, 'confidence': confidence, 'type': type,
+        'complexity': complexity, 'capitalRequired': capital, 'probabilityOfProfit': pop,
+    }
+
+
+def filled_index():
+    index = ScreenerIndex()
+    index.update('SPY', [
+        row('SPY', 'spy-1', 80.0),
+        row('SPY', 'spy-2', 60.0, type='directional', capital=2000.0),
+        row('SPY', 'spy-3', 40.0, pop=0.3),
+    ])
+    index.update('QQQ', [
+        row('QQQ', 'qqq-1', 90.0, type='directional'),
+        row('QQQ', 'qqq-2', 60.0, complexity='advanced'),
+        row('QQQ', 'qqq-3', None),
+    ])
+    return index
+
+
+def ids(rows):
+    return [r['id'] for r in rows]
+
+
+def test_query_ranks_by_confidence_then_ticker_and_id():
+    index = filled_index()
+    assert ids(index.query()) == ['qqq-1', 'spy-1', 'qqq-2', 'spy-2', 'spy-3', 'qqq-3']
+    assert ids(index.query(limit=2)) == ['qqq-1', 'spy-1']
+    assert len(index) == 6
+
+
+def test_query_merges_the_narrowest_lists():
+    index = filled_index()
+    assert ids(index.query(tickers=['SPY'])) == ['spy-1', 'spy-2', 'spy-3']
+    assert ids(index.query(tickers=['SPY', 'QQQ', 'SPY'])) == ids(index.query())
+    assert ids(index.query(types=['directional'])) == ['qqq-1', 'spy-2']
+    assert ids(index.query(types=['income', 'directional'])) == ids(index.query())
+    assert ids(index.query(tickers=['QQQ'], types=['income'])) == ['qqq-2', 'qqq-3']
+    assert index.query(tickers=['IWM']) == []
+
+
+def test_query_filters():
+    index = filled_index()
+    assert ids(index.query(complexity=['advanced'])) == ['qqq-2']
+    assert ids(index.query(max_capital=1000.0)) == ['qqq-1', 'spy-1', 'qqq-2', 'spy-3', 'qqq-3']
+    assert ids(index.query(min_probability=0.5, tickers=['SPY'])) == ['spy-1', 'spy-2']
+
+
+def test_min_confidence_stops_at_the_first_lower_row():
+    index = filled_index()
+    seen = []
+    candidates = index._candidates
+
+    def counted(types, tickers):
+        for entry in candidates(types, tickers):
+            seen.append(entry[1]['id'])
+            yield entry
+
+    index._candidates = counted
+    assert ids(index.query(min_confidence=60.0)) == ['qqq-1', 'spy-1', 'qqq-2', 'spy-2']
+    # The walk ends at the first row under the threshold instead of scanning on
+    assert seen == ['qqq-1', 'spy-1', 'qqq-2', 'spy-2', 'spy-3']
+
+
+def test_update_replaces_a_tickers_rows():
+    index = filled_index()
+    index.update('SPY', [row('SPY', 'spy-new', 95.0, type='volatility')])
+    assert ids(index.query()) == ['spy-new', 'qqq-1', 'qqq-2', 'qqq-3']
+    assert ids(index.query(types=['directional'])) == ['qqq-1']
+    assert index.stats()['types'] == {'directional': 1, 'income': 2, 'volatility': 1}
+
+    index.remove('QQQ')
+    assert ids(index.query()) == ['spy-new']
+    assert index.tickers == ['SPY']
+    assert index.stats()['types'] == {'volatility': 1}
+
+
+def test_rows_older_than_max_age_are_not_served():
+    index = ScreenerIndex(max_age=60.0)
+    index.update('SPY', [row('SPY', 'spy-1', 80.0)], scanned_at=time.time() - 120.0)
+    index.update('QQQ', [row('QQQ', 'qqq-1', 70.0)])
+    assert ids(index.query()) == ['qqq-1']
+    assert index.query()[0]['scannedAt']
+
+
+def scheduler(scan, **kwargs):
+    kwargs.setdefault('rate_limit', 10.0)
+    kwargs.setdefault('rate_share', 0.5)
+    return WatchlistScheduler(scan, ['SPY', 'QQQ'], **kwargs)
+
+
+async def found(ticker):
+    return True
+
+
+def test_charge_spends_the_background_budget():
+    sched = scheduler(found)
+    assert sched.budget == 5.0
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        sched._charge(5)
+        first = sched._budget_until - now
+        sched._charge(10)
+        return first, sched._budget_until - now
+
+    first, second = asyncio.run(run())
+    # 5 requests at 5 per second take a second; the next charge queues behind it
+    assert first == pytest.approx(1.0, abs=0.05)
+    assert second == pytest.approx(3.0, abs=0.05)
+    assert sched.stats()['requests_per_scan'] == 7.5
+
+
+def test_unlimited_scheduler_charges_nothing_to_wait_for():
+    sched = scheduler(found, rate_limit=None)
+
+    async def run():
+        await sched._scan_one('SPY', asyncio.Semaphore(0))
+
+    asyncio.run(run())
+    assert sched._budget_until == 0.0
+    assert sched.stats()['requests_per_scan'] == REQUESTS_PER_SCAN
+
+
+def test_scans_are_charged_what_they_send():
+    sent = {'SPY': 3, 'QQQ': 7}
+    tallies = []
+
+    class Tally:
+        requests = 0
+
+    @contextmanager
+    def count_requests():
+        tallies.append(Tally())
+        yield tallies[-1]
+
+    async def scan(ticker):
+        tallies[-1].requests = sent[ticker]
+        if ticker == 'QQQ':
+            raise RuntimeError('upstream down')
+        return True
+
+    sched = scheduler(scan, count_requests=count_requests)
+
+    async def run():
+        slots = asyncio.Semaphore(0)
+        await sched._scan_one('SPY', slots)
+        await sched._scan_one('QQQ', slots)
+        return slots
+
+    slots = asyncio.run(run())
+    # Failed scans are charged too, and every scan gives its slot back
+    assert sched.scans == 2
+    assert sched.requests == 10
+    assert sched.stats()['requests_per_scan'] == 5.0
+    assert slots._value == 2
+    assert sched.running == 0
+
+    # Without count_requests every scan costs the minimum
+    plain = scheduler(found)
+
+    async def run_plain():
+        await plain._scan_one('SPY', asyncio.Semaphore(0))
+
+    asyncio.run(run_plain())
+    assert plain.requests == REQUESTS_PER_SCAN
+
+
+def test_interval_is_stretched_to_fit_the_budget():
+    tickers = [f'T{i}' for i in range(10)]
+    # 10 tickers x 2 requests at 0.5 requests/second need 40s per pass
+    sched = WatchlistScheduler(found, tickers, interval=30.0, rate_limit=1.0, rate_share=0.5)
+    assert sched.interval == pytest.approx(40.0)
+    assert WatchlistScheduler(found, tickers, interval=60.0, rate_limit=1.0).interval == 60.0
+
+
+def test_scans_wait_for_the_budget_to_refill():
+    scanned = []
+
+    class Tally:
+        requests = 10
+
+    @contextmanager
+    def count_requests():
+        yield Tally()
+
+    async def scan(ticker):
+        scanned.append((ticker, asyncio.get_running_loop().time()))
+        return True
+
+    # 50 requests/second for the screener; each scan sends 10, so scans are 0.2s apart.
+    # Scans are charged when they finish, so only one at a time makes the spacing exact
+    sched = scheduler(
+        scan, interval=0.2, jitter=0.0, concurrency=1, rate_limit=100.0, count_requests=count_requests
+    )
+
+    async def run():
+        await sched.start()
+        await asyncio.sleep(0.75)
+        await sched.stop()
+
+    asyncio.run(run())
+    stats = sched.stats()
+    assert stats['budget_waits'] >= 1
+    assert stats['requests_per_scan'] == 10
+    assert not stats['active']
+    gaps = [b[1] - a[1] for a, b in zip(scanned, scanned[1:])]
+    assert len(scanned) >= 3
+    assert min(gaps) >= 0.19
+    assert [t for t, _ in scanned[:2]] == ['SPY', 'QQQ']
@@ -0,0 +1,198 @@
+import itertools
+import math
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from data.chain import OptionChain
+from strategies.pricing import CALL, PUT, DAYS_PER_YEAR, black_scholes_price
+from strategies.search import SearchConfig, SpreadSearch
+
+SPOT = 100.0
+DAYS = 30
+RATE = 0.05
+SIGMA = 0.30
+STRIKES = [80.0 + 2.5 * i for i in range(17)]
+AS_OF = date(2026, 1, 5)
+T = DAYS / DAYS_PER_YEAR
+
+
+def price(strike, option_type):
+    return float(black_scholes_price(SPOT, strike, T, SIGMA, RATE, option_type))
+
+
+def make_chain():
+    """One expiry, every strike quoted 10 cents wide around its Black-Scholes value"""
+    records = []
+    for strike in STRIKES:
+        for kind, code in (('call', CALL), ('put', PUT)):
+            mid = price(strike, code)
+            records.append({
+                'strike': strike,
+                'expiry': (AS_OF + timedelta(days=DAYS)).isoformat(),
+                'type': kind,
+                'bid': mid - 0.05,
+                'ask': mid + 0.05,
+                'iv': SIGMA,
+                'open_interest': 100,
+            })
+    return OptionChain.from_records('TEST', records, as_of=AS_OF)
+
+
+def search(**config):
+    return SpreadSearch(make_chain(), SPOT, DAYS, SearchConfig(**config), risk_free_rate=RATE)
+
+
+def prob_below(x):
+    """P(S_T < x) for lognormal S_T at SIGMA, computed independently of the search"""
+    d2 = (math.log(SPOT / x) + (RATE - 0.5 * SIGMA ** 2) * T) / (SIGMA * math.sqrt(T))
+    return 1.0 - 0.5 * (1.0 + math.erf(d2 / math.sqrt(2.0)))
+
+
+def fair(strike, option_type):
+    return price(strike, option_type) * math.exp(RATE * T)
+
+
+def put_credit_spreads(max_width=10.0, min_credit=0.10, max_capital=None):
+    """Every (short, long) put credit spread the search should consider, with its score"""
+    spreads = []
+    for long, short in itertools.combinations(STRIKES, 2):
+        credit = price(short, PUT) - price(long, PUT)
+        max_loss = (short - long) - credit
+        if credit < min_credit or max_loss <= 0 or short >= SPOT or short - long > max_width:
+            continue
+        if max_capital is not None and max_loss * 100 > max_capital:
+            continue
+        expected = credit - (fair(short, PUT) - fair(long, PUT))
+        spreads.append({'short': short, 'long': long, 'credit': credit, 'max_loss': max_loss,
+                        'expected': expected, 'score': expected / max_loss})
+    return spreads
+
+
+def call_credit_spreads(max_width=10.0, min_credit=0.10):
+    spreads = []
+    for short, long in itertools.combinations(STRIKES, 2):
+        credit = price(short, CALL) - price(long, CALL)
+        max_loss = (long - short) - credit
+        if credit < min_credit or max_loss <= 0 or short <= SPOT or long - short > max_width:
+            continue
+        expected = credit - (fair(short, CALL) - fair(long, CALL))
+        spreads.append({'short': short, 'long': long, 'credit': credit, 'max_loss': max_loss, 'expected': expected})
+    return spreads
+
+
+def test_best_vertical_matches_brute_force():
+    results = search(top_k=3).run(['put_credit_vertical'])['put_credit_vertical']
+    expected = sorted(put_credit_spreads(), key=lambda s: s['score'], reverse=True)[:3]
+    assert [(r['legs'][0][1], r['legs'][1][1]) for r in results] == [(s['short'], s['long']) for s in expected]
+    for result, spread in zip(results, expected):
+        assert result['score'] == pytest.approx(spread['score'], rel=1e-9)
+        assert result['credit'] == pytest.approx(spread['credit'], rel=1e-9)
+        assert result['capital'] == pytest.approx(spread['max_loss'] * 100, rel=1e-9)
+
+
+def test_best_iron_condor_matches_brute_force():
+    results = search(top_k=1, max_side_candidates=1000).run(['iron_condor'])['iron_condor']
+    best = None
+    for puts, calls in itertools.product(put_credit_spreads(), call_credit_spreads()):
+        if puts['short'] >= calls['short']:
+            continue
+        credit = puts['credit'] + calls['credit']
+        max_loss = max(puts['short'] - puts['long'], calls['long'] - calls['short']) - credit
+        if max_loss <= 0:
+            continue
+        score = (puts['expected'] + calls['expected']) / max_loss
+        if best is None or score > best[0]:
+            best = (score, (puts['long'], puts['short'], calls['short'], calls['long']), credit)
+    assert best is not None
+    assert tuple(leg[1] for leg in results[0]['legs']) == best[1]
+    assert results[0]['score'] == pytest.approx(best[0], rel=1e-9)
+    assert results[0]['credit'] == pytest.approx(best[2], rel=1e-9)
+
+
+def test_pruning_rules_hold():
+    s = search(max_capital=450.0, min_credit=0.25, max_width=10.0)
+    for option_type in (PUT, CALL):
+        c = s.verticals(option_type, credit=True)
+        assert len(c['credit'])
+        assert (c['capital'] <= 450.0).all()
+        assert (c['credit'] >= 0.25).all()
+        assert (c['width'] <= 10.0).all()
+        assert ((c['short'] < SPOT) if option_type == PUT else (c['short'] > SPOT)).all()
+    debit = s.verticals(CALL, credit=False)
+    assert (debit['max_loss'] >= 0.10).all() and (debit['capital'] <= 450.0).all()
+
+    condors = s.iron_condors()
+    assert len(condors['credit'])
+    assert (condors['short_put'] < condors['short_call']).all()
+    assert (condors['long_put'] < condors['short_put']).all() and (condors['short_call'] < condors['long_call']).all()
+    assert (condors['capital'] <= 450.0).all() and (condors['max_loss'] > 0).all()
+
+    # The pruned candidates are exactly the brute-force survivors
+    kept = {(short, long) for short, long in zip(s.verticals(PUT, credit=True)['short'], s.verticals(PUT, credit=True)['long'])}
+    survivors = {(p['short'], p['long']) for p in put_credit_spreads(min_credit=0.25, max_capital=450.0)}
+    assert kept == survivors
+
+
+def test_in_the_money_shorts_only_when_allowed():
+    assert (search(otm_shorts=False).verticals(PUT, credit=True)['short'] >= SPOT).any()
+    assert not (search().verticals(PUT, credit=True)['short'] >= SPOT).any()
+
+
+def test_side_candidates_cap_condor_inputs():
+    condors = search(max_side_candidates=2).iron_condors()
+    assert len(set(zip(condors['long_put'], condors['short_put']))) <= 2
+    assert len(set(zip(condors['short_call'], condors['long_call']))) <= 2
+
+
+def test_put_credit_spread_pop_and_breakeven():
+    c = search().verticals(PUT, credit=True)
+    i = int(np.flatnonzero((c['short'] == 95.0) & (c['long'] == 90.0))[0])
+    credit = price(95.0, PUT) - price(90.0, PUT)
+    breakeven = 95.0 - credit
+    assert c['credit'][i] == pytest.approx(credit, rel=1e-9)
+    assert c['max_profit'][i] == pytest.approx(credit, rel=1e-9)
+    assert c['max_loss'][i] == pytest.approx(5.0 - credit, rel=1e-9)
+    # Profitable above the breakeven
+    assert c['pop'][i] == pytest.approx(1.0 - prob_below(breakeven), abs=1e-6)
+
+
+def test_call_debit_spread_pop_and_breakeven():
+    c = search().verticals(CALL, credit=False)
+    i = int(np.flatnonzero((c['long'] == 100.0) & (c['short'] == 105.0))[0])
+    debit = price(100.0, CALL) - price(105.0, CALL)
+    assert c['max_loss'][i] == pytest.approx(debit, rel=1e-9)
+    assert c['max_profit'][i] == pytest.approx(5.0 - debit, rel=1e-9)
+    assert c['pop'][i] == pytest.approx(1.0 - prob_below(100.0 + debit), abs=1e-6)
+
+
+def test_iron_condor_and_straddle_pop():
+    s = search(max_side_candidates=1000)
+    c = s.iron_condors()
+    i = int(np.flatnonzero(
+        (c['long_put'] == 85.0) & (c['short_put'] == 90.0) & (c['short_call'] == 110.0) & (c['long_call'] == 115.0)
+    )[0])
+    credit = price(90.0, PUT) - price(85.0, PUT) + price(110.0, CALL) - price(115.0, CALL)
+    assert c['max_loss'][i] == pytest.approx(5.0 - credit, rel=1e-9)
+    assert c['pop'][i] == pytest.approx(prob_below(110.0 + credit) - prob_below(90.0 - credit), abs=1e-6)
+
+    straddles = s.long_straddles()
+    j = int(np.flatnonzero(straddles['strike'] == 100.0)[0])
+    debit = price(100.0, CALL) + price(100.0, PUT)
+    assert straddles['max_loss'][j] == pytest.approx(debit, rel=1e-9)
+    assert straddles['pop'][j] == pytest.approx(prob_below(100.0 - debit) + 1.0 - prob_below(100.0 + debit), abs=1e-6)
+
+
+def test_short_strangles_use_otm_strikes():
+    c = search().short_strangles()
+    assert len(c['credit'])
+    assert (c['put'] < SPOT).all() and (c['call'] > SPOT).all()
+    assert np.isinf(c['max_loss']).all()
+
+
+def test_top_k_is_sorted_best_first():
+    for name, results in search(top_k=5, max_side_candidates=1000).run().items():
+        scores = [r['score'] for r in results]
+        assert scores == sorted(scores, reverse=True), name
+        assert len(results) <= 5
@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+import pytest
+
+from strategies.pricing import CALL, black_scholes_price
+from strategies.simulation import SimulationConfig, StrategyBook, derive_seed, evaluate_strategies
+
+SPOT = 100.0
+SIGMA = 0.30
+YEARS = 0.25
+RATE = 0.05
+
+LONG_CALL = {'legs': [{'type': 'call', 'strike': 100.0, 'quantity': 1}], 'net_premium': 300.0}
+PUT_CREDIT_SPREAD = {
+    'legs': [{'type': 'put', 'strike': 95.0, 'quantity': -1}, {'type': 'put', 'strike': 90.0, 'quantity': 1}],
+    'net_premium': -120.0,
+}
+COVERED_CALL = {
+    'legs': [{'type': 'stock', 'strike': None, 'quantity': 1}, {'type': 'call', 'strike': 105.0, 'quantity': -1}],
+    'net_premium': -150.0,
+}
+STRATEGIES = [LONG_CALL, PUT_CREDIT_SPREAD, COVERED_CALL]
+
+
+def run(model='gbm', **config):
+    return evaluate_strategies(STRATEGIES, SPOT, SIGMA, YEARS, RATE, SimulationConfig(model=model, **config), seed=7)
+
+
+@pytest.mark.parametrize('model', ['gbm', 'jump_diffusion'])
+def test_same_seed_same_results(model):
+    first, second = run(model), run(model)
+    for name in ('pop', 'expected_value', 'cvar'):
+        np.testing.assert_array_equal(first[name], second[name])
+    other = evaluate_strategies(STRATEGIES, SPOT, SIGMA, YEARS, RATE, SimulationConfig(model=model), seed=8)
+    assert not np.array_equal(first['expected_value'], other['expected_value'])
+
+
+@pytest.mark.parametrize('model', ['gbm', 'jump_diffusion'])
+def test_chunking_does_not_change_results(model):
+    whole = run(model, n_paths=10000, chunk_size=10000)
+    for chunk_size in (1000, 4096, 333):
+        chunked = run(model, n_paths=10000, chunk_size=chunk_size)
+        np.testing.assert_array_equal(chunked['pop'], whole['pop'])
+        np.testing.assert_allclose(chunked['expected_value'], whole['expected_value'], rtol=1e-12)
+        np.testing.assert_allclose(chunked['cvar'], whole['cvar'], rtol=1e-12)
+
+
+def test_gbm_long_call_matches_closed_form():
+    n_paths = 200000
+    result = evaluate_strategies([LONG_CALL], SPOT, SIGMA, YEARS, RATE, SimulationConfig(n_paths=n_paths), seed=1)
+
+    # Profitable when S_T exceeds strike plus premium: N(d2) at that level
+    breakeven = 100.0 + LONG_CALL['net_premium'] / 100.0
+    d2 = (math.log(SPOT / breakeven) + (RATE - 0.5 * SIGMA ** 2) * YEARS) / (SIGMA * math.sqrt(YEARS))
+    pop = 0.5 * (1.0 + math.erf(d2 / math.sqrt(2.0)))
+    assert result['pop'][0] == pytest.approx(pop, abs=4 * math.sqrt(pop * (1 - pop) / n_paths))
+
+    # Undiscounted expected payoff minus the premium, per contract
+    expected = (float(black_scholes_price(SPOT, 100.0, YEARS, SIGMA, RATE, CALL)) * math.exp(RATE * YEARS) - 3.0) * 100
+    assert result['expected_value'][0] == pytest.approx(expected, abs=10.0)
+    # The worst 5% lose the whole premium
+    assert result['cvar'][0] == pytest.approx(-300.0)
+
+
+def test_defined_risk_cvar_is_bounded_by_max_loss():
+    result = run()
+    # Put credit spread: $5 wide for a $1.20 credit
+    assert result['cvar'][1] >= -380.0 - 1e-9
+    assert result['cvar'][1] == pytest.approx(-380.0)
+    assert (result['pop'] > 0).all() and (result['pop'] < 1).all()
+
+
+def test_strategy_book_shares_contracts():
+    book = StrategyBook([PUT_CREDIT_SPREAD, {**PUT_CREDIT_SPREAD, 'net_premium': -100.0}, COVERED_CALL], SPOT)
+    assert len(book.strikes) == 3
+    np.testing.assert_array_equal(book.stock, [0.0, 0.0, 1.0])
+    pnl = book.pnl(np.array([80.0, 100.0, 120.0]))
+    # Per share at expiration
+    np.testing.assert_allclose(pnl[:, 0], [-3.8, 1.2, 1.2])
+    np.testing.assert_allclose(pnl[:, 2], [-18.5, 1.5, 6.5])
+
+
+def test_derive_seed_is_stable():
+    assert derive_seed('SPY', 'v1') == derive_seed('SPY', 'v1')
+    assert derive_seed('SPY', 'v1') != derive_seed('SPY', 'v2')
+
+
+def test_no_strategies():
+    result = evaluate_strategies([], SPOT, SIGMA, YEARS, RATE)
+    assert all(len(values) == 0 for values in result.values())
@@ -0,0 +1,262 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from data import streaming
+from data.polygon_client import PolygonClient
+from data.snapshot import MarketSnapshot
+from data.streaming import LastValueStore, LiveQuote, MoveTrigger, QuoteStream
+
+AUTH_SUCCESS = json.dumps([{'ev': 'status', 'status': 'auth_success'}])
+AUTH_FAILED = json.dumps([{'ev': 'status', 'status': 'auth_failed', 'message': 'bad key'}])
+
+# The sleeps fixture patches asyncio.sleep; the fakes keep the real one
+real_sleep = asyncio.sleep
+
+
+class FakeConnection:
+    """Replays scripted feed messages, then reports the connection closed"""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.sent = []
+        self.closed = False
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def receive(self):
+        await real_sleep(0)
+        return self.messages.pop(0) if self.messages else None
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeFeed:
+    """
+    connect() for QuoteStream: each call takes the next scripted outcome, a
+    FakeConnection or an exception to raise. Once the script runs out it
+    waits forever, like a feed that cannot be reached.
+    """
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.connects = 0
+        self.done = asyncio.Event()
+
+    async def __call__(self, url):
+        self.connects += 1
+        if not self.outcomes:
+            self.done.set()
+            await asyncio.Event().wait()
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Reconnect delays requested by the stream, without actually waiting"""
+    delays = []
+
+    async def sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(streaming.asyncio, 'sleep', sleep)
+    # No jitter: every delay is the full backoff
+    monkeypatch.setattr(streaming.random, 'uniform', lambda a, b: b)
+    return delays
+
+
+def run_stream(feed, tickers=(), **kwargs):
+    async def run():
+        stream = QuoteStream('key', connect=feed, **kwargs)
+        await stream.subscribe(tickers)
+        await stream.start()
+        try:
+            await asyncio.wait_for(feed.done.wait(), timeout=5)
+        finally:
+            await stream.stop()
+        return stream
+    return asyncio.run(run())
+
+
+def test_reconnect_backs_off_exponentially(sleeps):
+    feed = FakeFeed(*[ConnectionError('refused')] * 5)
+    stream = run_stream(feed, reconnect_delay=1.0, max_reconnect_delay=4.0)
+    assert sleeps == [1.0, 2.0, 4.0, 4.0, 4.0]
+    assert stream.reconnects == 5
+    assert stream.error == 'refused'
+    assert not stream.connected
+
+
+def test_backoff_resets_after_authenticating(sleeps):
+    first = FakeConnection([AUTH_SUCCESS])
+    second = FakeConnection([AUTH_SUCCESS])
+    feed = FakeFeed(ConnectionError('refused'), ConnectionError('refused'), first, second)
+    stream = run_stream(feed, tickers=['spy'], reconnect_delay=1.0, max_reconnect_delay=30.0)
+    # Two failures back off, then each dropped session retries from the base delay
+    assert sleeps == [1.0, 2.0, 1.0, 1.0]
+    assert first.closed and second.closed
+    for conn in (first, second):
+        assert conn.sent == [
+            {'action': 'auth', 'params': 'key'},
+            {'action': 'subscribe', 'params': 'T.SPY,Q.SPY,A.SPY'},
+        ]
+    assert stream.error == 'Feed closed the connection'
+
+
+def test_auth_failure_stops_the_stream(sleeps):
+    conn = FakeConnection([AUTH_FAILED])
+    feed = FakeFeed(conn)
+
+    async def run():
+        stream = QuoteStream('bad', connect=feed)
+        await stream.start()
+        await asyncio.wait_for(stream._task, timeout=5)
+        return stream
+
+    stream = asyncio.run(run())
+    assert stream.error == 'bad key'
+    assert feed.connects == 1
+    assert stream.reconnects == 0
+    assert sleeps == []
+    assert conn.closed and not stream.connected
+
+
+def test_trades_update_the_store_and_listeners():
+    stream = QuoteStream('key')
+    seen = []
+    stream.add_listener(lambda previous, quote: seen.append((previous and previous.price, quote.price)))
+    asyncio.run(stream.subscribe(['SPY']))
+    stream.handle(json.dumps([
+        {'ev': 'Q', 'sym': 'SPY', 'bp': 99.0, 'ap': 101.0, 't': 1000},
+        {'ev': 'T', 'sym': 'SPY', 'p': 100.5, 't': 2000},
+        {'ev': 'T', 'sym': 'QQQ', 'p': 300.0, 't': 2000},
+    ]))
+    quote = stream.store.get('SPY')
+    assert (quote.price, quote.bid, quote.ask, quote.timestamp) == (100.5, 99.0, 101.0, 2.0)
+    assert stream.store.get('QQQ') is None
+    assert seen == [(None, 100.0), (100.0, 100.5)]
+
+
+def live_snapshot(store, price, timestamp, step=0.005):
+    store.put(LiveQuote('SPY', price, last_trade=price, timestamp=timestamp))
+    client = PolygonClient('key', live_quotes=store, live_price_step=step)
+    return MarketSnapshot.from_quote(client.get_live_quote('SPY'))
+
+
+def test_ticks_in_one_price_bucket_share_a_version():
+    store = LastValueStore()
+    # 100.0 and 100.3 are inside one 0.5% log-price bucket
+    first = live_snapshot(store, 100.0, 1_700_000_000.0)
+    second = live_snapshot(store, 100.3, 1_700_000_001.5)
+    assert first.timestamp != second.timestamp
+    assert first.price != second.price
+    assert first.version == second.version
+
+
+def test_version_changes_with_the_price_bucket():
+    store = LastValueStore()
+    first = live_snapshot(store, 100.0, 1_700_000_000.0)
+    moved = live_snapshot(store, 100.6, 1_700_000_001.0)
+    back = live_snapshot(store, 100.1, 1_700_000_002.0)
+    assert moved.version != first.version
+    assert back.version == first.version
+    # A finer bucket separates what the default one groups
+    assert live_snapshot(store, 100.3, 1_700_000_003.0, step=0.001).version != first.version
+
+
+def test_version_changes_by_day():
+    store = LastValueStore()
+    assert live_snapshot(store, 100.0, 1_700_000_000.0).version != live_snapshot(store, 100.0, 1_700_086_400.0).version
+
+
+def tick(store, trigger, price, ticker='SPY'):
+    previous = store.get(ticker)
+    quote = LiveQuote(ticker, price)
+    store.put(quote)
+    trigger(previous, quote)
+
+
+def test_move_trigger_threshold():
+    async def run():
+        store = LastValueStore()
+        calls = []
+
+        async def rerank(ticker):
+            calls.append((ticker, store.get(ticker).price))
+
+        trigger = MoveTrigger(store, rerank, threshold=0.005, min_interval=0.0)
+        tick(store, trigger, 100.0)         # Sets the reference price
+        tick(store, trigger, 100.4)         # 0.4% move
+        tick(store, trigger, 99.6)
+        await asyncio.sleep(0.01)
+        assert calls == []
+        tick(store, trigger, 100.6)         # 0.6% move
+        await asyncio.sleep(0.01)
+        assert calls == [('SPY', 100.6)]
+        # Moves are measured from the price at the last run
+        tick(store, trigger, 100.9)
+        await asyncio.sleep(0.01)
+        assert calls == [('SPY', 100.6)]
+        tick(store, trigger, 100.0)
+        await asyncio.sleep(0.01)
+        assert calls == [('SPY', 100.6), ('SPY', 100.0)]
+        await trigger.close()
+
+    asyncio.run(run())
+
+
+def test_move_trigger_throttles_bursts_to_one_trailing_run():
+    async def run():
+        store = LastValueStore()
+        calls = []
+
+        async def rerank(ticker):
+            calls.append((time.monotonic(), store.get(ticker).price))
+
+        trigger = MoveTrigger(store, rerank, threshold=0.005, min_interval=0.2)
+        tick(store, trigger, 100.0)
+        tick(store, trigger, 101.0)
+        await asyncio.sleep(0.01)
+        assert len(calls) == 1
+
+        # A burst inside the quiet period costs one run, which sees the last price
+        for price in (102.0, 103.0, 104.0):
+            tick(store, trigger, price)
+        await asyncio.sleep(0.1)
+        assert len(calls) == 1
+        await asyncio.sleep(0.2)
+        assert [price for _, price in calls] == [101.0, 104.0]
+        assert calls[1][0] - calls[0][0] >= 0.2 - 0.01
+        await trigger.close()
+
+    asyncio.run(run())
+
+
+def test_move_trigger_tickers_are_throttled_separately():
+    async def run():
+        store = LastValueStore()
+        calls = []
+
+        async def rerank(ticker):
+            calls.append(ticker)
+
+        trigger = MoveTrigger(store, rerank, threshold=0.005, min_interval=10.0)
+        for ticker in ('SPY', 'QQQ'):
+            tick(store, trigger, 100.0, ticker)
+            tick(store, trigger, 101.0, ticker)
+        await asyncio.sleep(0.01)
+        assert sorted(calls) == ['QQQ', 'SPY']
+        # A pending run is cancelled on close
+        tick(store, trigger, 102.0, 'SPY')
+        await trigger.close()
+        assert sorted(calls) == ['QQQ', 'SPY']
+
+    asyncio.run(run())
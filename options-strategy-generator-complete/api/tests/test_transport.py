@@ -0,0 +1,214 @@
+import asyncio
+import time
+import types
+
+import aiohttp
+import pytest
+
+from data import transport
+from data.transport import PolygonTransport, TokenBucket, TransportConfig, TransportError, count_requests
+
+# The sleeps fixture patches asyncio.sleep; tests that really wait keep the real one
+real_sleep = asyncio.sleep
+
+
+def connect_error():
+    key = types.SimpleNamespace(host='api.polygon.io', port=443, ssl=True)
+    return aiohttp.ClientConnectorError(key, OSError(111, 'Connection refused'))
+
+
+class StubResponse:
+    def __init__(self, status, body=None, headers=None):
+        self.status = status
+        self.body = body if body is not None else {'status': 'OK'}
+        self.headers = headers or {}
+
+    async def json(self, content_type=None):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class StubSession:
+    """Answers each get() with the next scripted response, or raises it if it is an exception"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.closed = False
+
+    def get(self, url, params=None):
+        self.calls += 1
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def make_transport(session, **config):
+    t = PolygonTransport('https://api.polygon.io', TransportConfig(**config))
+
+    async def stub():
+        return session
+
+    t.session = stub
+    return t
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays requested by the transport, without waiting; jitter always takes its cap"""
+    delays = []
+
+    async def sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(transport.asyncio, 'sleep', sleep)
+    monkeypatch.setattr(transport.random, 'uniform', lambda a, b: b)
+    return delays
+
+
+def get(t, url='https://api.polygon.io/v2/aggs/ticker/SPY/prev'):
+    return asyncio.run(t.get_json(url, {}, 'previous_close'))
+
+
+def test_retries_5xx_with_full_jitter_backoff(sleeps):
+    session = StubSession(StubResponse(503), StubResponse(502), StubResponse(200, {'status': 'OK', 'n': 1}))
+    t = make_transport(session)
+    assert get(t) == (200, {'status': 'OK', 'n': 1})
+    assert session.calls == 3
+    assert (t.requests, t.retries, t.failures) == (3, 2, 0)
+    # Caps of 0.25 * 2^attempt
+    assert sleeps == [0.25, 0.5]
+
+
+def test_jitter_stays_under_the_cap(monkeypatch):
+    t = make_transport(StubSession(StubResponse(200)), backoff_base=0.25, backoff_max=1.0)
+    delays = [t._backoff(attempt, None) for attempt in range(6) for _ in range(50)]
+    assert min(delays) >= 0.0
+    assert max(delays[:50]) <= 0.25 and max(delays) <= 1.0
+
+
+def test_429_waits_at_least_retry_after(sleeps, monkeypatch):
+    monkeypatch.setattr(transport.random, 'uniform', lambda a, b: a)
+    session = StubSession(StubResponse(429, headers={'Retry-After': '2'}), StubResponse(200))
+    t = make_transport(session)
+    assert get(t)[0] == 200
+    assert sleeps == [2.0]
+
+
+def test_gives_up_after_max_retries(sleeps):
+    session = StubSession(StubResponse(503))
+    t = make_transport(session, max_retries=3)
+    with pytest.raises(TransportError) as error:
+        get(t)
+    assert error.value.status == 503
+    assert session.calls == 4
+    assert (t.requests, t.retries, t.failures) == (4, 3, 1)
+    assert len(sleeps) == 3
+
+
+def test_client_errors_are_not_retried(sleeps):
+    session = StubSession(StubResponse(404, {'status': 'NOT_FOUND'}))
+    t = make_transport(session)
+    assert get(t) == (404, {'status': 'NOT_FOUND'})
+    assert session.calls == 1 and sleeps == []
+
+
+def test_connect_errors_retry_at_most_once(sleeps):
+    session = StubSession(connect_error())
+    t = make_transport(session, max_retries=3, max_connect_retries=1)
+    with pytest.raises(TransportError, match='ClientConnectorError'):
+        get(t)
+    assert session.calls == 2
+    assert t.retries == 1
+
+
+def test_outage_cooldown_short_circuits_requests(sleeps):
+    session = StubSession(connect_error(), connect_error(), StubResponse(200))
+    t = make_transport(session, outage_cooldown=60.0)
+    with pytest.raises(TransportError):
+        get(t)
+    assert session.calls == 2
+
+    # Fails at once, without touching the network or sleeping
+    sleeps.clear()
+    with pytest.raises(TransportError, match='Polygon unavailable'):
+        get(t)
+    assert session.calls == 2
+    assert t.short_circuited == 1
+    assert sleeps == []
+    assert t.stats()['outage'] is True
+
+    # Once the cooldown is over the next request goes out again
+    t._down_until = time.monotonic() - 1
+    assert get(t)[0] == 200
+    assert session.calls == 3
+    assert t.stats()['outage'] is False
+
+
+def test_zero_cooldown_disables_short_circuit(sleeps):
+    session = StubSession(StubResponse(503), StubResponse(503), StubResponse(200))
+    t = make_transport(session, max_retries=1, outage_cooldown=0.0)
+    with pytest.raises(TransportError):
+        get(t)
+    assert get(t)[0] == 200
+    assert t.short_circuited == 0
+
+
+def test_count_requests_tallies_this_task_and_its_children(sleeps):
+    # The first request in the outer block is retried once
+    session = StubSession(StubResponse(200), StubResponse(503), StubResponse(200))
+    t = make_transport(session)
+    url = 'https://api.polygon.io/v3/snapshot/options/SPY'
+
+    async def run():
+        await t.get_json(url, {}, 'options_snapshot')          # Outside any block
+        with count_requests() as outer:
+            await t.get_json(url, {}, 'options_snapshot')
+            with count_requests() as inner:
+                await asyncio.gather(*(t.get_json(url, {}, 'options_snapshot') for _ in range(3)))
+            await asyncio.create_task(t.get_json(url, {}, 'options_snapshot'))
+        await t.get_json(url, {}, 'options_snapshot')
+        return outer, inner
+
+    outer, inner = asyncio.run(run())
+    # Nested blocks count separately, retries included
+    assert inner.requests == 3
+    assert outer.requests == 3
+    assert t.requests == 8
+
+
+def test_token_bucket_paces_after_the_burst():
+    async def run():
+        bucket = TokenBucket(rate=50.0, capacity=2)
+        started = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return bucket, time.monotonic() - started
+
+    bucket, elapsed = asyncio.run(run())
+    # Two tokens of burst, then 4 more at 50/s
+    assert bucket.waits == 4
+    assert elapsed >= 4 / 50.0 - 0.01
+    assert bucket.waited_seconds == pytest.approx(4 / 50.0, abs=0.02)
+
+
+def test_token_bucket_serves_concurrent_waiters_in_order():
+    async def run():
+        bucket = TokenBucket(rate=100.0, capacity=1)
+        order = []
+
+        async def request(i):
+            await bucket.acquire()
+            order.append(i)
+
+        await asyncio.gather(*(request(i) for i in range(5)))
+        return order
+
+    assert asyncio.run(run()) == [0, 1, 2, 3, 4]
@@ -0,0 +1,56 @@
+import numpy as np
+
+from strategies.pricing import CALL, PUT, black_scholes_price
+from strategies.volatility import implied_volatility
+
+SPOT = 100.0
+
+
+def grid():
+    strikes, years, vols = np.meshgrid(
+        np.linspace(40.0, 250.0, 43), [7 / 365, 30 / 365, 0.25, 1.0, 2.0], [0.1, 0.3, 0.6, 1.0, 1.5],
+        indexing='ij'
+    )
+    return strikes.ravel(), years.ravel(), vols.ravel()
+
+
+def test_round_trip_across_moneyness():
+    strikes, years, vols = grid()
+    for option_type in (CALL, PUT):
+        prices = black_scholes_price(SPOT, strikes, years, vols, 0.05, option_type)
+        solved = implied_volatility(prices, SPOT, strikes, years, 0.05, option_type)
+        found = np.isfinite(solved)
+        assert found.mean() > 0.75
+        np.testing.assert_allclose(solved[found], vols[found], atol=1e-5)
+
+
+def test_quotes_without_vega_are_not_solved():
+    # Deep ITM call and deep OTM put at high vol: almost no time value, so
+    # any sigma prices them. They used to come back as the 0.05 start value.
+    strikes, years, vols = np.array([40.0, 40.0]), np.array([7 / 365, 7 / 365]), np.array([1.0, 1.0])
+    for option_type in (CALL, PUT):
+        prices = black_scholes_price(SPOT, strikes, years, vols, 0.05, option_type)
+        solved = implied_volatility(prices, SPOT, strikes, years, 0.05, option_type)
+        assert np.isnan(solved).all()
+
+
+def test_deep_quotes_with_time_value_are_solved():
+    # A cent of time value is enough to recover sigma
+    strikes = np.array([60.0, 160.0])
+    prices = black_scholes_price(SPOT, strikes, 0.25, 0.45, 0.05, [PUT, CALL])
+    solved = implied_volatility(prices, SPOT, strikes, 0.25, 0.05, [PUT, CALL])
+    assert (prices > 0.01).all()
+    np.testing.assert_allclose(solved, 0.45, atol=1e-6)
+
+
+def test_prices_outside_arbitrage_bounds_are_nan():
+    intrinsic = SPOT - 90.0 * np.exp(-0.05 * 0.5)
+    solved = implied_volatility([intrinsic - 0.01, SPOT + 1.0, -1.0], SPOT, 90.0, 0.5, 0.05, CALL)
+    assert np.isnan(solved).all()
+
+
+def test_shape_is_preserved():
+    prices = black_scholes_price(SPOT, [[90.0, 100.0], [110.0, 120.0]], 0.5, 0.3, 0.05, CALL)
+    solved = implied_volatility(prices, SPOT, [[90.0, 100.0], [110.0, 120.0]], 0.5, 0.05, CALL)
+    assert solved.shape == (2, 2)
+    np.testing.assert_allclose(solved, 0.3, atol=1e-6)
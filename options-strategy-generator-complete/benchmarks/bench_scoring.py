@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Scoring throughput benchmark
+
+Usage: python benchmarks/bench_scoring.py [n_strategies ...]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from strategies.scoring import build_components, score
+
+
+def make_strategies(n: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    strategies = []
+    for _ in range(n):
+        credit = rng.random() < 0.5
+        legs = [
+            {
+                'type': 'put' if rng.random() < 0.5 else 'call',
+                'quantity': -1 if credit else 1,
+                'open_interest': float(rng.integers(0, 5000)),
+                'spread': float(rng.uniform(0.01, 0.3)),
+            }
+            for _ in range(int(rng.integers(1, 5)))
+        ]
+        strategies.append({
+            'probability_of_profit': float(rng.uniform(0.2, 0.95)),
+            'max_profit': float(rng.uniform(10, 2000)),
+            'max_loss': -float(rng.uniform(10, 5000)),
+            'net_premium': float(rng.uniform(-300, 300)),
+            'expected_value': float(rng.normal(0, 20)),
+            'cvar': -float(rng.uniform(50, 3000)),
+            'legs': legs,
+        })
+    return strategies
+
+
+def bench(n: int, repeats: int = 5):
+    strategies = make_strategies(n)
+
+    best_build = best_score = float('inf')
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        components = build_components(strategies, 0.6)
+        t1 = time.perf_counter()
+        scores = score(components, 1.0)
+        t2 = time.perf_counter()
+        best_build = min(best_build, t1 - t0)
+        best_score = min(best_score, t2 - t1)
+
+    # Identical inputs must give identical outputs
+    assert np.array_equal(scores, score(build_components(strategies, 0.6), 1.0))
+
+    total = best_build + best_score
+    print(
+        f"{n:>8} strategies  build {best_build * 1e3:8.2f} ms  score {best_score * 1e3:8.3f} ms  "
+        f"{total / n * 1e6:6.2f} us/strategy  {n / total:12,.0f} strategies/s"
+    )
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1_000, 10_000, 100_000]
+    for size in sizes:
+        bench(size)
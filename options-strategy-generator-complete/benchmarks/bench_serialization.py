@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Scan response encoding benchmark
+
+Compares the previous path (camelCase dicts walked by FastAPI's
+jsonable_encoder, then json.dumps) with strategy_result() + dumps().
+
+Usage: python benchmarks/bench_serialization.py [n_strategies ...]
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from fastapi.encoders import jsonable_encoder
+
+from responses import dumps, orjson, strategy_result
+
+
+def make_strategies(n: int, seed: int = 7):
+    """Engine-shaped strategy dicts with two to four priced legs"""
+    rng = np.random.default_rng(seed)
+    strategies = []
+    for i in range(n):
+        strike = float(rng.integers(80, 120)) * 5
+        legs = [
+            {
+                'type': 'put' if rng.random() < 0.5 else 'call',
+                'strike': strike + 5 * j,
+                'quantity': -1 if j % 2 else 1,
+                'premium': float(rng.uniform(0.5, 12)),
+                'iv': float(rng.uniform(0.15, 0.6)),
+                'symbol': f'O:SPY250117C{int(strike + 5 * j) * 1000:08d}',
+                'spread': float(rng.uniform(0.01, 0.3)),
+                'open_interest': float(rng.integers(0, 5000)),
+            }
+            for j in range(int(rng.integers(2, 5)))
+        ]
+        strategies.append({
+            'id': f'strategy_{i}',
+            'name': 'Iron Condor',
+            'type': 'neutral',
+            'complexity': 'advanced',
+            'confidence_score': float(rng.uniform(20, 90)),
+            'max_profit': float(rng.uniform(10, 2000)),
+            'max_loss': -float(rng.uniform(10, 5000)),
+            'unlimited_profit': False,
+            'unlimited_loss': False,
+            'capital_required': float(rng.uniform(100, 10000)),
+            'probability_of_profit': float(rng.uniform(0.2, 0.95)),
+            'description': 'Sell the 450/460 call spread and the 430/420 put spread',
+            'net_premium': float(rng.uniform(-300, 300)),
+            'expiration_days': 37.0,
+            'expiration_date': '2025-01-17',
+            'legs': legs,
+        })
+    return strategies
+
+
+def legacy_format(strategy, current_price, ticker):
+    """The camelCase dict the handler built before strategy_result()"""
+    return {
+        "id": strategy.get("id", ""),
+        "name": strategy.get("name", ""),
+        "type": strategy.get("type", ""),
+        "complexity": strategy.get("complexity", ""),
+        "confidence": strategy.get("confidence_score", 0),
+        "maxProfit": strategy.get("max_profit", 0),
+        "maxLoss": strategy.get("max_loss", 0),
+        "capitalRequired": strategy.get("capital_required", 0),
+        "probabilityOfProfit": strategy.get("probability_of_profit"),
+        "description": strategy.get("description", ""),
+        "netPremium": strategy.get("net_premium"),
+        "expirationDays": strategy.get("expiration_days"),
+        "expirationDate": strategy.get("expiration_date"),
+        "legs": strategy.get("legs", []),
+        "currentPrice": current_price,
+        "ticker": ticker
+    }
+
+
+def encode_legacy(strategies):
+    payload = {
+        "success": True,
+        "strategies": [legacy_format(s, 450.0, 'SPY') for s in strategies],
+        "currentPrice": 450.0,
+        "ticker": 'SPY',
+        "timestamp": '2025-01-01T00:00:00',
+    }
+    return json.dumps(jsonable_encoder(payload)).encode()
+
+
+def encode_fast(strategies):
+    return dumps({
+        "success": True,
+        "strategies": [strategy_result(s, 450.0, 'SPY') for s in strategies],
+        "currentPrice": 450.0,
+        "ticker": 'SPY',
+        "timestamp": '2025-01-01T00:00:00',
+    })
+
+
+def best_of(fn, arg, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench(n: int):
+    strategies = make_strategies(n)
+    repeats = max(5, 20000 // n)
+
+    # Both paths must describe the same strategies
+    legacy, fast = json.loads(encode_legacy(strategies)), json.loads(encode_fast(strategies))
+    assert [s['id'] for s in legacy['strategies']] == [s['id'] for s in fast['strategies']]
+
+    t_legacy = best_of(encode_legacy, strategies, repeats)
+    t_fast = best_of(encode_fast, strategies, repeats)
+    print(
+        f"{n:>8} strategies  legacy {t_legacy * 1e3:8.3f} ms  fast {t_fast * 1e3:8.3f} ms  "
+        f"speedup {t_legacy / t_fast:5.1f}x  {len(encode_fast(strategies)) / 1024:8.1f} KiB"
+    )
+
+
+if __name__ == '__main__':
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'json (orjson not installed)'}")
+    sizes = [int(arg) for arg in sys.argv[1:]] or [20, 2_000]
+    for size in sizes:
+        bench(size)
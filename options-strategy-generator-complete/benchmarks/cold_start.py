@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the serverless entry point (api/index.py)
+
+Each sample is a fresh interpreter that imports index, runs the app
+lifespan and serves one request to a route, timed in three phases:
+import, startup and first request. Upstream calls go to
+benchmarks/mock_polygon.py on loopback. A `python -X importtime` run
+reports which modules the import time goes to.
+
+Usage:
+    python benchmarks/cold_start.py                     # all routes, lazy and eager startup
+    python benchmarks/cold_start.py --runs 10 --budget-ms 800 --output cold.json
+    python benchmarks/cold_start.py health scan --modes lazy
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.abspath(os.path.join(HERE, '..', 'api'))
+
+# Route name -> path requested by the child process
+ROUTES = {
+    'health': '/api/health',
+    'catalog': '/api/strategies',
+    'quote': '/api/quote/AAPL',
+    'scan': '/api/scan?ticker=AAPL',
+}
+MODES = ('lazy', 'eager')
+# Modules whose presence after the first request shows what a route loaded
+HEAVY_MODULES = ('numpy', 'aiohttp', 'strategies.options_engine')
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def child_env(mode: str, base_url: str) -> Dict[str, str]:
+    return {
+        **os.environ,
+        'LAZY_STARTUP': '1' if mode == 'lazy' else '0',
+        'POLYGON_BASE_URL': base_url,
+        'MARKET_DATA_CACHE_DIR': '',
+        'POLYGON_PREWARM': '0',
+        'DEMO_DATA_FALLBACK': '0',
+        'PYTHONDONTWRITEBYTECODE': '1',
+    }
+
+
+def child(path: str) -> Dict[str, Any]:
+    """Runs in the fresh interpreter: import, lifespan, first and second request"""
+    started = time.perf_counter()
+    sys.path.insert(0, API_DIR)
+    import index
+    imported = time.perf_counter()
+
+    # The harness's own client is not part of the cold start
+    import httpx
+    harness_ms = (time.perf_counter() - imported) * 1e3
+
+    async def serve() -> Dict[str, Any]:
+        lifespan_started = time.perf_counter()
+        async with index.lifespan(index.app):
+            ready = time.perf_counter()
+            transport = httpx.ASGITransport(app=index.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://cold-start') as client:
+                response = await client.get(path)
+                first = time.perf_counter()
+                await client.get(path)
+                second = time.perf_counter()
+        return {
+            'import_ms': (imported - started) * 1e3,
+            'startup_ms': (ready - lifespan_started) * 1e3,
+            'first_request_ms': (first - ready) * 1e3,
+            'first_response_ms': (first - started) * 1e3 - harness_ms,
+            'warm_request_ms': (second - first) * 1e3,
+            'status': response.status_code,
+            'loaded': [name for name in HEAVY_MODULES if name in sys.modules],
+        }
+
+    return asyncio.run(serve())
+
+
+async def sample(route: str, mode: str, base_url: str) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, __file__, '--child', ROUTES[route],
+        env=child_env(mode, base_url),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"{route}/{mode} child failed:\n{stderr.decode()[-2000:]}")
+    result = json.loads(stdout.decode().strip().splitlines()[-1])
+    # Includes interpreter startup, which the in-process timers cannot see
+    result['process_ms'] = (time.perf_counter() - t0) * 1e3
+    return result
+
+
+def importtime(mode: str, top: int) -> Dict[str, Any]:
+    """Per-module import cost of `import index`, from python -X importtime"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import index'],
+        cwd=API_DIR, env=child_env(mode, 'http://127.0.0.1:9'), capture_output=True, text=True
+    )
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules.append((name, int(own) / 1e3, int(cumulative) / 1e3, len(indent) // 2))
+
+    index_total = next((cumulative for name, _, cumulative, depth in modules if name == 'index'), None)
+    # Direct imports of index, and of the interpreter before it (site, encodings)
+    direct = sorted(
+        (m for m in modules if m[3] <= 1 and m[0] != 'index'), key=lambda m: -m[2]
+    )[:top]
+    by_self = sorted(modules, key=lambda m: -m[1])[:top]
+    return {
+        'index_ms': index_total,
+        'top_cumulative': [{'module': m[0], 'cumulative_ms': round(m[2], 2)} for m in direct],
+        'top_self': [{'module': m[0], 'self_ms': round(m[1], 2)} for m in by_self],
+    }
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    keys = ('process_ms', 'import_ms', 'startup_ms', 'first_request_ms', 'first_response_ms', 'warm_request_ms')
+    summary = {key: round(statistics.median(s[key] for s in samples), 2) for key in keys}
+    summary['runs'] = len(samples)
+    summary['status'] = samples[-1]['status']
+    summary['loaded'] = samples[-1]['loaded']
+    return summary
+
+
+async def run(routes: List[str], modes: List[str], runs: int) -> Dict[str, Dict[str, Any]]:
+    sys.path.insert(0, HERE)
+    from mock_polygon import MockPolygon
+
+    results = {}
+    async with MockPolygon() as mock:
+        for mode in modes:
+            for route in routes:
+                samples = [await sample(route, mode, mock.base_url) for _ in range(runs)]
+                name = f'{route}/{mode}'
+                results[name] = summarize(samples)
+                r = results[name]
+                print(f"{name:<16} process {r['process_ms']:8.1f}  import {r['import_ms']:7.1f}  "
+                      f"startup {r['startup_ms']:7.1f}  first {r['first_request_ms']:7.1f}  "
+                      f"= {r['first_response_ms']:7.1f} ms  [{r['status']}] {', '.join(r['loaded']) or '-'}")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Cold-start benchmark for api/index.py')
+    parser.add_argument('routes', nargs='*', help=f"Routes to time (default: all of {', '.join(ROUTES)})")
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated startup modes: lazy, eager')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh processes per route and mode')
+    parser.add_argument('--top', type=int, default=12, help='Modules listed in the import breakdown')
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='Fail if any lazy-mode import + startup + first request median exceeds this')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(child(args.child)))
+        return 0
+
+    routes = args.routes or list(ROUTES)
+    modes = [m for m in args.modes.split(',') if m]
+    unknown = [r for r in routes if r not in ROUTES] + [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"Unknown routes or modes: {', '.join(unknown)}")
+
+    results = asyncio.run(run(routes, modes, args.runs))
+    breakdown = {mode: importtime(mode, args.top) for mode in modes}
+    for mode, report in breakdown.items():
+        print(f"\nimport index ({mode}): {report['index_ms']:.1f} ms; largest imports (cumulative ms)")
+        for entry in report['top_cumulative']:
+            print(f"  {entry['module']:<40}{entry['cumulative_ms']:>10.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results, 'importtime': breakdown}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.budget_ms is not None:
+        over = [
+            name for name, r in results.items()
+            if name.endswith('/lazy') and r['first_response_ms'] > args.budget_ms
+        ]
+        if over:
+            print(f"\nOver the {args.budget_ms:.0f} ms budget: {', '.join(over)}")
+            return 1
+        print(f"\nAll lazy-mode routes within the {args.budget_ms:.0f} ms budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
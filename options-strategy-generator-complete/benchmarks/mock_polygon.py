@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Local mock of the Polygon endpoints PolygonClient uses, for offline benchmarks
+
+Quotes and option chains are deterministic per ticker: the spot price comes
+from a hash of the symbol and contracts are priced with Black-Scholes on a
+smile, so repeated runs see identical data. /stocks is a WebSocket feed that
+sends random-walk trades for subscribed tickers every tick_interval seconds.
+
+Usage: python benchmarks/mock_polygon.py [--port 8765] [--latency-ms 0]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from strategies.pricing import black_scholes_price
+
+DEFAULT_EXPIRIES = (7, 14, 21, 30, 37, 44, 60, 90)
+
+
+def spot_for(ticker: str) -> float:
+    return 50.0 + zlib.crc32(ticker.encode()) % 45000 / 100.0
+
+
+def make_contracts(
+    ticker: str,
+    strikes: int = 41,
+    expiries: Sequence[int] = DEFAULT_EXPIRIES,
+    today: Optional[date] = None
+) -> List[Dict]:
+    """Snapshot results for one underlying, in Polygon's /v3/snapshot/options shape"""
+    today = today or date.today()
+    spot = spot_for(ticker)
+    step = max(round(spot * 0.01, 0), 1.0)
+    grid = np.round(spot / step) * step + (np.arange(strikes) - strikes // 2) * step
+    grid = grid[grid > 0]
+
+    contracts = []
+    for dte in expiries:
+        expiry = (today + timedelta(days=dte)).isoformat()
+        years = dte / 365.0
+        iv = 0.22 + 0.25 * np.abs(np.log(grid / spot)) - 0.04 * np.log(grid / spot)
+        for kind, code in (('call', 1), ('put', -1)):
+            prices = black_scholes_price(spot, grid, years, iv, 0.05, code)
+            spread = np.maximum(0.02, prices * 0.03)
+            for strike, price, half, vol in zip(grid, prices, spread / 2, iv):
+                contracts.append({
+                    'details': {
+                        'ticker': f"O:{ticker}{expiry.replace('-', '')[2:]}{kind[0].upper()}{int(strike * 1000):08d}",
+                        'strike_price': float(strike),
+                        'expiration_date': expiry,
+                        'contract_type': kind,
+                    },
+                    'last_quote': {'bid': round(max(price - half, 0.0), 2), 'ask': round(price + half, 2)},
+                    'implied_volatility': round(float(vol), 4),
+                    'open_interest': 100 + zlib.crc32(f'{ticker}{expiry}{strike}'.encode()) % 5000,
+                })
+    return contracts
+
+
+class MockPolygon:
+    """aiohttp server answering /v2/aggs and /v3/snapshot/options requests and the /stocks feed"""
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        page_size: int = 250,
+        strikes: int = 41,
+        tick_interval: float = 0.05
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.page_size = page_size
+        self.strikes = strikes
+        self.tick_interval = tick_interval
+        self.requests = 0
+        self.prices: Dict[str, float] = {}
+        self._contracts: Dict[str, List[Dict]] = {}
+        self._feeds: Set[web.WebSocketResponse] = set()
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_get('/v2/aggs/ticker/{ticker}/prev', self.previous_close)
+        self.app.router.add_get('/v2/aggs/ticker/{ticker}/range/1/day/{start}/{end}', self.daily_bars)
+        self.app.router.add_get('/v3/snapshot/options/{ticker}', self.options_snapshot)
+        self.app.router.add_get('/v3/reference/options/contracts', self.empty)
+        self.app.router.add_get('/stocks', self.stocks_feed)
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def stream_url(self) -> str:
+        return f'ws://{self.host}:{self.port}/stocks'
+
+    async def start(self) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.base_url
+
+    async def stop(self):
+        for ws in list(self._feeds):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> 'MockPolygon':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _respond(self, body: Dict) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response(body)
+
+    async def previous_close(self, request: web.Request) -> web.Response:
+        spot = spot_for(request.match_info['ticker'])
+        return await self._respond({
+            'status': 'OK',
+            'resultsCount': 1,
+            'results': [{'o': spot * 0.995, 'h': spot * 1.01, 'l': spot * 0.99, 'c': spot, 'v': 1e6}],
+        })
+
+    async def daily_bars(self, request: web.Request) -> web.Response:
+        ticker = request.match_info['ticker']
+        start = np.datetime64(request.match_info['start'])
+        end = np.datetime64(request.match_info['end'])
+        days = np.arange(start, end + 1, dtype='datetime64[D]')
+        days = days[np.is_busday(days)]
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        close = spot_for(ticker) * np.exp(np.cumsum(rng.normal(0, 0.015, len(days))))
+        results = [
+            {
+                't': int(datetime.fromisoformat(str(day)).replace(tzinfo=timezone.utc).timestamp() * 1000),
+                'o': c * 0.998, 'h': c * 1.01, 'l': c * 0.99, 'c': c, 'v': 1e6,
+            }
+            for day, c in zip(days, close.tolist())
+        ]
+        return await self._respond({'status': 'OK', 'resultsCount': len(results), 'results': results})
+
+    async def options_snapshot(self, request: web.Request) -> web.Response:
+        ticker = request.match_info['ticker']
+        if ticker not in self._contracts:
+            self._contracts[ticker] = make_contracts(ticker, self.strikes)
+        gte = request.query.get('expiration_date.gte', '')
+        lte = request.query.get('expiration_date.lte', '9999')
+        rows = [c for c in self._contracts[ticker] if gte <= c['details']['expiration_date'] <= lte]
+
+        cursor = int(request.query.get('cursor', 0))
+        page = rows[cursor:cursor + self.page_size]
+        body = {'status': 'OK', 'results': page}
+        if cursor + self.page_size < len(rows):
+            body['next_url'] = (
+                f'{self.base_url}/v3/snapshot/options/{ticker}?cursor={cursor + self.page_size}'
+                f'&expiration_date.gte={gte}&expiration_date.lte={lte}'
+            )
+        return await self._respond(body)
+
+    async def empty(self, request: web.Request) -> web.Response:
+        return await self._respond({'status': 'OK', 'results': []})
+
+    async def push_trade(self, ticker: str, price: float):
+        """Send one trade to every connection subscribed to ticker"""
+        self.prices[ticker] = price
+        event = [{'ev': 'T', 'sym': ticker, 'p': round(price, 4), 's': 100, 't': int(time.time() * 1000)}]
+        for ws in list(self._feeds):
+            if ticker in ws['tickers'] and not ws.closed:
+                await ws.send_json(event)
+
+    async def stocks_feed(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        ws['tickers'] = set()
+        await ws.send_json([{'ev': 'status', 'status': 'connected', 'message': 'Connected Successfully'}])
+        ticker_task = None
+        try:
+            async for msg in ws:
+                message = msg.json()
+                action = message.get('action')
+                if action == 'auth':
+                    await ws.send_json([{'ev': 'status', 'status': 'auth_success', 'message': 'authenticated'}])
+                    self._feeds.add(ws)
+                    ticker_task = ticker_task or asyncio.create_task(self._random_walk(ws))
+                elif action in ('subscribe', 'unsubscribe'):
+                    symbols = {p.split('.', 1)[1] for p in message.get('params', '').split(',') if '.' in p}
+                    if action == 'subscribe':
+                        ws['tickers'] |= symbols
+                    else:
+                        ws['tickers'] -= symbols
+        finally:
+            self._feeds.discard(ws)
+            if ticker_task is not None:
+                ticker_task.cancel()
+        return ws
+
+    async def _random_walk(self, ws: web.WebSocketResponse):
+        rng = np.random.default_rng(0)
+        while not ws.closed and self.tick_interval > 0:
+            await asyncio.sleep(self.tick_interval)
+            for ticker in sorted(ws['tickers']):
+                price = self.prices.get(ticker, spot_for(ticker)) * float(np.exp(rng.normal(0, 0.0005)))
+                await self.push_trade(ticker, price)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay added to every response')
+    args = parser.parse_args()
+
+    mock = MockPolygon(args.host, args.port, latency=args.latency_ms / 1000.0)
+    web.run_app(mock.app, host=args.host, port=args.port, access_log=None)
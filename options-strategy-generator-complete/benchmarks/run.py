@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the engine, Polygon client and API hot paths
+
+Every case runs against local data: the engine on a synthetic chain, the
+client and the API against benchmarks/mock_polygon.py on loopback, and the
+API through an in-process ASGI client. Results are written as JSON and
+compared with a stored baseline; a case whose median slows down by more
+than the tolerance fails the run.
+
+Usage:
+    python benchmarks/run.py                        # run all cases, compare with baseline.json
+    python benchmarks/run.py --quick --output results.json
+    python benchmarks/run.py --update-baseline      # record this machine's numbers
+    python benchmarks/run.py engine_scan_cold api_scan_cached
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, '..', 'api'))
+
+# The API reads its settings at import: no disk cache, no prewarm, no demo data
+os.environ.setdefault('MARKET_DATA_CACHE_DIR', '')
+os.environ.setdefault('POLYGON_PREWARM', '0')
+os.environ.setdefault('DEMO_DATA_FALLBACK', '0')
+# The client-side rate limiter would otherwise dominate request timings
+os.environ.setdefault('POLYGON_RATE_LIMIT', '1000000')
+os.environ.setdefault('POLYGON_RATE_BURST', '1000000')
+
+from mock_polygon import MockPolygon, make_contracts, spot_for
+from data.chain import OptionChain
+from data.polygon_client import PolygonClient
+from data.snapshot import MarketSnapshot
+from data.transport import TransportConfig
+from strategies.options_engine import OptionsStrategyEngine
+
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline.json')
+UNLIMITED = TransportConfig(rate_limit=1e6, burst=1_000_000)
+TICKERS = ['SPY', 'QQQ', 'AAPL', 'MSFT', 'NVDA', 'AMZN', 'TSLA', 'META', 'GOOGL', 'IWM']
+
+# name -> async fn(quick) returning (timings in seconds, extra fields)
+CASES: Dict[str, Callable[[bool], Awaitable[tuple]]] = {}
+
+
+def case(name: str):
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+def summarize(timings: List[float], extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    ms = np.asarray(timings) * 1e3
+    return {
+        'n': len(ms),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'min_ms': float(ms.min()),
+        'ops_per_s': float(1e3 / ms.mean()) if ms.mean() > 0 else None,
+        **(extra or {}),
+    }
+
+
+async def timed(fn: Callable[[], Awaitable[Any]], iterations: int, warmup: int = 2) -> List[float]:
+    for _ in range(warmup):
+        await fn()
+    timings = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def offline_snapshot(ticker: str = 'SPY', min_dte: int = 30, max_dte: int = 45) -> MarketSnapshot:
+    """The snapshot PolygonClient would build from the mock server, without the network"""
+    records = [PolygonClient._parse_snapshot_contract(c) for c in make_contracts(ticker)]
+    chain = OptionChain.from_records(ticker, records).slice_dte(min_dte, max_dte)
+    spot = spot_for(ticker)
+    quote = {
+        'ticker': ticker, 'price': spot, 'high': spot * 1.01, 'low': spot * 0.99,
+        'open': spot * 0.995, 'volume': 1e6, 'timestamp': 'benchmark',
+    }
+    return MarketSnapshot.from_quote(quote, chain)
+
+
+# Engine
+
+@case('engine_scan_cold')
+async def engine_scan_cold(quick: bool):
+    """Full scan: surface fit, spread search, simulation and scoring"""
+    engine = OptionsStrategyEngine(None)
+    snapshot = offline_snapshot()
+
+    async def scan():
+        engine._scan_cache.clear()
+        engine._surfaces.clear()
+        return await engine.scan_strategies('SPY', snapshot=snapshot)
+
+    timings = await timed(scan, 5 if quick else 30)
+    return timings, {'strategies': len(await scan())}
+
+
+@case('engine_scan_warm_surface')
+async def engine_scan_warm_surface(quick: bool):
+    """Scan with the snapshot's volatility surface already fitted"""
+    engine = OptionsStrategyEngine(None)
+    snapshot = offline_snapshot()
+
+    async def scan():
+        engine._scan_cache.clear()
+        return await engine.scan_strategies('SPY', snapshot=snapshot)
+
+    return await timed(scan, 10 if quick else 50), {}
+
+
+@case('engine_strategy_metrics')
+async def engine_strategy_metrics(quick: bool):
+    """_calculate_strategy_metrics for every registered template on one expiry"""
+    engine = OptionsStrategyEngine(None)
+    snapshot = offline_snapshot()
+    chain = snapshot.chain
+    expiry_chain = chain.expiry_slice(chain.nearest_expiry(37))
+    templates = engine.strategies
+
+    async def metrics():
+        for template in templates:
+            engine._calculate_strategy_metrics(template, snapshot.price, 37.0, expiry_chain)
+
+    timings = await timed(metrics, 50 if quick else 500)
+    per_call = [t / len(templates) for t in timings]
+    return per_call, {'templates': len(templates)}
+
+
+# Polygon client
+
+@case('client_stock_price_cold')
+async def client_stock_price_cold(quick: bool):
+    """get_stock_price with an empty quote cache: one HTTP round trip to the mock"""
+    async with MockPolygon() as mock:
+        client = PolygonClient('benchmark', transport_config=UNLIMITED, demo_fallback=False)
+        client.base_url = mock.base_url
+        await client.start()
+        try:
+            async def fetch():
+                client.quote_cache.clear()
+                assert await client.get_stock_price('SPY') is not None
+            timings = await timed(fetch, 50 if quick else 500, warmup=5)
+        finally:
+            await client.close()
+    return timings, {'mock_requests': mock.requests}
+
+
+@case('client_stock_price_cached')
+async def client_stock_price_cached(quick: bool):
+    """get_stock_price served from the quote cache"""
+    async with MockPolygon() as mock:
+        client = PolygonClient('benchmark', transport_config=UNLIMITED, demo_fallback=False)
+        client.base_url = mock.base_url
+        await client.start()
+        try:
+            async def fetch():
+                await client.get_stock_price('SPY')
+            timings = await timed(fetch, 1000 if quick else 20000)
+        finally:
+            await client.close()
+    return timings, {'mock_requests': mock.requests}
+
+
+# Payoff diagrams
+
+@case('payoff_dense_grid')
+async def payoff_dense_grid(quick: bool):
+    """Payoff of the scan's strategy with the most legs over 1,000 prices x 45 dates, as JSON"""
+    from responses import dumps
+    from strategies.payoff import strategy_payoff
+
+    snapshot = offline_snapshot()
+    strategies = await OptionsStrategyEngine(None).scan_strategies('SPY', snapshot=snapshot, max_strategies=20)
+    strategy = max(strategies, key=lambda s: len(s['legs']))
+
+    async def payoff():
+        return dumps(strategy_payoff(strategy, snapshot.price, points=1000, dates=45))
+
+    timings = await timed(payoff, 20 if quick else 200)
+    return timings, {'legs': len(strategy['legs']), 'bytes': len(await payoff())}
+
+
+# Exports
+
+@case('export_csv_gzip')
+async def export_csv_gzip(quick: bool):
+    """Gzipped CSV export of 20,000 rows, with its peak traced memory next to a 5x larger one"""
+    import tracemalloc
+    from export import encode_stream, select_columns
+    from responses import strategy_result
+
+    snapshot = offline_snapshot()
+    strategies = await OptionsStrategyEngine(None).scan_strategies('SPY', snapshot=snapshot, max_strategies=20)
+    rows = [{**strategy_result(s, snapshot.price, 'SPY'), 'rank': i, 'stale': False} for i, s in enumerate(strategies, 1)]
+
+    async def batches(count: int):
+        for i in range(count // len(rows)):
+            yield [{**row, 'ticker': f'T{i:05d}'} for row in rows]
+
+    async def export(count: int = 20000) -> int:
+        size = 0
+        async for chunk in encode_stream(batches(count), 'csv', select_columns(None), 'gzip'):
+            size += len(chunk)
+        return size
+
+    def peak_mb(count: int) -> float:
+        tracemalloc.start()
+        try:
+            asyncio.run(export(count))
+            return tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+
+    timings = await timed(export, 3 if quick else 10, warmup=1)
+    # A fresh loop in a thread, since this one is already running
+    small, large = await asyncio.get_running_loop().run_in_executor(
+        None, lambda: (peak_mb(20000), peak_mb(100000))
+    )
+    return timings, {'bytes': await export(), 'peak_mb_20k_rows': round(small, 2), 'peak_mb_100k_rows': round(large, 2)}
+
+
+# Screener
+
+@case('screener_query')
+async def screener_query(quick: bool):
+    """Top 50 neutral strategies under $2k across a 200-ticker screener index"""
+    from responses import strategy_result
+    from strategies.screener import ScreenerIndex
+
+    engine = OptionsStrategyEngine(None)
+    rows = {}
+    for ticker in TICKERS:
+        snapshot = offline_snapshot(ticker)
+        strategies = await engine.scan_strategies(ticker, snapshot=snapshot, max_strategies=20)
+        rows[ticker] = [strategy_result(s, snapshot.price, ticker) for s in strategies]
+
+    # 200 tickers, each with the results of one of the scanned ones
+    index = ScreenerIndex()
+    for i in range(200):
+        name = f'T{i:03d}'
+        index.update(name, [
+            {**row, 'ticker': name, 'id': f"{row['id']}_{name}", 'stale': False}
+            for row in rows[TICKERS[i % len(TICKERS)]]
+        ])
+
+    async def query():
+        return index.query(types=['neutral'], max_capital=2000, limit=50)
+
+    timings = await timed(query, 200 if quick else 2000)
+    return timings, {'rows': len(index), 'matches': len(await query())}
+
+
+# API
+
+async def api_scan_load(quick: bool, memoized: bool):
+    import httpx
+    import index
+
+    async with MockPolygon() as mock:
+        index.init_engine()
+        index.polygon_client.base_url = mock.base_url
+        await index.polygon_client.start()
+        transport = httpx.ASGITransport(app=index.app)
+        requests = 40 if quick else 400
+        concurrency = 8
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+                # Load market data once; the cases measure the request path, not Polygon
+                for ticker in TICKERS:
+                    response = await client.post('/api/scan', json={'ticker': ticker})
+                    assert response.status_code == 200, response.text
+
+                semaphore = asyncio.Semaphore(concurrency)
+                latencies = []
+
+                async def one(i: int):
+                    async with semaphore:
+                        if not memoized:
+                            index.response_cache.clear()
+                            index.strategy_engine._scan_cache.clear()
+                        t0 = time.perf_counter()
+                        response = await client.get('/api/scan', params={'ticker': TICKERS[i % len(TICKERS)]})
+                        latencies.append(time.perf_counter() - t0)
+                        assert response.status_code == 200, response.text
+
+                # The client shares the server's event loop. With SCAN_EXECUTOR=inline a
+                # request cannot even be sent while another scan blocks the loop, so
+                # its timer misses that wait and p50 reads lower than the real
+                # latency. Compare modes by throughput_rps.
+                t0 = time.perf_counter()
+                await asyncio.gather(*(one(i) for i in range(requests)))
+                wall = time.perf_counter() - t0
+        finally:
+            index.strategy_engine.executor.shutdown()
+            await index.polygon_client.close()
+            index.polygon_client = None
+            index.strategy_engine = None
+
+    return latencies, {'concurrency': concurrency, 'throughput_rps': requests / wall}
+
+
+@case('api_scan_uncached')
+async def api_scan_uncached(quick: bool):
+    """GET /api/scan recomputed on every request, market data in memory"""
+    return await api_scan_load(quick, memoized=False)
+
+
+@case('api_scan_cached')
+async def api_scan_cached(quick: bool):
+    """GET /api/scan served from the response cache"""
+    return await api_scan_load(quick, memoized=True)
+
+
+@case('api_health_under_scan_load')
+async def api_health_under_scan_load(quick: bool):
+    """GET /api/health latency while uncached scans run on the configured SCAN_EXECUTOR"""
+    import httpx
+    import index
+
+    async with MockPolygon() as mock:
+        index.init_engine()
+        index.polygon_client.base_url = mock.base_url
+        await index.polygon_client.start()
+        transport = httpx.ASGITransport(app=index.app)
+        scans = 40 if quick else 200
+        latencies = []
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+                for ticker in TICKERS:
+                    response = await client.post('/api/scan', json={'ticker': ticker})
+                    assert response.status_code == 200, response.text
+
+                async def scan(i: int):
+                    # A distinct capital limit per request keeps every scan uncached
+                    response = await client.get(
+                        '/api/scan', params={'ticker': TICKERS[i % len(TICKERS)], 'max_capital': 100000 + i}
+                    )
+                    assert response.status_code == 200, response.text
+
+                # Probes are timed from when they were due, so time the event
+                # loop spends blocked in a scan counts against the health check
+                load = asyncio.ensure_future(asyncio.gather(*(scan(i) for i in range(scans))))
+                while not load.done():
+                    due = time.perf_counter() + 0.005
+                    await asyncio.sleep(0.005)
+                    response = await client.get('/api/health')
+                    latencies.append(time.perf_counter() - due)
+                    assert response.status_code == 200, response.text
+                await load
+        finally:
+            index.strategy_engine.executor.shutdown()
+            await index.polygon_client.close()
+            index.polygon_client = None
+            index.strategy_engine = None
+
+    return latencies, {'executor': index.SCAN_EXECUTOR, 'scans': scans, 'max_ms': max(latencies) * 1e3}
+
+
+# Reporting
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float, floor_ms: float) -> List[str]:
+    """Print a comparison table and return the names of regressed cases"""
+    regressions = []
+    print(f"\n{'case':<28}{'p50 ms':>12}{'baseline':>12}{'change':>10}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<28}{result['p50_ms']:>12.3f}{'-':>12}{'new':>10}")
+            continue
+        change = result['p50_ms'] / base['p50_ms'] - 1 if base['p50_ms'] else 0.0
+        # Sub-floor differences are timer noise, not regressions
+        regressed = change > tolerance and result['p50_ms'] - base['p50_ms'] > floor_ms
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{name:<28}{result['p50_ms']:>12.3f}{base['p50_ms']:>12.3f}{change:>+10.1%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+async def run_cases(names: List[str], quick: bool) -> Dict[str, Dict]:
+    results = {}
+    for name in names:
+        t0 = time.perf_counter()
+        timings, extra = await CASES[name](quick)
+        results[name] = summarize(timings, extra)
+        print(f"{name:<28} p50 {results[name]['p50_ms']:9.3f} ms  p95 {results[name]['p95_ms']:9.3f} ms  "
+              f"({time.perf_counter() - t0:.1f}s)")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Offline benchmark suite')
+    parser.add_argument('cases', nargs='*', help=f"Cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument('--quick', action='store_true', help='Fewer iterations, for CI smoke runs')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON to compare against')
+    parser.add_argument('--update-baseline', action='store_true', help='Overwrite the baseline with this run')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p50 slowdown, as a fraction')
+    parser.add_argument('--floor-ms', type=float, default=0.05, help='Ignore p50 differences below this')
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(unknown)}")
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+    results = asyncio.run(run_cases(args.cases or list(CASES), args.quick))
+    report = {'environment': environment(), 'quick': args.quick, 'results': results}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        merged = report
+        if os.path.exists(args.baseline) and args.cases:
+            # Updating a subset keeps the other cases' baselines
+            with open(args.baseline) as f:
+                merged = json.load(f)
+            merged['results'].update(results)
+            merged['environment'] = report['environment']
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(args.baseline) or '.', delete=False) as f:
+            json.dump(merged, f, indent=2)
+            f.write('\n')
+        os.replace(f.name, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['results'], args.tolerance, args.floor_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print('\nNo regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())